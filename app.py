@@ -1,12 +1,50 @@
-from fastapi import FastAPI, Request, Form # type: ignore
-from fastapi.responses import HTMLResponse # type: ignore
+from fastapi import FastAPI, Request, Form, HTTPException # type: ignore
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse # type: ignore
 from fastapi.templating import Jinja2Templates # type: ignore
 from fastapi.staticfiles import StaticFiles # type: ignore
 import uvicorn # type: ignore
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from src.exception import CustomException
+from src.logger import logging
 from src.pipeline.predict_pipeline import PredictPipeline, CustomData
+from src.pipeline.schemas import BatchPredictRequest, BatchPredictResponse
+from src.pipeline.model_registry import model_registry
+from src.pipeline.micro_batcher import MicroBatcher
+from src.pipeline.audit_log import audit_log
+from src.utils.metrics import observe_stage, record_stage
+from src.utils.profiler import SamplingProfiler, SamplingProfilerConfig
 from prometheus_fastapi_instrumentator import Instrumentator # type: ignore
 
-app = FastAPI(title="CreditRisk AI")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load and warm up the artifacts once, before the first request is accepted
+    # (a no-op when gunicorn already did it in the master process).
+    model_registry.load()
+    audit_log.start()
+    await micro_batcher.start()
+    yield
+    await micro_batcher.stop()
+    audit_log.stop()
+
+class RequestTimer:
+    '''ASGI middleware stamping the arrival time, so handlers can time the form parsing done before them.'''
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["received_at"] = time.perf_counter()
+        await self.app(scope, receive, send)
+
+app = FastAPI(title="CreditRisk AI", lifespan=lifespan)
+app.add_middleware(RequestTimer)
+predict_pipeline = PredictPipeline()
+model_registry.set_warmup(predict_pipeline.warmup)
+micro_batcher = MicroBatcher(predict_pipeline)
+profiler_config = SamplingProfilerConfig()
+profile_lock = asyncio.Lock()
 
 Instrumentator().instrument(app).expose(app)
 
@@ -36,24 +74,28 @@ async def post_predict(
     loan_percent_income: float = Form(...),
     cb_person_cred_hist_length: float = Form(...)
 ):
+    labels = model_registry.metric_labels()
+    record_stage("form_parsing", *labels, time.perf_counter() - request.state.received_at)
     try:
-        input_data = CustomData(
-            person_age=person_age,
-            person_income=person_income,
-            person_home_ownership=person_home_ownership,
-            person_emp_length=person_emp_length,
-            loan_intent=loan_intent,
-            loan_grade=loan_grade,
-            loan_amnt=loan_amnt,
-            loan_int_rate=loan_int_rate,
-            cb_person_default_on_file=cb_person_default_on_file,
-            loan_percent_income=loan_percent_income,
-            cb_person_cred_hist_length=cb_person_cred_hist_length
-        )
+        with observe_stage("custom_data", *labels):
+            input_data = CustomData(
+                person_age=person_age,
+                person_income=person_income,
+                person_home_ownership=person_home_ownership,
+                person_emp_length=person_emp_length,
+                loan_intent=loan_intent,
+                loan_grade=loan_grade,
+                loan_amnt=loan_amnt,
+                loan_int_rate=loan_int_rate,
+                cb_person_default_on_file=cb_person_default_on_file,
+                loan_percent_income=loan_percent_income,
+                cb_person_cred_hist_length=cb_person_cred_hist_length
+            )
+            record = input_data.get_data_as_dict()
         
-        input_df = input_data.get_data_as_data_frame()
-        predict_pipeline = PredictPipeline()
-        prediction = predict_pipeline.predict(input_df)
+        probability, label, decision, version = await micro_batcher.submit(record)
+        audit_log.submit([record], [probability], [label], version, labels[0],
+                         time.perf_counter() - request.state.received_at, source="form", decisions=[decision])
 
         input_dict = {
             "person_age": person_age,
@@ -68,10 +110,12 @@ async def post_predict(
             "cb_person_cred_hist_length": cb_person_cred_hist_length
         }
             
-        if prediction[0] == 1:
-            return templates.TemplateResponse("result_failed.html", {"request": request, "data": input_dict})
-        else:
-            return templates.TemplateResponse("result_success.html", {'request': request, "data":input_dict})
+        # TemplateResponse renders the template when it is constructed.
+        with observe_stage("render", *labels):
+            if label == 1:
+                return templates.TemplateResponse("result_failed.html", {"request": request, "data": input_dict})
+            else:
+                return templates.TemplateResponse("result_success.html", {'request': request, "data":input_dict})
     
     except Exception as e:
         return templates.TemplateResponse("home.html", {
@@ -79,6 +123,57 @@ async def post_predict(
             "error": str(e)
         })
 
+def record_error(error):
+    '''The invalid-input error behind a scoring failure (e.g. an unknown category), or None for a server error.'''
+    cause = error.args[0] if isinstance(error, CustomException) and error.args else error
+    # pydantic's ValidationError is a ValueError too.
+    return cause if isinstance(cause, (ValueError, TypeError, KeyError)) else None
+
+@app.post('/v1/predict/batch', response_model=BatchPredictResponse)
+def predict_batch(request: Request, payload: BatchPredictRequest):
+    # Plain `def`: FastAPI runs it in the threadpool, keeping the CPU work off the event loop.
+    try:
+        records = [record.model_dump() for record in payload.records]
+        probabilities, labels, decisions, version = predict_pipeline.predict_records(records)
+    except Exception as e:
+        # The full error (with server paths) goes to the log only.
+        logging.error(f"Batch scoring of {len(payload.records)} records failed: {str(e)}")
+        invalid = record_error(e)
+        if invalid is not None:
+            raise HTTPException(status_code=422, detail=f"Invalid records: {invalid}")
+        raise HTTPException(status_code=500, detail="Internal error while scoring the batch")
+    audit_log.submit(records, probabilities, labels, version, model_registry.metric_labels()[0],
+                     time.perf_counter() - request.state.received_at, source="batch", decisions=decisions, block=True)
+    return BatchPredictResponse(
+        version=version,
+        count=len(labels),
+        probabilities=probabilities.tolist(),
+        labels=labels.tolist(),
+        decisions=decisions.tolist(),
+    )
+
+@app.get('/health')
+async def health():
+    status = model_registry.status()
+    return JSONResponse(status, status_code=200 if status["loaded"] else 503)
+
+@app.get('/debug/profile', response_class=PlainTextResponse)
+async def debug_profile(seconds: float = 10, interval_ms: float = None):
+    '''Samples every thread for `seconds` and returns folded stacks (pipe into flamegraph.pl or speedscope).'''
+    if not profiler_config.enabled:
+        raise HTTPException(status_code=404, detail="Profiler disabled, set PROFILER_ENABLED=1")
+    if profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already being captured")
+    async with profile_lock:
+        interval = (interval_ms or profiler_config.default_interval_ms) / 1000
+        profiler = SamplingProfiler(interval).start()
+        try:
+            # Sleep on the event loop, so the requests being profiled keep being served.
+            await asyncio.sleep(min(max(seconds, 0), profiler_config.max_seconds))
+        finally:
+            profiler.stop()
+    return PlainTextResponse(profiler.folded())
+
 @app.get('/about', response_class=HTMLResponse)
 async def get_about(request: Request):
     return templates.TemplateResponse("about.html", {'request': request})
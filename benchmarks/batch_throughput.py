@@ -0,0 +1,37 @@
+'''Compares per-row scoring against one vectorized batch pass.
+
+Usage: python -m benchmarks.batch_throughput --rows 5000
+'''
+import argparse
+import time
+from benchmarks.common import synthetic_records
+from src.pipeline.predict_pipeline import PredictPipeline, CustomData, records_to_data_frame
+
+def run(rows):
+    records = synthetic_records(rows)
+    pipeline = PredictPipeline()
+    pipeline.registry.load()
+
+    start = time.perf_counter()
+    for record in records:
+        pipeline.predict(CustomData(**record).get_data_as_data_frame())
+    per_row_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pipeline.predict_batch(records_to_data_frame(records))
+    batch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pipeline.predict_records(records)
+    records_seconds = time.perf_counter() - start
+
+    print(f"rows:      {rows}")
+    print(f"per-row:   {per_row_seconds:.3f}s  ({rows / per_row_seconds:,.0f} rows/s)")
+    print(f"batch:     {batch_seconds:.3f}s  ({rows / batch_seconds:,.0f} rows/s)")
+    print(f"records:   {records_seconds:.3f}s  ({rows / records_seconds:,.0f} rows/s, compiled preprocessor)")
+    print(f"speed-up:  {per_row_seconds / batch_seconds:.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    run(parser.parse_args().rows)
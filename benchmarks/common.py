@@ -0,0 +1,64 @@
+import numpy as np # type: ignore
+
+CATEGORIES = {
+    "person_home_ownership": (["RENT", "MORTGAGE", "OWN", "OTHER"], [0.51, 0.41, 0.075, 0.005]),
+    "loan_intent": (["EDUCATION", "MEDICAL", "VENTURE", "PERSONAL", "DEBTCONSOLIDATION", "HOMEIMPROVEMENT"],
+                    [0.20, 0.19, 0.17, 0.17, 0.16, 0.11]),
+    "loan_grade": (["A", "B", "C", "D", "E", "F", "G"], [0.33, 0.32, 0.20, 0.11, 0.03, 0.008, 0.002]),
+    "cb_person_default_on_file": (["N", "Y"], [0.82, 0.18]),
+}
+
+def synthetic_records(n, seed=42):
+    '''Draws `n` application dicts roughly following the training data distribution.'''
+    rng = np.random.default_rng(seed)
+    age = np.clip(rng.normal(27.8, 6.4, n), 20, 80).astype(int)
+    income = np.clip(rng.lognormal(10.9, 0.55, n), 4000, 2_000_000).round(0)
+    loan_amnt = np.clip(rng.lognormal(9.0, 0.65, n), 500, 35000).round(0)
+    columns = {
+        "person_age": age,
+        "person_income": income,
+        "person_emp_length": np.clip(rng.normal(4.8, 4.0, n), 0, 40).round(0),
+        "loan_amnt": loan_amnt,
+        "loan_int_rate": np.clip(rng.normal(11.0, 3.1, n), 5.4, 23.2).round(2),
+        "loan_percent_income": np.clip(loan_amnt / income, 0, 0.83).round(2),
+        "cb_person_cred_hist_length": np.clip(age - 20 + rng.integers(-2, 3, n), 2, 30).astype(float),
+    }
+    for col, (values, weights) in CATEGORIES.items():
+        columns[col] = rng.choice(values, size=n, p=np.asarray(weights) / np.sum(weights))
+    return [
+        {col: values[i].item() for col, values in columns.items()}
+        for i in range(n)
+    ]
+
+def training_records(n, seed=42):
+    '''Samples `n` complete application dicts from the processed training split, or synthesizes them if it is missing.'''
+    import os
+    from src.components.data_ingestion import DataIngestionConfig
+    from src.pipeline.predict_pipeline import FEATURE_COLUMNS
+    from src.utils.common import read_frame
+    train_path = DataIngestionConfig().train_data_path
+    if not os.path.exists(train_path):
+        return synthetic_records(n, seed)
+    # Complete rows only: the form endpoint requires every field.
+    df = read_frame(train_path)[FEATURE_COLUMNS].dropna().sample(n=n, replace=True, random_state=seed)
+    df["person_age"] = df["person_age"].astype(int)
+    return [
+        {col: (value.item() if hasattr(value, 'item') else value) for col, value in record.items()}
+        for record in df.astype(object).to_dict('records')
+    ]
+
+def synthetic_training_arrays(n, seed=42, test_size=0.2):
+    '''Builds (X_train, y_train, X_test, y_test) like DataTransformation returns, from synthetic applications.
+
+    Features go through the shipped preprocessor; labels are drawn from the shipped model's
+    default probabilities so the class balance resembles the real data.
+    '''
+    import pandas as pd # type: ignore
+    from src.utils.common import load_object
+    preprocessor = load_object("artifacts/models/preprocessor.joblib")
+    model = load_object("artifacts/models/model.joblib")
+    X = preprocessor.transform(pd.DataFrame(synthetic_records(n, seed))).astype(np.float32)
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n) < model.predict_proba(X)[:, 1] * 0.6).astype(np.int8)
+    split = int(n * (1 - test_size))
+    return X[:split], y[:split], X[split:], y[split:]
@@ -0,0 +1,65 @@
+'''Runs one model's grid search on the local joblib backend and on a CV cluster and compares them.
+
+Usage: python -m benchmarks.cv_cluster [--model XGBClassifier] [--workers 3] [--rows 20000] [--output cv_cluster.json]
+Local worker processes stand in for nodes (TRAIN_CV_WORKERS points the cluster run at real
+ones instead). The cluster run must reproduce every candidate's CV score exactly; the report
+shows wall times and the bytes sent to the workers against shipping the data with every task.
+Uses the processed train/test split when present, synthetic data otherwise. Exits 1 on a mismatch.
+'''
+import argparse
+import json
+import sys
+import time
+import numpy as np # type: ignore
+from sklearn.model_selection import StratifiedKFold # type: ignore
+from benchmarks.search_modes import load_arrays
+from src.components.model_trainer import ModelTrainer
+from src.utils.cv_cluster import CVCluster, CVClusterConfig
+
+def run(trainer, model_name, X_train, y_train, n_jobs):
+    skf = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
+    model = trainer.get_models(trainer.model_trainer_config.model_threads)[model_name]
+    start = time.perf_counter()
+    gs, report = trainer.run_search(model_name, model, trainer.get_params()[model_name], X_train, y_train, skf, n_jobs)
+    report["wall_seconds"] = round(time.perf_counter() - start, 2)
+    return gs.cv_results_["mean_test_score"], report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="XGBClassifier", choices=["LogisticRegression", "XGBClassifier", "LGBMClassifier"])
+    parser.add_argument("--workers", type=int, default=3, help="Local worker processes (and local joblib jobs)")
+    parser.add_argument("--rows", type=int, default=20000, help="Synthetic rows when no processed data is available.")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    X_train, y_train, _, _ = load_arrays(args.rows)
+    trainer = ModelTrainer()
+    local_scores, local_report = run(trainer, args.model, X_train, y_train, args.workers)
+
+    config = CVClusterConfig()
+    config.local_workers = args.workers
+    start = time.perf_counter()
+    with CVCluster.start(config) as cluster:
+        startup_seconds = round(time.perf_counter() - start, 2)
+        trainer.cv_cluster = cluster
+        cluster_scores, cluster_report = run(trainer, args.model, X_train, y_train, cluster.n_workers)
+        trainer.cv_cluster = None
+        stats = dict(cluster.stats)
+
+    data_bytes = np.asarray(X_train).nbytes + np.asarray(y_train).nbytes
+    result = {
+        "model": args.model,
+        "rows": int(len(X_train)),
+        "fits": local_report["n_fits"],
+        "local": {"jobs": args.workers, "wall_seconds": local_report["wall_seconds"]},
+        "cluster": {"workers": stats["workers"], "startup_seconds": startup_seconds,
+                    "wall_seconds": cluster_report["wall_seconds"], **stats},
+        # What shipping X and y with every task would have sent.
+        "per_task_data_bytes": stats["tasks"] * data_bytes,
+        "max_score_diff": float(np.max(np.abs(np.asarray(cluster_scores) - np.asarray(local_scores)))),
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            json.dump(result, report_file, indent=2)
+    sys.exit(0 if result["max_score_diff"] == 0 else 1)
@@ -0,0 +1,54 @@
+'''Per-row latency of the compiled preprocessor against the fitted sklearn ColumnTransformer.
+
+Usage: python -m benchmarks.fast_preprocessor --rows 2000 [--data artifacts/data/processed/test.parquet]
+'''
+import argparse
+import time
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+from benchmarks.common import synthetic_records
+from src.components.fast_preprocessor import compile_preprocessor, check_parity
+from src.pipeline.predict_pipeline import FEATURE_COLUMNS
+from src.utils.common import load_object, read_frame
+
+def per_row_us(fn, rows):
+    start = time.perf_counter()
+    for row in rows:
+        fn(row)
+    return (time.perf_counter() - start) / len(rows) * 1e6
+
+def run(rows, data_path, preprocessor_path):
+    preprocessor = load_object(preprocessor_path)
+    compiled = compile_preprocessor(preprocessor)
+
+    if data_path:
+        features_df = read_frame(data_path)[FEATURE_COLUMNS].head(rows)
+    else:
+        features_df = pd.DataFrame(synthetic_records(rows), columns=FEATURE_COLUMNS)
+    records = features_df.to_dict('records')
+    max_error = check_parity(compiled, preprocessor, features_df)
+
+    buffer = np.zeros(compiled.n_features, dtype=np.float32)
+    sklearn_us = per_row_us(lambda r: preprocessor.transform(pd.DataFrame([r], columns=FEATURE_COLUMNS)), records)
+    compiled_us = per_row_us(lambda r: compiled.transform_one(r, out=buffer), records)
+
+    start = time.perf_counter()
+    preprocessor.transform(features_df)
+    sklearn_batch = time.perf_counter() - start
+    start = time.perf_counter()
+    compiled.transform(records)
+    compiled_batch = time.perf_counter() - start
+
+    print(f"parity:            max abs error {max_error:.2e} over {len(records)} rows")
+    print(f"sklearn per row:   {sklearn_us:9.1f} us")
+    print(f"compiled per row:  {compiled_us:9.1f} us  ({sklearn_us / compiled_us:.0f}x)")
+    print(f"sklearn batch:     {sklearn_batch * 1e3:9.2f} ms")
+    print(f"compiled batch:    {compiled_batch * 1e3:9.2f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--data", default=None, help="Parquet/CSV with the input columns, e.g. the test split")
+    parser.add_argument("--preprocessor", default="artifacts/models/preprocessor.joblib")
+    args = parser.parse_args()
+    run(args.rows, args.data, args.preprocessor)
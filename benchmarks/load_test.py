@@ -0,0 +1,305 @@
+'''Load test of the serving path: the form endpoint, the batch endpoint and raw PredictPipeline.predict.
+
+Usage:
+  python -m benchmarks.load_test --requests 500 --concurrency 8 --output results.json
+  python -m benchmarks.load_test --target uvicorn --rate 200 --replay recorded.jsonl
+  python -m benchmarks.load_test --baseline before.json --threshold 0.10   # exits 1 on a regression
+  python -m benchmarks.load_test --compare before.json after.json
+
+--target: "inprocess" (ASGI app driven through httpx, no sockets), "uvicorn" (spawns a local
+server) or the URL of a running server. --rate 0 runs closed-loop (each of --concurrency
+clients sends its next request as soon as the previous one returns); --rate N schedules N
+requests/s at fixed intervals, with latency measured from the scheduled send time so a
+stalled server is not hidden. Records come from --replay (JSONL of application dicts or batch
+payloads) or are sampled with a fixed seed from the training split (synthetic if absent).
+The "pipeline" scenario always runs in this process.
+'''
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np # type: ignore
+from benchmarks.common import training_records
+from src.pipeline.predict_pipeline import FEATURE_COLUMNS
+
+SCENARIOS = ("form", "batch", "pipeline")
+# Compared against the baseline: (result key, True when larger is better).
+COMPARED_METRICS = (("throughput_rps", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False))
+
+def load_records(path):
+    '''Reads application dicts from a JSONL file; lines may hold one application or a batch payload.'''
+    records = []
+    with open(path) as replay_file:
+        for line in replay_file:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            for candidate in item.get("records") or [item.get("features") or item.get("record") or item]:
+                if isinstance(candidate, dict) and all(col in candidate for col in FEATURE_COLUMNS):
+                    records.append({col: candidate[col] for col in FEATURE_COLUMNS})
+    if not records:
+        raise SystemExit(f"No application records with all of {FEATURE_COLUMNS} found in {path}")
+    return records
+
+def rss_mb(pid=None):
+    '''(current, peak) resident set size in MB of `pid` (default: this process).'''
+    if pid is None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+        try:
+            with open("/proc/self/statm") as statm:
+                current = int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+        except OSError:
+            current = None
+        return current, peak
+    values = {}
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                key, value = line.split(":")
+                values[key] = int(value.split()[0]) / 1024
+    return values.get("VmRSS"), values.get("VmHWM")
+
+def summarize(latencies, errors, seconds, rows_per_request):
+    latencies_ms = np.asarray(latencies) * 1000
+    count = len(latencies_ms)
+    return {
+        "requests": count,
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "throughput_rps": round(count / seconds, 2) if seconds > 0 else None,
+        "rows_per_second": round(count * rows_per_request / seconds, 1) if seconds > 0 else None,
+        "mean_ms": round(float(latencies_ms.mean()), 3) if count else None,
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3) if count else None,
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3) if count else None,
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3) if count else None,
+        "max_ms": round(float(latencies_ms.max()), 3) if count else None,
+    }
+
+async def drive(send, n_requests, concurrency, rate):
+    '''Calls `await send(i)` n_requests times; returns (latencies, errors, wall seconds).'''
+    latencies, errors = [], 0
+    start = time.perf_counter()
+
+    async def timed(i, scheduled):
+        nonlocal errors
+        try:
+            await send(i)
+            latencies.append(time.perf_counter() - scheduled)
+        except Exception:
+            errors += 1
+
+    if rate > 0:
+        # Open loop: request i is due at start + i / rate; at most `concurrency` in flight.
+        semaphore = asyncio.Semaphore(concurrency)
+        async def scheduled_request(i):
+            due = start + i / rate
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            async with semaphore:
+                await timed(i, due)
+        await asyncio.gather(*(scheduled_request(i) for i in range(n_requests)))
+    else:
+        counter = iter(range(n_requests))
+        async def client():
+            for i in counter:
+                await timed(i, time.perf_counter())
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+def form_sender(client, records):
+    async def send(i):
+        record = records[i % len(records)]
+        response = await client.post("/predict", data={col: str(record[col]) for col in FEATURE_COLUMNS})
+        # On errors the handler re-renders the input form (200) instead of a report page.
+        if response.status_code != 200 or "Credit Analysis Report" not in response.text:
+            raise RuntimeError(f"/predict failed with {response.status_code}")
+    return send
+
+def batch_sender(client, records, batch_size):
+    async def send(i):
+        offset = (i * batch_size) % len(records)
+        batch = (records[offset:] + records[:offset])[:batch_size] if batch_size <= len(records) else \
+            [records[(offset + j) % len(records)] for j in range(batch_size)]
+        response = await client.post("/v1/predict/batch", json={"records": batch})
+        response.raise_for_status()
+    return send
+
+def pipeline_sender(records, executor):
+    from src.pipeline.predict_pipeline import PredictPipeline, CustomData
+    pipeline = PredictPipeline()
+    pipeline.registry.load()
+    loop = asyncio.get_running_loop()
+    def call(i):
+        pipeline.predict(CustomData(**records[i % len(records)]).get_data_as_data_frame())
+    async def send(i):
+        await loop.run_in_executor(executor, call, i)
+    return send
+
+class Target:
+    '''HTTP client for the app: in-process ASGI, a spawned uvicorn, or an existing server URL.'''
+    def __init__(self, target, port):
+        self.target = target
+        self.port = port
+        self.process = None
+        self.client = None
+        self._lifespan = None
+
+    async def __aenter__(self):
+        import httpx # type: ignore
+        if self.target == "inprocess":
+            from app import app
+            self._lifespan = app.router.lifespan_context(app)
+            await self._lifespan.__aenter__()
+            transport = httpx.ASGITransport(app=app)
+            self.client = httpx.AsyncClient(transport=transport, base_url="http://inprocess")
+            return self
+        base_url = self.target
+        if self.target == "uvicorn":
+            self.process = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app:app", "--port", str(self.port), "--log-level", "warning"]
+            )
+            base_url = f"http://127.0.0.1:{self.port}"
+        self.client = httpx.AsyncClient(base_url=base_url, timeout=60)
+        deadline = time.monotonic() + 120
+        while True:
+            try:
+                if (await self.client.get("/health")).status_code == 200:
+                    return self
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline or (self.process is not None and self.process.poll() is not None):
+                raise SystemExit(f"Server at {base_url} did not become healthy")
+            await asyncio.sleep(0.25)
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+        if self._lifespan is not None:
+            await self._lifespan.__aexit__(*exc_info)
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=30)
+
+    def rss(self):
+        '''Server RSS: this process in-process, the child for uvicorn, unknown for a remote URL.'''
+        if self.target == "inprocess":
+            return rss_mb()
+        if self.process is not None:
+            return rss_mb(self.process.pid)
+        return None, None
+
+async def run(args, records):
+    results = {}
+    async with Target(args.target, args.port) as target:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            for scenario in args.scenarios:
+                if scenario == "form":
+                    send, rows = form_sender(target.client, records), 1
+                elif scenario == "batch":
+                    send, rows = batch_sender(target.client, records, args.batch_size), args.batch_size
+                else:
+                    send, rows = pipeline_sender(records, executor), 1
+                await drive(send, args.warmup, args.concurrency, 0)
+                latencies, errors, seconds = await drive(send, args.requests, args.concurrency, args.rate)
+                current, peak = rss_mb() if scenario == "pipeline" else target.rss()
+                results[scenario] = {
+                    **summarize(latencies, errors, seconds, rows),
+                    "rows_per_request": rows,
+                    "rss_mb": round(current, 1) if current is not None else None,
+                    "peak_rss_mb": round(peak, 1) if peak is not None else None,
+                }
+                print(f"{scenario:<9} {results[scenario]}")
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(baseline, current, threshold):
+    '''Prints a per-scenario comparison and returns the metrics that regressed by more than `threshold`.'''
+    regressions = []
+    for key in ("target", "concurrency", "rate", "requests", "batch_size", "source"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(f"warning: {key} differs ({baseline['meta'].get(key)} vs {current['meta'].get(key)}), results may not be comparable")
+    for scenario, result in current["scenarios"].items():
+        before = baseline["scenarios"].get(scenario)
+        if before is None:
+            continue
+        for key, higher_is_better in COMPARED_METRICS:
+            old, new = before.get(key), result.get(key)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regressed = -change > threshold if higher_is_better else change > threshold
+            print(f"{scenario:<9} {key:<15} {old:>12.3f} -> {new:>12.3f} ({change:+.1%}){'  REGRESSION' if regressed else ''}")
+            if regressed:
+                regressions.append(f"{scenario}.{key}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="inprocess", help='"inprocess", "uvicorn" or a server URL')
+    parser.add_argument("--port", type=int, default=8765, help="Port for --target uvicorn")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated subset of {SCENARIOS}")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=0, help="Requests/s (open loop); 0 runs closed loop")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--replay", default=None, help="JSONL file of recorded applications or batch payloads")
+    parser.add_argument("--records", type=int, default=2000, help="Distinct records to sample when not replaying")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Write the results JSON here")
+    parser.add_argument("--baseline", default=None, help="Results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative regression")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="Only compare two results files")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as before, open(args.compare[1]) as after:
+            regressions = compare(json.load(before), json.load(after), args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    args.scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {sorted(unknown)}")
+    records = load_records(args.replay) if args.replay else training_records(args.records, args.seed)
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "target": args.target,
+            "concurrency": args.concurrency,
+            "rate": args.rate,
+            "requests": args.requests,
+            "batch_size": args.batch_size,
+            "source": args.replay or f"sampled:{args.records}:seed={args.seed}",
+        },
+        "scenarios": asyncio.run(run(args, records)),
+    }
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(json.load(baseline_file), results, args.threshold)
+        if regressions:
+            print(f"Regressions beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
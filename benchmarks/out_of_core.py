@@ -0,0 +1,160 @@
+'''Peak memory and quality of the out-of-core (chunked) training mode on large synthetic data.
+
+Usage: python -m benchmarks.out_of_core [--rows 1000000 3000000] [--chunk-rows 20000 100000]
+                                        [--in-memory-rows 1000000] [--output out_of_core.json]
+For every size a synthetic raw CSV (the interim file's columns, labels with real signal
+from grade, loan share of income, default history and home ownership) is written to a
+temporary directory, written itself in chunks. Ingestion, transformation and training then
+each run in a fresh interpreter there with TRAIN_CHUNK_ROWS set, so each stage's peak RSS
+is its own. --in-memory-rows also runs ingestion and transformation without chunks (the
+grid search on that many rows is not run) for comparison. The bundled dataset has ~32k rows.
+'''
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import numpy as np # type: ignore
+from benchmarks.common import CATEGORIES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = ("ingestion", "transformation", "training")
+
+def write_raw_csv(path, n, seed=42, chunk_rows=200_000):
+    '''Writes `n` synthetic applications with a loan_status label to `path`; returns the default rate.'''
+    import pandas as pd # type: ignore
+    rng = np.random.default_rng(seed)
+    positives = 0
+    for start in range(0, n, chunk_rows):
+        m = min(chunk_rows, n - start)
+        age = np.clip(rng.normal(27.8, 6.4, m), 20, 80).astype(int)
+        income = np.clip(rng.lognormal(10.9, 0.55, m), 4000, 2_000_000).round(0)
+        loan_amnt = np.clip(rng.lognormal(9.0, 0.65, m), 500, 35000).round(0)
+        df = pd.DataFrame({
+            "person_age": age,
+            "person_income": income,
+            "person_emp_length": np.where(rng.random(m) < 0.03, np.nan, np.clip(rng.normal(4.8, 4.0, m), 0, 40).round(0)),
+            "loan_amnt": loan_amnt,
+            "loan_int_rate": np.where(rng.random(m) < 0.1, np.nan, np.clip(rng.normal(11.0, 3.1, m), 5.4, 23.2).round(2)),
+            "loan_percent_income": np.clip(loan_amnt / income, 0, 0.83).round(2),
+            "cb_person_cred_hist_length": np.clip(age - 20 + rng.integers(-2, 3, m), 2, 30).astype(float),
+        })
+        for col, (values, weights) in CATEGORIES.items():
+            df[col] = rng.choice(values, size=m, p=np.asarray(weights) / np.sum(weights))
+        grade = df["loan_grade"].map({grade: i for i, grade in enumerate(CATEGORIES["loan_grade"][0])}).to_numpy()
+        logit = (-3.0 + 0.6 * grade + 5.0 * df["loan_percent_income"].to_numpy()
+                 + 0.5 * (df["cb_person_default_on_file"] == "Y").to_numpy()
+                 + 0.6 * (df["person_home_ownership"] == "RENT").to_numpy() + rng.normal(0, 0.5, m))
+        df["loan_status"] = (rng.random(m) < 1 / (1 + np.exp(-logit))).astype(int)
+        positives += int(df["loan_status"].sum())
+        df.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+    return positives / n
+
+def anonymous_rss_mb():
+    '''Resident anonymous memory (Linux), i.e. without the page cache of memory-mapped files.'''
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def child(stage):
+    '''Runs one pipeline stage in this interpreter (cwd = the benchmark directory) and prints its JSON result.
+
+    max_rss_mb includes the mapped pages of the .npy arrays, which the kernel can drop;
+    max_anon_mb (sampled every 10 ms) is the memory the stage itself holds.
+    '''
+    peak_anon = [anonymous_rss_mb()]
+    done = threading.Event()
+    def sample():
+        while not done.wait(0.01):
+            peak_anon[0] = max(peak_anon[0], anonymous_rss_mb())
+    if peak_anon[0] is not None:
+        threading.Thread(target=sample, daemon=True).start()
+    start = time.perf_counter()
+    result = {}
+    if stage == "ingestion":
+        from src.components.data_ingestion import DataIngestion
+        DataIngestion().initiate_data_ingestion()
+    elif stage == "transformation":
+        from src.components.data_ingestion import DataIngestionConfig
+        from src.components.data_transformation import DataTransformation
+        config = DataIngestionConfig()
+        X_train = DataTransformation().initiate_data_transformation(config.train_data_path, config.test_data_path)[0]
+        result["X_train_shape"] = list(X_train.shape)
+    else:
+        from src.components.data_transformation import DataTransformation
+        from src.components.model_trainer import ModelTrainer
+        trainer = ModelTrainer()
+        result["best_f1"] = trainer.initiate_model_trainer(*DataTransformation().load_arrays())
+        result["models"] = {name: {"heldout_f1": round(report["best_score"], 4), "seconds": report["seconds"]}
+                            for name, report in trainer.search_report.items()}
+        result["policy"] = trainer.policy_report
+        result["optimization_status"] = trainer.optimization_report.get("status")
+    result["seconds"] = round(time.perf_counter() - start, 2)
+    done.set()
+    result["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    result["max_anon_mb"] = round(peak_anon[0], 1) if peak_anon[0] is not None else None
+    print(json.dumps(result, default=str))
+
+def run_stage(stage, workdir, chunk_rows):
+    env = dict(os.environ, PYTHONPATH=ROOT, TRAIN_CHUNK_ROWS=str(chunk_rows), TRAIN_TRACKING="off", DATA_FORMAT="parquet")
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.out_of_core", "--child", stage],
+        cwd=workdir, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{stage} failed (TRAIN_CHUNK_ROWS={chunk_rows}):\n{completed.stderr[-3000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def run_size(rows, chunk_sizes, in_memory):
+    with tempfile.TemporaryDirectory(dir=os.getcwd()) as workdir:
+        raw_path = os.path.join(workdir, "artifacts", "data", "interim", "credit_risk_dataset_clean.csv")
+        os.makedirs(os.path.dirname(raw_path))
+        start = time.perf_counter()
+        default_rate = write_raw_csv(raw_path, rows)
+        result = {
+            "rows": rows,
+            "raw_csv_mb": round(os.path.getsize(raw_path) / 2**20, 1),
+            "default_rate": round(default_rate, 4),
+            "generate_seconds": round(time.perf_counter() - start, 2),
+            "runs": {},
+        }
+        for chunk_rows in chunk_sizes:
+            result["runs"][f"chunk_{chunk_rows}"] = {stage: run_stage(stage, workdir, chunk_rows) for stage in STAGES}
+            print(json.dumps({"rows": rows, "chunk_rows": chunk_rows, **result["runs"][f"chunk_{chunk_rows}"]}), flush=True)
+        if in_memory:
+            result["runs"]["in_memory"] = {stage: run_stage(stage, workdir, 0) for stage in STAGES[:2]}
+            print(json.dumps({"rows": rows, "in_memory": result["runs"]["in_memory"]}), flush=True)
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--child", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, nargs="*", default=[1_000_000])
+    parser.add_argument("--chunk-rows", type=int, nargs="*", default=[20_000, 100_000])
+    parser.add_argument("--in-memory-rows", type=int, nargs="*", default=[], help="Sizes also run without chunks (ingestion and transformation).")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child)
+        sys.exit(0)
+
+    results = [run_size(rows, args.chunk_rows, rows in args.in_memory_rows) for rows in args.rows]
+    # Peak RSS / peak anonymous memory per stage.
+    print(f"{'rows':>10}{'run':>14}" + "".join(f"{stage + ' MB':>22}" for stage in STAGES) + f"{'total s':>10}{'best f1':>9}")
+    for result in results:
+        for name, run in result["runs"].items():
+            memory = [f"{run[stage]['max_rss_mb']} / {run[stage]['max_anon_mb']}" if stage in run else "-" for stage in STAGES]
+            print(f"{result['rows']:>10}{name:>14}" + "".join(f"{cell:>22}" for cell in memory)
+                  + f"{sum(stage['seconds'] for stage in run.values()):>10.1f}{run.get('training', {}).get('best_f1', float('nan')):>9.4f}")
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            json.dump(results, report_file, indent=2)
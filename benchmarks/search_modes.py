@@ -0,0 +1,72 @@
+'''Compares wall time and F1 of the grid search against the budgeted successive-halving search.
+
+Usage: python -m benchmarks.search_modes [--rows 20000] [--output search_report.json]
+Uses the processed train/test split when present, synthetic data otherwise.
+Nothing is logged to MLflow and no artifacts are written.
+'''
+import argparse
+import json
+import os
+import time
+from sklearn.metrics import f1_score # type: ignore
+from sklearn.model_selection import StratifiedKFold # type: ignore
+from benchmarks.common import synthetic_training_arrays
+from src.components.model_trainer import ModelTrainer, allocate_cores
+
+def load_arrays(rows):
+    from src.components.data_ingestion import DataIngestionConfig
+    config = DataIngestionConfig()
+    if os.path.exists(config.train_data_path) and os.path.exists(config.test_data_path):
+        from src.components.data_transformation import DataTransformation
+        return DataTransformation().initiate_data_transformation(config.train_data_path, config.test_data_path)[:4]
+    return synthetic_training_arrays(rows)
+
+def run_mode(mode, parallel_models, X_train, y_train, X_test, y_test):
+    trainer = ModelTrainer()
+    trainer.model_trainer_config.search_mode = mode
+    trainer.model_trainer_config.parallel_models = parallel_models
+    config = trainer.model_trainer_config
+    cv_jobs, model_threads = allocate_cores(config.n_cores, 3 if parallel_models else 1, config.model_threads)
+
+    skf = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
+
+    start = time.perf_counter()
+    results = trainer.run_searches(trainer.get_models(model_threads), trainer.get_params(), X_train, y_train, skf, cv_jobs)
+    wall_seconds = time.perf_counter() - start
+
+    models = {}
+    for model_name, (gs, report) in results.items():
+        report["test_f1"] = float(f1_score(y_test, gs.predict(X_test)))
+        models[model_name] = report
+    best = max(models, key=lambda name: models[name]["best_score"])
+    return {
+        "mode": mode,
+        "parallel_models": parallel_models,
+        "wall_seconds": round(wall_seconds, 2),
+        "total_fits": sum(report["n_fits"] for report in models.values()),
+        "best_model": best,
+        "best_cv_f1": models[best]["best_score"],
+        "best_test_f1": models[best]["test_f1"],
+        "models": models,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000, help="Synthetic rows when no processed data is available.")
+    parser.add_argument("--modes", nargs="*", default=["grid", "halving", "halving-parallel"])
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    arrays = load_arrays(args.rows)
+    runs = []
+    for mode in args.modes:
+        runs.append(run_mode(mode.replace("-parallel", ""), mode.endswith("-parallel"), *arrays))
+
+    print(f"{'mode':<18}{'wall s':>9}{'fits':>7}{'best model':>20}{'cv f1':>8}{'test f1':>9}")
+    for run in runs:
+        label = run["mode"] + ("-parallel" if run["parallel_models"] else "")
+        print(f"{label:<18}{run['wall_seconds']:>9}{run['total_fits']:>7}{run['best_model']:>20}"
+              f"{run['best_cv_f1']:>8.4f}{run['best_test_f1']:>9.4f}")
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            json.dump(runs, report_file, indent=2, default=str)
@@ -0,0 +1,70 @@
+'''I/O time and peak memory of the ingestion -> transformation handoff: CSV/float64 vs Parquet/float32.
+
+Usage: python -m benchmarks.stage_io [--rows 300000]
+Both paths start from the same interim CSV and end with (X_train, y_train) ready for ModelTrainer.
+'''
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+from sklearn.model_selection import train_test_split # type: ignore
+from benchmarks.common import synthetic_records
+from src.components.data_ingestion import DataIngestion, DataIngestionConfig, TARGET_COLUMN
+from src.components.data_transformation import DataTransformation
+
+def csv_float64_path(raw_path, work_dir):
+    # The previous behaviour: CSV round trip with inferred dtypes, np.c_ concatenation, then slicing.
+    df = pd.read_csv(raw_path)
+    train_set, test_set = train_test_split(df, test_size=0.2, random_state=42)
+    train_path, test_path = os.path.join(work_dir, "train.csv"), os.path.join(work_dir, "test.csv")
+    train_set.to_csv(train_path, index=False)
+    test_set.to_csv(test_path, index=False)
+    del df, train_set, test_set
+    train_df = pd.read_csv(train_path)
+    preprocessor = DataTransformation().get_transformation_object()
+    X = preprocessor.fit_transform(train_df.drop(columns=[TARGET_COLUMN]))
+    train_arr = np.c_[X, np.array(train_df[TARGET_COLUMN])]
+    return np.ascontiguousarray(train_arr[:, :-1]), train_arr[:, -1]
+
+def parquet_float32_path(raw_path, work_dir):
+    ingestion = DataIngestion()
+    ingestion.ingestion_config = DataIngestionConfig(
+        data_format="parquet",
+        raw_data_path=raw_path,
+        train_data_path=os.path.join(work_dir, "train.parquet"),
+        test_data_path=os.path.join(work_dir, "test.parquet"),
+    )
+    train_path, _ = ingestion.initiate_data_ingestion()
+    train_df = pd.read_parquet(train_path)
+    preprocessor = DataTransformation().get_transformation_object()
+    X = np.asarray(preprocessor.fit_transform(train_df.drop(columns=[TARGET_COLUMN])), dtype=np.float32)
+    return X, train_df[TARGET_COLUMN].to_numpy(dtype=np.int8)
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    X, y = fn(*args)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 1024 ** 2, X.nbytes / 1024 ** 2
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=300000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        raw_path = os.path.join(work_dir, "interim.csv")
+        df = pd.DataFrame(synthetic_records(args.rows))
+        df[TARGET_COLUMN] = (np.random.default_rng(0).random(len(df)) < 0.22).astype(int)
+        df.to_csv(raw_path, index=False)
+        del df
+
+        print(f"{'path':<18}{'seconds':>9}{'peak MB':>10}{'X MB':>8}")
+        for name, fn in (("csv/float64", csv_float64_path), ("parquet/float32", parquet_float32_path)):
+            seconds, peak_mb, x_mb = measure(fn, raw_path, work_dir)
+            print(f"{name:<18}{seconds:>9.2f}{peak_mb:>10.1f}{x_mb:>8.1f}")
@@ -0,0 +1,157 @@
+'''Import-time and startup-time benchmark of the serving app.
+
+Usage:
+  python -m benchmarks.startup --trials 5 --output startup.json
+  python -m benchmarks.startup --baseline before.json --threshold 0.20   # exits 1 on a regression
+  python -m benchmarks.startup --compare before.json after.json
+
+Each trial is a fresh interpreter (run from the directory holding artifacts/ and templates/)
+that times `import app`, loading and warming up the artifacts, and the first two scored
+applications, and records which heavy libraries are imported after each step. One extra
+`python -X importtime -c "import app"` run lists the slowest modules on the import path.
+Medians over the trials are reported; MODEL_WARMUP=0 shows the cold first request.
+'''
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ("pandas", "scipy", "sklearn", "imblearn", "xgboost", "lightgbm", "mlflow", "yaml", "box", "ensure")
+TIMED_METRICS = ("import_seconds", "load_seconds", "warmup_seconds", "first_request_ms", "second_request_ms", "startup_seconds")
+
+def child():
+    '''Runs one trial in this (fresh) interpreter and prints its JSON result.'''
+    start = time.perf_counter()
+    import app
+    imported = time.perf_counter()
+    after_import = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    from src.pipeline.model_registry import model_registry
+    artifacts = model_registry.load()
+    loaded = time.perf_counter()
+    after_load = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    from src.pipeline.predict_pipeline import WARMUP_RECORD
+    request_ms = []
+    for i in range(2):
+        record = dict(WARMUP_RECORD, loan_amnt=WARMUP_RECORD["loan_amnt"] + 100 * (i + 1))
+        request_start = time.perf_counter()
+        app.predict_pipeline.predict_records([record])
+        request_ms.append((time.perf_counter() - request_start) * 1000)
+
+    import resource
+    print(json.dumps({
+        "import_seconds": imported - start,
+        "load_seconds": loaded - imported - artifacts.warmup_seconds,
+        "warmup_seconds": artifacts.warmup_seconds,
+        "startup_seconds": loaded - start,
+        "first_request_ms": request_ms[0],
+        "second_request_ms": request_ms[1],
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "modules_after_import": after_import,
+        "modules_after_load": after_load,
+        "model": artifacts.model_name,
+    }))
+
+def run_trial():
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child"], capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def slowest_imports(top):
+    '''(cumulative seconds, module) of the `top` slowest imports under `import app`, from -X importtime.'''
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"], capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative) / 1e6, name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(baseline, current, threshold):
+    '''Prints the median of each timing before and after, returning those slower by more than `threshold`.'''
+    regressions = []
+    for key in TIMED_METRICS:
+        old, new = baseline["median"].get(key), current["median"].get(key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        regressed = change > threshold
+        print(f"{key:<18} {old:>10.4f} -> {new:>10.4f} ({change:+.1%}){'  REGRESSION' if regressed else ''}")
+        if regressed:
+            regressions.append(key)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    parser.add_argument("--output", default=None, help="Write the results JSON here")
+    parser.add_argument("--baseline", default=None, help="Results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.20, help="Allowed relative regression")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="Only compare two results files")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+    if args.compare:
+        with open(args.compare[0]) as before, open(args.compare[1]) as after:
+            regressions = compare(json.load(before), json.load(after), args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    trials = [run_trial() for _ in range(args.trials)]
+    median = {key: statistics.median(trial[key] for trial in trials) for key in TIMED_METRICS + ("max_rss_mb",)}
+    for key, value in median.items():
+        print(f"{key:<18} {value:>10.4f}")
+    print(f"after import: {trials[-1]['modules_after_import']}")
+    print(f"after load:   {trials[-1]['modules_after_load']}")
+    imports = slowest_imports(args.top)
+    print("slowest imports under `import app` (cumulative s):")
+    for seconds, name in imports:
+        print(f"  {seconds:8.3f} {name}")
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "trials": args.trials,
+            "model": trials[-1]["model"],
+            "env": {key: os.environ[key] for key in ("MODEL_SERVING_MODE", "MODEL_WARMUP", "LAZY_PREPROCESSOR") if key in os.environ},
+        },
+        "median": median,
+        "trials": trials,
+        "slowest_imports": imports,
+    }
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(json.load(baseline_file), results, args.threshold)
+        if regressions:
+            print(f"Regressions beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
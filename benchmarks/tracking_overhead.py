@@ -0,0 +1,82 @@
+'''Measures the wall-clock cost of MLflow tracking on a grid search, per tracking mode.
+
+Usage: python -m benchmarks.tracking_overhead [--model LogisticRegression] [--repeats 3] [--output tracking.json]
+Each mode runs the trainer's search for one model inside a parent run, against a fresh SQLite
+tracking store (as in the Dockerfile) in a temporary directory; the time includes flushing the
+pending writes. Overhead is the median wall time minus that of TRAIN_TRACKING=off.
+Uses the processed train/test split when present, synthetic data otherwise.
+'''
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from contextlib import nullcontext
+import mlflow # type: ignore
+import mlflow.sklearn # type: ignore
+from sklearn.model_selection import StratifiedKFold # type: ignore
+from benchmarks.search_modes import load_arrays
+from src.components.model_trainer import ModelTrainer
+from src.utils.tracking import SweepTracker, TrackingConfig
+
+MODES = {
+    "off": TrackingConfig(mode="off"),
+    "autolog": TrackingConfig(mode="autolog"),
+    "batched-summary": TrackingConfig(mode="batched", detail="summary", background=True),
+    "batched-candidates": TrackingConfig(mode="batched", detail="candidates", background=True),
+    "batched-candidates-sync": TrackingConfig(mode="batched", detail="candidates", background=False),
+    "batched-runs": TrackingConfig(mode="batched", detail="runs", background=True),
+}
+
+def run_mode(tracking, model_name, X_train, y_train, tracking_dir):
+    mlflow.set_tracking_uri(f"sqlite:///{os.path.join(tracking_dir, 'mlflow.db')}")
+    trainer = ModelTrainer()
+    trainer.tracking_config = tracking
+    config = trainer.model_trainer_config
+    model = trainer.get_models(config.model_threads)[model_name]
+    skf = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
+    # Store setup (schema migration of the new SQLite file) is not part of the per-run cost.
+    if tracking.mode != "off":
+        mlflow.set_experiment("Tracking_Overhead")
+
+    start = time.perf_counter()
+    stats = {}
+    if tracking.mode != "off":
+        mlflow.sklearn.autolog(log_models=False, disable=tracking.mode != "autolog")
+    with (mlflow.start_run(run_name="Parent_Training_Run") if tracking.mode != "off" else nullcontext()) as run:
+        if tracking.mode == "batched":
+            trainer.sweep_tracker = SweepTracker(run.info.run_id, tracking)
+        _, report = trainer.run_search(model_name, model, trainer.get_params()[model_name], X_train, y_train, skf, config.n_cores)
+        if trainer.sweep_tracker is not None:
+            stats = trainer.sweep_tracker.close()
+    mlflow.sklearn.autolog(disable=True)
+    return {"wall_seconds": time.perf_counter() - start, "search_seconds": report["seconds"], "n_fits": report["n_fits"], **stats}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="LogisticRegression", choices=["LogisticRegression", "XGBClassifier", "LGBMClassifier"])
+    parser.add_argument("--modes", nargs="*", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=20000, help="Synthetic rows when no processed data is available.")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    X_train, y_train, _, _ = load_arrays(args.rows)
+    with tempfile.TemporaryDirectory() as tracking_dir:
+        # Untimed warm-up run, so SMOTE output is already in the array cache for every mode.
+        run_mode(MODES["off"], args.model, X_train, y_train, tracking_dir)
+        results = {}
+        for name in args.modes:
+            trials = [run_mode(MODES[name], args.model, X_train, y_train, tracking_dir) for _ in range(args.repeats)]
+            results[name] = dict(trials[-1], wall_seconds=round(statistics.median(trial["wall_seconds"] for trial in trials), 3))
+
+    baseline = results.get("off", {}).get("wall_seconds")
+    print(f"{'mode':<26}{'wall s':>9}{'overhead s':>12}{'calls':>7}{'metrics':>9}{'params':>8}")
+    for name, result in results.items():
+        overhead = f"{result['wall_seconds'] - baseline:+.3f}" if baseline is not None else "-"
+        print(f"{name:<26}{result['wall_seconds']:>9.3f}{overhead:>12}{result.get('calls', '-'):>7}"
+              f"{result.get('metrics', '-'):>9}{result.get('params', '-'):>8}")
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            json.dump({"model": args.model, "rows": int(len(X_train)), "repeats": args.repeats, "modes": results}, report_file, indent=2)
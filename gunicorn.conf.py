@@ -0,0 +1,56 @@
+'''Production serving: `gunicorn -c gunicorn.conf.py app:app`.
+
+The master process imports the app and loads the model artifacts once, then forks
+the workers, so the model, preprocessor and libraries are shared copy-on-write
+instead of loaded once per worker. NumPy arrays inside the joblib artifacts are
+additionally memory-mapped (MODEL_MMAP=1), so they stay shared after hot reloads.
+'''
+import gc
+import os
+import shutil
+
+cpu_count = os.cpu_count() or 1
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = os.getenv("BIND", "0.0.0.0:8000")
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+
+# Divide the cores between workers so booster threads do not oversubscribe them.
+os.environ.setdefault("MODEL_THREADS", str(max(1, cpu_count // workers)))
+# Keep OpenMP from starting a thread pool in the master: the workers could not use it after fork.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+# Per-worker metric files, aggregated on /metrics. Must be set before prometheus_client is imported.
+multiproc_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus-multiproc")
+shutil.rmtree(multiproc_dir, ignore_errors=True)
+os.makedirs(multiproc_dir, exist_ok=True)
+
+# Objects allocated in the master are frozen before forking, so the workers' garbage
+# collector does not write to (and thereby copy) the pages holding them.
+gc.disable()
+
+def when_ready(server):
+    from src.pipeline.model_registry import model_registry
+    # Load and warm up single-threaded: a booster predicting with more threads would start the
+    # OpenMP pool here, and forking a process whose OpenMP pool is running can hang the children.
+    model_registry.set_threads(1)
+    artifacts = model_registry.load()
+    # app.py registered the warmup, so the first requests of every worker are already fast.
+    server.log.info(
+        f"Preloaded artifacts version {artifacts.version} in the master process "
+        f"(load {artifacts.load_time_seconds:.2f}s, warmup {artifacts.warmup_seconds:.2f}s)."
+    )
+    gc.collect()
+    gc.freeze()
+    gc.enable()
+
+def post_fork(server, worker):
+    gc.enable()
+    # Each worker starts its own booster threads, on first use.
+    from src.pipeline.model_registry import model_registry
+    model_registry.set_threads(int(os.environ["MODEL_THREADS"]))
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess # type: ignore
+    multiprocess.mark_process_dead(worker.pid)
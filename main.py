@@ -1,22 +1,18 @@
-from src.components.data_ingestion import DataIngestion
-from src.components.data_transformation import DataTransformation
-from src.components.model_trainer import ModelTrainer
+from src.pipeline.train_pipeline import TrainPipeline, STAGES
 from src.logger import logging
-import sys
+import argparse
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the training pipeline, skipping stages that are up to date.")
+    parser.add_argument("--force", nargs='*', choices=STAGES, default=None,
+                        help="Rerun stages even if up to date: all of them, or only the listed ones.")
+    args = parser.parse_args()
     try:
-        ingestion = DataIngestion()
-        train_data_path, test_data_path = ingestion.initiate_data_ingestion()
-        
-        data_transformation = DataTransformation()
-        train_arr, test_arr, _ = data_transformation.initiate_data_transformation(train_data_path, test_data_path)
-        
-        model_trainer = ModelTrainer()
-        f1_score = model_trainer.initiate_model_trainer(train_arr, test_arr)
-        
-        print(f"Model training completed with F1 Score: {f1_score}")
+        pipeline = TrainPipeline(force=True if args.force == [] else args.force)
+        f1_score = pipeline.run_pipeline()
+
+        print(f"Model training completed with F1 Score: {f1_score} (stages: {pipeline.stage_report})")
         logging.info(f"Model training completed with F1 Score: {f1_score}")
     except Exception as e:
         logging.error(f"An error occurred in the main pipeline: {str(e)}.")
-        raise e
\ No newline at end of file
+        raise e
@@ -0,0 +1,27 @@
+import argparse
+from src.pipeline.batch_score_pipeline import BatchScorePipeline, BatchScoreConfig
+from src.logger import logging
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a CSV, JSONL or Parquet file of loan applications in chunks.")
+    parser.add_argument("input_path")
+    parser.add_argument("output_path", help="Output file; the format follows the extension (.csv, .jsonl, .parquet).")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=1, help="Score chunks in a pool of this many processes.")
+    parser.add_argument("--keep-columns", nargs="*", default=[], help="Input columns copied to the output, e.g. an id.")
+    args = parser.parse_args()
+
+    try:
+        pipeline = BatchScorePipeline(BatchScoreConfig(
+            input_path=args.input_path,
+            output_path=args.output_path,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            keep_columns=args.keep_columns,
+        ))
+        report = pipeline.run_pipeline()
+        print(f"Scored {report['rows']} rows in {report['seconds']}s ({report['rows_per_second']} rows/s), "
+              f"peak RSS {report['peak_rss_mb']} MB (workers {report['peak_worker_rss_mb']} MB).")
+    except Exception as e:
+        logging.error(f"An error occurred in batch scoring: {str(e)}.")
+        raise e
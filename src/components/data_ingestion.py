@@ -2,35 +2,100 @@ import sys
 import os
 from src.logger import logging
 from src.exception import CustomException
+import numpy as np # type: ignore
 import pandas as pd # type: ignore
+import sklearn # type: ignore
 from sklearn.model_selection import train_test_split # type: ignore
 from dataclasses import dataclass
 from pathlib import Path
+from src.utils.common import write_frame, file_digest, iter_frames, FrameWriter
+from src.utils.stage_state import code_digest, config_fingerprint, fingerprint
+
+CATEGORICAL_COLUMNS = ['person_home_ownership', 'loan_intent', 'loan_grade', 'cb_person_default_on_file']
+NUMERIC_COLUMNS = ['person_age', 'person_income', 'person_emp_length', 'loan_amnt', 'loan_int_rate',
+                   'loan_percent_income', 'cb_person_cred_hist_length']
+TARGET_COLUMN = 'loan_status'
+
+# Explicit dtypes: categories instead of object strings, float32 instead of float64.
+DATA_DTYPES = {
+    **{col: 'category' for col in CATEGORICAL_COLUMNS},
+    **{col: 'float32' for col in NUMERIC_COLUMNS},
+    TARGET_COLUMN: 'int8',
+}
 
 @dataclass
 class DataIngestionConfig:
     '''Configuration for data ingestion paths.'''
+    # "parquet" keeps the dtypes between stages; "csv" writes the previous train.csv/test.csv.
+    data_format: str = os.getenv("DATA_FORMAT", "parquet")
     raw_data_path: str = os.path.join("artifacts", "data", "interim", "credit_risk_dataset_clean.csv")
-    train_data_path: str = os.path.join("artifacts", "data", "processed", "train.csv")
-    test_data_path: str = os.path.join("artifacts", "data", "processed", "test.csv")
-    
+    train_data_path: str = os.path.join("artifacts", "data", "processed", f"train.{data_format}")
+    test_data_path: str = os.path.join("artifacts", "data", "processed", f"test.{data_format}")
+    # Rows per chunk for out-of-core training (read, split, transformed and trained on in chunks);
+    # 0 loads each stage's data into memory at once.
+    chunk_rows: int = int(os.getenv("TRAIN_CHUNK_ROWS", "0"))
+    test_size: float = 0.2
+    random_state: int = 42
+
 class DataIngestion:
     def __init__(self):
         self.ingestion_config = DataIngestionConfig()
+    
+    def stage_fingerprint(self):
+        '''Fingerprint of this stage: raw data content, paths/format and the code that splits it.'''
+        return fingerprint(
+            inputs=file_digest(self.ingestion_config.raw_data_path),
+            config=config_fingerprint(self.ingestion_config),
+            code=code_digest(DataIngestion, write_frame, iter_frames, FrameWriter),
+            libraries=[pd.__version__, sklearn.__version__],
+        )
         
+    def split_in_chunks(self):
+        '''Streaming stratified train/test split of the raw CSV, one chunk in memory at a time.
+
+        Rows are shuffled within each chunk; the i-th row of a class goes to the test set
+        whenever floor((i + 1) * test_size) moves past floor(i * test_size), so every
+        class keeps its share in both sets whatever the chunk size.
+        '''
+        config = self.ingestion_config
+        rng = np.random.default_rng(config.random_state)
+        seen = {}
+        with FrameWriter(config.train_data_path) as train_writer, FrameWriter(config.test_data_path) as test_writer:
+            for chunk in iter_frames(config.raw_data_path, config.chunk_rows, dtype=DATA_DTYPES):
+                chunk = chunk.iloc[rng.permutation(len(chunk))].reset_index(drop=True)
+                labels = chunk[TARGET_COLUMN].to_numpy()
+                is_test = np.zeros(len(chunk), dtype=bool)
+                for label in np.unique(labels):
+                    rows = np.flatnonzero(labels == label)
+                    index = seen.get(label, 0) + np.arange(len(rows))
+                    is_test[rows] = np.floor((index + 1) * config.test_size) > np.floor(index * config.test_size)
+                    seen[label] = seen.get(label, 0) + len(rows)
+                train_writer.write(chunk[~is_test])
+                test_writer.write(chunk[is_test])
+        logging.info(f"Streaming split: {train_writer.rows} train rows, {test_writer.rows} test rows.")
+    
     def initiate_data_ingestion(self):
         logging.info("Starting data ingestion process.")
         try:
-            df = pd.read_csv(self.ingestion_config.raw_data_path)
+            if self.ingestion_config.chunk_rows > 0:
+                logging.info(f"Splitting {self.ingestion_config.raw_data_path} in chunks of {self.ingestion_config.chunk_rows} rows.")
+                self.split_in_chunks()
+                logging.info("Data ingestion completed successfully.")
+                return (
+                    self.ingestion_config.train_data_path,
+                    self.ingestion_config.test_data_path
+                )
+            
+            df = pd.read_csv(self.ingestion_config.raw_data_path, dtype=DATA_DTYPES)
             logging.info(f"Dataset read successfully: {self.ingestion_config.raw_data_path}.")
             
             os.makedirs(os.path.dirname(self.ingestion_config.train_data_path), exist_ok=True)
             
             logging.info("Splitting dataset into train and test sets.")
-            train_set, test_set = train_test_split(df, test_size=0.2, random_state=42)
+            train_set, test_set = train_test_split(df, test_size=self.ingestion_config.test_size, random_state=self.ingestion_config.random_state)
             
-            train_set.to_csv(self.ingestion_config.train_data_path, index=False)
-            test_set.to_csv(self.ingestion_config.test_data_path, index=False)
+            write_frame(train_set, self.ingestion_config.train_data_path)
+            write_frame(test_set, self.ingestion_config.test_data_path)
             
             logging.info("Data ingestion completed successfully.")
             
@@ -39,4 +104,4 @@ class DataIngestion:
                 self.ingestion_config.test_data_path
             )
         except Exception as e:
-            raise CustomException(e, sys)
\ No newline at end of file
+            raise CustomException(e, sys)
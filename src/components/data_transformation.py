@@ -1,5 +1,7 @@
 import sys
 import os
+import shutil
+import sklearn # type: ignore
 import pandas as pd # type: ignore
 import numpy as np # type: ignore
 from dataclasses import dataclass
@@ -9,13 +11,36 @@ from src.exception import CustomException
 from sklearn.compose import ColumnTransformer # type: ignore
 from sklearn.preprocessing import StandardScaler, OneHotEncoder # type: ignore
 from sklearn.pipeline import Pipeline # type: ignore
-from src.utils.common import save_object # type: ignore
+from src.utils.common import save_object, file_digest, read_frame, iter_frames, count_rows # type: ignore
+from src.components.fast_preprocessor import compile_preprocessor, check_parity
+from src.components.drift_monitor import build_feature_reference, save_reference, DriftMonitorConfig, DRIFT_REFERENCE_FIELDS
+from src.components.streaming_stats import StreamingPreprocessorStats
+from src.utils.array_cache import ArrayCache, estimator_fingerprint
+from src.utils.stage_state import code_digest, config_fingerprint, fingerprint
 from sklearn.impute import SimpleImputer # type: ignore
 
+def as_feature_array(arr):
+    '''Returns transformed features as a dense float32 array (the dtype the models are served with).'''
+    if hasattr(arr, 'toarray'):
+        arr = arr.toarray()
+    return np.asarray(arr, dtype=np.float32)
+
 @dataclass
 class DataTransformationConfig:
     '''Configuration for data transformation paths.'''
     preprocessor_obj_file_path: str = os.path.join("artifacts", "models", "preprocessor.joblib")
+    fast_preprocessor_obj_file_path: str = os.path.join("artifacts", "models", "fast_preprocessor.joblib")
+    # Training-time histograms/frequencies of the input columns, read by the serving drift monitor.
+    drift_reference_file_path: str = DriftMonitorConfig.reference_path
+    # X_train/y_train/X_test/y_test as .npy, so a later pipeline run can skip this stage.
+    transformed_data_dir: str = os.path.join("artifacts", "data", "transformed")
+    # Out-of-core mode (see DataIngestionConfig): preprocessor statistics are accumulated over
+    # chunks of this many rows and the arrays are written to the .npy files chunk by chunk.
+    chunk_rows: int = int(os.getenv("TRAIN_CHUNK_ROWS", "0"))
+    # Distinct values per numeric column kept by the median/quantile sketches (exact below this).
+    sketch_capacity: int = int(os.getenv("TRAIN_SKETCH_CAPACITY", "100000"))
+
+ARRAY_NAMES = ("X_train", "y_train", "X_test", "y_test")
 
 class DataTransformation:
     def __init__(self):
@@ -57,30 +82,142 @@ class DataTransformation:
         except Exception as e:
             raise CustomException(e, sys)
     
+    def stage_fingerprint(self, input_digests):
+        '''Fingerprint of this stage for the given train/test file digests.'''
+        return fingerprint(
+            inputs=input_digests,
+            config=config_fingerprint(self.data_transformation_config),
+            drift=config_fingerprint(DriftMonitorConfig(), DRIFT_REFERENCE_FIELDS),
+            preprocessor=estimator_fingerprint(self.get_transformation_object()),
+            code=code_digest(DataTransformation, compile_preprocessor, ArrayCache, save_object, build_feature_reference,
+                             StreamingPreprocessorStats),
+            libraries=[sklearn.__version__, np.__version__, pd.__version__],
+        )
+    
+    def array_paths(self):
+        return {name: os.path.join(self.data_transformation_config.transformed_data_dir, f"{name}.npy") for name in ARRAY_NAMES}
+    
+    def save_arrays(self, arrays):
+        '''Writes the transformed arrays to `transformed_data_dir`.'''
+        os.makedirs(self.data_transformation_config.transformed_data_dir, exist_ok=True)
+        for name, path in self.array_paths().items():
+            # Replace rather than overwrite: earlier memory maps of the file stay valid.
+            np.save(path + ".tmp.npy", np.asarray(arrays[name]))
+            os.replace(path + ".tmp.npy", path)
+    
+    def load_arrays(self):
+        '''Memory-maps the arrays written by the last completed run as (X_train, y_train, X_test, y_test).'''
+        paths = self.array_paths()
+        return tuple(np.load(paths[name], mmap_mode='r') for name in ARRAY_NAMES)
+    
+    def _restore_cached_artifacts(self, cache, key):
+        '''Puts the preprocessor files stored with a cache entry back into artifacts/models.'''
+        config = self.data_transformation_config
+        for name, target in (("preprocessor.joblib", config.preprocessor_obj_file_path),
+                             ("fast_preprocessor.joblib", config.fast_preprocessor_obj_file_path),
+                             ("drift_reference.json", config.drift_reference_file_path)):
+            source = cache.get_file(key, name)
+            if source is None:
+                return False
+            if not os.path.exists(target) or file_digest(target) != file_digest(source):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copyfile(source, target)
+        return True
+    
+    def transform_in_chunks(self, train_path: str, test_path: str, target_column_name: str):
+        '''Out-of-core transformation: two passes over chunks of `chunk_rows` rows, nothing held in full.
+
+        Pass one accumulates the preprocessor statistics (running moments, median sketches,
+        category counts); pass two transforms each chunk with the fitted preprocessor into
+        float32 .npy files preallocated at their final size, and counts the drift reference
+        histograms. The arrays are returned memory-mapped.
+        '''
+        config = self.data_transformation_config
+        stats = StreamingPreprocessorStats(self.get_transformation_object(), config.sketch_capacity, DriftMonitorConfig.n_bins)
+        for chunk in iter_frames(train_path, config.chunk_rows):
+            stats.update(chunk.drop(columns=[target_column_name]))
+        preprocessing_obj = stats.fitted_preprocessor()
+        
+        os.makedirs(config.transformed_data_dir, exist_ok=True)
+        paths = self.array_paths()
+        n_features = None
+        for split, source in (("train", train_path), ("test", test_path)):
+            n_rows = count_rows(source)
+            X = y = None
+            start = 0
+            for chunk in iter_frames(source, config.chunk_rows):
+                features = chunk.drop(columns=[target_column_name])
+                if split == "train":
+                    stats.count_reference(features)
+                X_chunk = as_feature_array(preprocessing_obj.transform(features))
+                if X is None:
+                    n_features = X_chunk.shape[1]
+                    X = np.lib.format.open_memmap(paths[f"X_{split}"] + ".tmp.npy", mode='w+', dtype=np.float32, shape=(n_rows, n_features))
+                    y = np.lib.format.open_memmap(paths[f"y_{split}"] + ".tmp.npy", mode='w+', dtype=np.int8, shape=(n_rows,))
+                X[start:start + len(chunk)] = X_chunk
+                y[start:start + len(chunk)] = chunk[target_column_name].to_numpy(dtype=np.int8)
+                start += len(chunk)
+            X.flush()
+            y.flush()
+            del X, y
+            for name in (f"X_{split}", f"y_{split}"):
+                os.replace(paths[name] + ".tmp.npy", paths[name])
+        
+        save_object(file_path=config.preprocessor_obj_file_path, obj=preprocessing_obj)
+        fast_preprocessor = compile_preprocessor(preprocessing_obj, source_digest=file_digest(config.preprocessor_obj_file_path))
+        check_parity(fast_preprocessor, preprocessing_obj, next(iter_frames(test_path, min(config.chunk_rows, 10_000))).drop(columns=[target_column_name]))
+        save_object(file_path=config.fast_preprocessor_obj_file_path, obj=fast_preprocessor)
+        save_reference(stats.feature_reference(), config.drift_reference_file_path)
+        logging.info(f"Transformed {stats.rows} training rows in chunks of {config.chunk_rows} ({n_features} features).")
+        X_train, y_train, X_test, y_test = self.load_arrays()
+        return X_train, y_train, X_test, y_test, config.preprocessor_obj_file_path
+    
     def initiate_data_transformation(self, train_path: str, test_path: str):
         try:
-            train_df = pd.read_csv(train_path)
-            test_df = pd.read_csv(test_path)
+            target_column_name = 'loan_status'
+            if self.data_transformation_config.chunk_rows > 0:
+                return self.transform_in_chunks(train_path, test_path, target_column_name)
             
-            logging.info("Read train and test data completed.")
             logging.info("Obtaining preprocessing object.")
             preprocessing_obj = self.get_transformation_object()
             
-            target_column_name = 'loan_status'
+            # Same input files + same preprocessor definition -> same arrays; reuse them memory-mapped.
+            cache = ArrayCache()
+            cache_key = ArrayCache.key(
+                "transformation-v3", file_digest(train_path), file_digest(test_path),
+                estimator_fingerprint(preprocessing_obj), target_column_name, sklearn.__version__,
+                # The cached drift reference is binned with this many bins.
+                DriftMonitorConfig.n_bins
+            )
+            cached = cache.get(cache_key)
+            if cached is not None and self._restore_cached_artifacts(cache, cache_key):
+                logging.info(f"Reusing cached transformed arrays ({cache_key[:12]}).")
+                self.save_arrays(cached)
+                return (
+                    cached["X_train"],
+                    cached["y_train"],
+                    cached["X_test"],
+                    cached["y_test"],
+                    self.data_transformation_config.preprocessor_obj_file_path
+                )
+            
+            train_df = read_frame(train_path)
+            test_df = read_frame(test_path)
+            
+            logging.info("Read train and test data completed.")
             
             # Splitting input and target feature from training and testing dataframe
-            input_feature_train_df = train_df.drop(columns=[target_column_name], axis=1)
+            input_feature_train_df = train_df.drop(columns=[target_column_name])
             target_feature_train_df = train_df[target_column_name]
-            input_feature_test_df = test_df.drop(columns=[target_column_name], axis=1)
+            input_feature_test_df = test_df.drop(columns=[target_column_name])
             target_feature_test_df = test_df[target_column_name]
             
             logging.info("Applying preprocessing object on training and testing data.")
-            input_feature_train_arr = preprocessing_obj.fit_transform(input_feature_train_df)
-            input_feature_test_arr = preprocessing_obj.transform(input_feature_test_df)
-            
-            logging.info("Concatenating processed input features and target feature.")
-            train_arr = np.c_[input_feature_train_arr, np.array(target_feature_train_df)]
-            test_arr = np.c_[input_feature_test_arr, np.array(target_feature_test_df)]
+            # Features and target stay separate arrays, so ModelTrainer does not have to slice them apart.
+            X_train = as_feature_array(preprocessing_obj.fit_transform(input_feature_train_df))
+            X_test = as_feature_array(preprocessing_obj.transform(input_feature_test_df))
+            y_train = target_feature_train_df.to_numpy(dtype=np.int8)
+            y_test = target_feature_test_df.to_numpy(dtype=np.int8)
             
             logging.info("Saving preprocessing object.")
             save_object(
@@ -88,9 +225,37 @@ class DataTransformation:
                 obj=preprocessing_obj
             )
             
+            logging.info("Compiling preprocessing object into the fast inference plan.")
+            fast_preprocessor = compile_preprocessor(
+                preprocessing_obj,
+                source_digest=file_digest(self.data_transformation_config.preprocessor_obj_file_path)
+            )
+            check_parity(fast_preprocessor, preprocessing_obj, input_feature_test_df)
+            save_object(
+                file_path=self.data_transformation_config.fast_preprocessor_obj_file_path,
+                obj=fast_preprocessor
+            )
+            logging.info("Capturing drift reference distributions of the training inputs.")
+            save_reference(
+                build_feature_reference(input_feature_train_df, n_bins=DriftMonitorConfig.n_bins),
+                self.data_transformation_config.drift_reference_file_path
+            )
+            cache.put(
+                cache_key,
+                {"X_train": X_train, "y_train": y_train, "X_test": X_test, "y_test": y_test},
+                files={
+                    "preprocessor.joblib": self.data_transformation_config.preprocessor_obj_file_path,
+                    "fast_preprocessor.joblib": self.data_transformation_config.fast_preprocessor_obj_file_path,
+                    "drift_reference.json": self.data_transformation_config.drift_reference_file_path,
+                }
+            )
+            self.save_arrays({"X_train": X_train, "y_train": y_train, "X_test": X_test, "y_test": y_test})
+            
             return (
-                train_arr,
-                test_arr,
+                X_train,
+                y_train,
+                X_test,
+                y_test,
                 self.data_transformation_config.preprocessor_obj_file_path
             )
         except Exception as e:
@@ -0,0 +1,163 @@
+import sys
+import os
+import json
+import numpy as np # type: ignore
+from dataclasses import dataclass
+from src.exception import CustomException
+from src.logger import logging
+
+@dataclass
+class DecisionPolicyConfig:
+    '''Learned calibration/threshold (written by training) and the business rules applied on top at serving time.'''
+    policy_path: str = os.path.join("artifacts", "models", "decision_policy.json")
+    # "f1" maximizes out-of-fold F1; "cost" minimizes cost_fn * FN + cost_fp * FP.
+    objective: str = os.getenv("DECISION_OBJECTIVE", "f1")
+    cost_false_negative: float = float(os.getenv("DECISION_COST_FN", "5"))
+    cost_false_positive: float = float(os.getenv("DECISION_COST_FP", "1"))
+    # Per-grade overrides of the learned threshold, e.g. "F:0.35,G:0.3".
+    grade_cutoffs: str = os.getenv("DECISION_GRADE_CUTOFFS", "")
+    # Decision bands as "name:upper_bound,...,name" on the calibrated probability, e.g.
+    # "approve:0.15,review:0.4,decline". Unset: approve / review / decline split at half the threshold and the threshold.
+    bands: str = os.getenv("DECISION_BANDS", "")
+
+# The fields training fits the policy with; grade cutoffs and bands are applied when serving loads it.
+POLICY_TRAINING_FIELDS = ("objective", "cost_false_negative", "cost_false_positive")
+
+def parse_grade_cutoffs(spec):
+    cutoffs = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        grade, cutoff = item.split(":")
+        cutoffs[grade.strip()] = float(cutoff)
+    return cutoffs
+
+def parse_bands(spec):
+    '''"a:0.2,b:0.5,c" -> (["a", "b", "c"], [0.2, 0.5]).'''
+    names, edges = [], []
+    items = [part.strip() for part in spec.split(",") if part.strip()]
+    for item in items[:-1]:
+        name, edge = item.split(":")
+        names.append(name.strip())
+        edges.append(float(edge))
+    names.append(items[-1])
+    if edges != sorted(edges):
+        raise ValueError(f"Decision band bounds must increase: {spec}")
+    return names, edges
+
+def select_threshold(probabilities, y_true, objective="f1", cost_fn=5.0, cost_fp=1.0):
+    '''Best cutoff (predict 1 when probability >= cutoff) and its objective value, in one sorted pass.'''
+    try:
+        order = np.argsort(-probabilities, kind="stable")
+        sorted_p, sorted_y = probabilities[order], np.asarray(y_true)[order]
+        # Only cut between distinct probabilities: the last index of each run of equal values.
+        cut = np.flatnonzero(np.append(np.diff(sorted_p) != 0, True))
+        true_positives = np.cumsum(sorted_y)[cut]
+        false_positives = (cut + 1) - true_positives
+        positives = sorted_y.sum()
+        if objective == "f1":
+            scores = 2 * true_positives / np.maximum(cut + 1 + positives, 1)
+            best = int(np.argmax(scores))
+        elif objective == "cost":
+            scores = cost_fn * (positives - true_positives) + cost_fp * false_positives
+            best = int(np.argmin(scores))
+        else:
+            raise ValueError(f"Unknown decision objective: {objective}")
+        return float(sorted_p[cut[best]]), float(scores[best])
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def fit_policy(oof_probabilities, y_true, config: DecisionPolicyConfig = None):
+    '''Isotonic calibration and threshold learned from out-of-fold probabilities.
+
+    The calibration is stored as its breakpoints, so serving applies it with np.interp.
+    '''
+    try:
+        from sklearn.isotonic import IsotonicRegression # type: ignore
+        config = config or DecisionPolicyConfig()
+        oof_probabilities = np.asarray(oof_probabilities, dtype=np.float64)
+        isotonic = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip").fit(oof_probabilities, y_true)
+        calibrated = isotonic.predict(oof_probabilities)
+        threshold, score = select_threshold(
+            calibrated, y_true, config.objective, config.cost_false_negative, config.cost_false_positive
+        )
+        policy = {
+            "calibration": {"x": isotonic.X_thresholds_.tolist(), "y": isotonic.y_thresholds_.tolist()},
+            "threshold": threshold,
+            "objective": config.objective,
+            "objective_value": score,
+            "costs": {"false_negative": config.cost_false_negative, "false_positive": config.cost_false_positive},
+            "oof_rows": int(len(oof_probabilities)),
+        }
+        logging.info(f"Decision threshold {threshold:.4f} ({config.objective} {score:.4f}) from {len(oof_probabilities)} out-of-fold rows.")
+        return policy
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def save_policy(policy, file_path):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path + ".tmp", 'w') as policy_file:
+        json.dump(policy, policy_file, indent=2)
+    os.replace(file_path + ".tmp", file_path)
+    logging.info(f"Decision policy saved to: {file_path}")
+
+class DecisionPolicy:
+    '''Vectorized calibration and decision rules applied to a batch of model probabilities.
+
+    Calibrated probability = piecewise-linear calibration of the raw one; label 1 when
+    it reaches the applicant's grade cutoff (the learned threshold unless overridden);
+    decision = the band the calibrated probability falls into.
+    '''
+    def __init__(self, policy=None, config: DecisionPolicyConfig = None):
+        config = config or DecisionPolicyConfig()
+        policy = policy or {}
+        calibration = policy.get("calibration")
+        self.calibration_x = np.asarray(calibration["x"], dtype=np.float64) if calibration else None
+        self.calibration_y = np.asarray(calibration["y"], dtype=np.float64) if calibration else None
+        self.threshold = float(policy.get("threshold", 0.5))
+        self.grade_cutoffs = parse_grade_cutoffs(config.grade_cutoffs)
+        if config.bands:
+            self.band_names, band_edges = parse_bands(config.bands)
+        else:
+            self.band_names, band_edges = ["approve", "review", "decline"], [self.threshold / 2, self.threshold]
+        self.band_edges = np.asarray(band_edges, dtype=np.float64)
+        self._band_names = np.asarray(self.band_names, dtype=object)
+
+    @classmethod
+    def load(cls, file_path, config: DecisionPolicyConfig = None):
+        '''Policy learned by training, or the uncalibrated 0.5 cutoff for models trained without one.'''
+        if not os.path.exists(file_path):
+            logging.info(f"No decision policy at {file_path}, using uncalibrated probabilities and a 0.5 cutoff.")
+            return cls(None, config)
+        with open(file_path) as policy_file:
+            return cls(json.load(policy_file), config)
+
+    def calibrate(self, probabilities):
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        if self.calibration_x is None:
+            return probabilities
+        return np.interp(probabilities, self.calibration_x, self.calibration_y)
+
+    def cutoffs(self, grades):
+        if not self.grade_cutoffs or grades is None:
+            return self.threshold
+        return np.fromiter((self.grade_cutoffs.get(grade, self.threshold) for grade in grades), dtype=np.float64, count=len(grades))
+
+    def labels(self, calibrated, grades=None):
+        '''0/1 labels of calibrated probabilities under the threshold and the grade cutoffs.'''
+        return (np.asarray(calibrated, dtype=np.float64) >= self.cutoffs(grades)).astype(int)
+
+    def apply(self, probabilities, grades=None):
+        '''(calibrated probabilities, 0/1 labels) for raw positive-class probabilities and loan grades.'''
+        calibrated = self.calibrate(probabilities)
+        return calibrated, self.labels(calibrated, grades)
+
+    def decisions(self, calibrated):
+        '''Band name per calibrated probability.'''
+        return self._band_names[np.searchsorted(self.band_edges, calibrated, side='right')]
+
+    def describe(self):
+        return {
+            "threshold": self.threshold,
+            "calibrated": self.calibration_x is not None,
+            "grade_cutoffs": self.grade_cutoffs,
+            "bands": dict(zip(self.band_names, self.band_edges.tolist() + [1.0])),
+        }
@@ -0,0 +1,229 @@
+import sys
+import os
+import json
+import math
+import time
+import bisect
+import threading
+import numpy as np # type: ignore
+from dataclasses import dataclass
+from src.exception import CustomException
+from src.logger import logging
+from src.utils.metrics import DRIFT_PSI, DRIFT_KS, DRIFT_WINDOW_RECORDS
+
+MISSING = "__missing__"
+# Smoothing for empty bins, so PSI stays finite.
+EPSILON = 1e-4
+
+@dataclass
+class DriftMonitorConfig:
+    '''Reference distributions captured at training time and the serving-side window they are compared with.'''
+    enabled: bool = os.getenv("DRIFT_MONITOR", "1") == "1"
+    reference_path: str = os.path.join("artifacts", "models", "drift_reference.json")
+    prediction_reference_path: str = os.path.join("artifacts", "models", "prediction_reference.json")
+    n_bins: int = int(os.getenv("DRIFT_BINS", "10"))
+    # Scores cover the current window plus the previous full one (at least `window_size` records once warm).
+    window_size: int = int(os.getenv("DRIFT_WINDOW_SIZE", "5000"))
+    refresh_seconds: float = float(os.getenv("DRIFT_REFRESH_SECONDS", "5"))
+
+# The fields that shape the references training writes; the rest only configure the serving monitor.
+DRIFT_REFERENCE_FIELDS = ("n_bins", "reference_path", "prediction_reference_path")
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+def numeric_reference(values, n_bins):
+    '''Quantile bin edges of the training values and the share of rows per bin (last bin: missing).'''
+    values = np.asarray(values, dtype=np.float64)
+    present = values[~np.isnan(values)]
+    edges = np.unique(np.quantile(present, np.linspace(0, 1, n_bins + 1)[1:-1])) if present.size else np.array([])
+    counts = np.bincount(np.searchsorted(edges, present, side='right'), minlength=len(edges) + 1).astype(np.float64)
+    counts = np.append(counts, len(values) - present.size)
+    return {"type": "numeric", "edges": edges.tolist(), "proportions": (counts / max(len(values), 1)).tolist()}
+
+def categorical_reference(values):
+    '''Training category frequencies, plus the missing share; unseen categories count as "other" when serving.'''
+    values = [MISSING if _is_missing(value) else str(value) for value in values]
+    categories = sorted(set(values) - {MISSING})
+    index = {category: i for i, category in enumerate(categories)}
+    counts = np.zeros(len(categories) + 2)
+    for value in values:
+        counts[index[value] if value in index else (len(categories) + 1 if value == MISSING else len(categories))] += 1
+    return {"type": "categorical", "categories": categories, "proportions": (counts / max(len(values), 1)).tolist()}
+
+def build_feature_reference(features_df, n_bins=10):
+    '''Reference histograms / frequencies for every input column of the training frame.'''
+    try:
+        reference = {}
+        for column in features_df.columns:
+            series = features_df[column]
+            if series.dtype.kind in "biuf":
+                reference[column] = numeric_reference(series.to_numpy(dtype=np.float64), n_bins)
+            else:
+                reference[column] = categorical_reference(series.astype(object).tolist())
+        return {"rows": len(features_df), "features": reference}
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def save_reference(reference, file_path):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path + ".tmp", 'w') as reference_file:
+        json.dump(reference, reference_file)
+    os.replace(file_path + ".tmp", file_path)
+    logging.info(f"Drift reference saved to: {file_path}")
+
+def psi(actual, expected):
+    '''Population stability index between two bin-share vectors.'''
+    actual = np.maximum(actual, EPSILON)
+    expected = np.maximum(expected, EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+class ColumnSketch:
+    '''Constant-memory bin counts of one column over the reference bins (two tumbling windows).'''
+    def __init__(self, name, reference):
+        self.name = name
+        self.kind = reference["type"]
+        self.expected = np.asarray(reference["proportions"], dtype=np.float64)
+        if self.kind == "numeric":
+            self.edges = list(reference["edges"])
+            self._edges = np.asarray(self.edges, dtype=np.float64)
+            self.missing_bin = len(self.edges) + 1
+        else:
+            self.index = {category: i for i, category in enumerate(reference["categories"])}
+            self.other_bin = len(self.index)
+            self.missing_bin = len(self.index) + 1
+        self.current = np.zeros(len(self.expected), dtype=np.int64)
+        self.previous = np.zeros(len(self.expected), dtype=np.int64)
+
+    def bin_of(self, value):
+        if _is_missing(value):
+            return self.missing_bin
+        if self.kind == "numeric":
+            return bisect.bisect_right(self.edges, value)
+        return self.index.get(value, self.other_bin)
+
+    def add_many(self, values):
+        '''Vectorized update for large batches.'''
+        if self.kind == "numeric":
+            array = np.asarray([np.nan if value is None else value for value in values], dtype=np.float64)
+            bins = np.searchsorted(self._edges, array, side='right')
+            bins[np.isnan(array)] = self.missing_bin
+        else:
+            bins = [self.bin_of(value) for value in values]
+        self.current += np.bincount(bins, minlength=len(self.expected))
+
+    def rotate(self):
+        self.previous, self.current = self.current, np.zeros_like(self.current)
+
+    def scores(self):
+        '''(PSI, KS) of the observed window against the reference, or None before any traffic.'''
+        counts = self.current + self.previous
+        total = counts.sum()
+        if total == 0:
+            return None
+        actual = counts / total
+        ks = None
+        if self.kind == "numeric":
+            # KS on the binned CDFs of the non-missing values (a lower bound of the exact statistic).
+            a, e = actual[:-1], self.expected[:-1]
+            if a.sum() > 0 and e.sum() > 0:
+                ks = float(np.max(np.abs(np.cumsum(a) / a.sum() - np.cumsum(e) / e.sum())))
+        return psi(actual, self.expected), ks
+
+class DriftMonitor:
+    '''Online drift scores of the serving traffic against the training reference.
+
+    Each column keeps bin counts over the reference bins only, so memory is constant
+    and no raw rows are stored. Small batches are binned with `bisect` in plain Python
+    (a few microseconds per record), large ones with NumPy. PSI and binned KS are
+    recomputed into Prometheus gauges at most every `refresh_seconds`.
+    '''
+    def __init__(self, config: DriftMonitorConfig = None):
+        self.monitor_config = config or DriftMonitorConfig()
+        self.sketches = None
+        self.prediction_sketch = None
+        self.version = None
+        self._window_records = 0
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self, version):
+        config = self.monitor_config
+        self.version = version
+        self.sketches, self.prediction_sketch = [], None
+        try:
+            with open(config.reference_path) as reference_file:
+                reference = json.load(reference_file)
+            self.sketches = [ColumnSketch(name, ref) for name, ref in reference["features"].items()]
+            if os.path.exists(config.prediction_reference_path):
+                with open(config.prediction_reference_path) as reference_file:
+                    self.prediction_sketch = ColumnSketch("prediction", json.load(reference_file))
+            logging.info(f"Drift monitor using reference {config.reference_path} for model version {version}.")
+        except FileNotFoundError:
+            logging.info("No drift reference found; drift monitoring is inactive until the model is retrained.")
+        self._window_records = 0
+        self._last_refresh = time.monotonic()
+
+    def prepare(self, version):
+        '''Loads the reference for a model version ahead of its first scored batch.'''
+        if not self.monitor_config.enabled:
+            return
+        with self._lock:
+            if version != self.version:
+                self._load(version)
+
+    def update(self, records, probabilities, version):
+        '''Adds a scored batch (application dicts and positive-class probabilities) to the sketches.'''
+        if not self.monitor_config.enabled:
+            return
+        with self._lock:
+            if version != self.version:
+                self._load(version)
+            if not self.sketches:
+                return
+            if len(records) <= 16:
+                for record in records:
+                    for sketch in self.sketches:
+                        sketch.current[sketch.bin_of(record.get(sketch.name))] += 1
+            else:
+                for sketch in self.sketches:
+                    sketch.add_many([record.get(sketch.name) for record in records])
+            if self.prediction_sketch is not None:
+                if len(records) <= 16:
+                    for probability in probabilities:
+                        self.prediction_sketch.current[self.prediction_sketch.bin_of(float(probability))] += 1
+                else:
+                    self.prediction_sketch.add_many(probabilities)
+            self._window_records += len(records)
+            if self._window_records >= self.monitor_config.window_size:
+                for sketch in self._all_sketches():
+                    sketch.rotate()
+                self._window_records = 0
+            now = time.monotonic()
+            if now - self._last_refresh >= self.monitor_config.refresh_seconds:
+                self._last_refresh = now
+                self._refresh_gauges()
+
+    def _all_sketches(self):
+        return self.sketches + ([self.prediction_sketch] if self.prediction_sketch is not None else [])
+
+    def _refresh_gauges(self):
+        for sketch in self._all_sketches():
+            scores = sketch.scores()
+            if scores is None:
+                continue
+            psi_value, ks_value = scores
+            DRIFT_PSI.labels(sketch.name).set(psi_value)
+            if ks_value is not None:
+                DRIFT_KS.labels(sketch.name).set(ks_value)
+        DRIFT_WINDOW_RECORDS.set(int(self.sketches[0].current.sum() + self.sketches[0].previous.sum()))
+
+    def scores(self):
+        '''Current {column: (psi, ks)} for every sketch with traffic.'''
+        with self._lock:
+            if not self.sketches:
+                return {}
+            scores = {sketch.name: sketch.scores() for sketch in self._all_sketches()}
+            return {name: value for name, value in scores.items() if value is not None}
+
+drift_monitor = DriftMonitor()
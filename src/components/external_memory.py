@@ -0,0 +1,146 @@
+import sys
+import os
+import numpy as np # type: ignore
+from src.exception import CustomException
+from src.logger import logging
+from src.components.native_model import NativeModel, NativeXGBoostModel, NativeLightGBMModel
+
+import xgboost as xgb # type: ignore
+import lightgbm as lgb # type: ignore
+
+# Boosters trained here are served as they are, through the native path (NativeModel),
+# under the name of the sklearn estimator they stand in for.
+CLASSES = [0, 1]
+
+def validation_rows(start, stop, every):
+    '''Mask of the held-out rows in [start, stop): every `every`-th row of the training array.
+
+    Ingestion shuffles rows within each chunk, so this is a random ~1/every sample.
+    '''
+    return np.arange(start, stop) % every == every - 1
+
+def iter_blocks(n_rows, chunk_rows):
+    for start in range(0, n_rows, chunk_rows):
+        yield start, min(start + chunk_rows, n_rows)
+
+class TrainingBatches(xgb.DataIter):
+    '''Feeds the training rows of memory-mapped X/y to XGBoost one block at a time.
+
+    ExtMemQuantileDMatrix pulls the blocks twice (quantile sketch, then histogram
+    pages) and keeps the pages in `cache_prefix` on disk, not in memory.
+    '''
+    def __init__(self, X, y, chunk_rows, every, cache_prefix):
+        self.X, self.y = X, y
+        self.chunk_rows = chunk_rows
+        self.every = every
+        # A trailing block can hold validation rows only.
+        self._blocks = [(start, stop) for start, stop in iter_blocks(len(X), chunk_rows)
+                        if not validation_rows(start, stop, every).all()]
+        self._next = 0
+        super().__init__(cache_prefix=cache_prefix, release_data=True)
+
+    def next(self, input_data):
+        if self._next == len(self._blocks):
+            return False
+        start, stop = self._blocks[self._next]
+        keep = ~validation_rows(start, stop, self.every)
+        input_data(data=np.asarray(self.X[start:stop])[keep], label=np.asarray(self.y[start:stop])[keep])
+        self._next += 1
+        return True
+
+    def reset(self):
+        self._next = 0
+
+class TrainingRows(lgb.Sequence):
+    '''Training rows of a memory-mapped X as a LightGBM Sequence (validation rows left out).
+
+    LightGBM samples rows from it for the bin boundaries, then reads it in blocks of
+    `batch_size` to build its binned dataset; the float matrix is never copied whole.
+    '''
+    def __init__(self, X, chunk_rows, every):
+        self.X = X
+        self.every = every
+        self.batch_size = chunk_rows
+        self.n_rows = len(X) - len(X) // every
+
+    def source_rows(self, rows):
+        # The k-th training row is source row k + k // (every - 1): one row in `every` is skipped.
+        return rows + rows // (self.every - 1)
+
+    def __len__(self):
+        return self.n_rows
+
+    def __getitem__(self, idx):
+        # LightGBM reads rows as float64.
+        if isinstance(idx, slice):
+            return np.asarray(self.X[self.source_rows(np.arange(self.n_rows)[idx])], dtype=np.float64)
+        return np.asarray(self.X[int(self.source_rows(idx))], dtype=np.float64)
+
+def training_labels(y, chunk_rows, every):
+    '''Labels of the training rows (validation rows removed), in the Sequence's order.'''
+    return np.concatenate([
+        np.asarray(y[start:stop])[~validation_rows(start, stop, every)]
+        for start, stop in iter_blocks(len(y), chunk_rows)
+    ]).astype(np.float32)
+
+def class_counts(y, chunk_rows, every):
+    '''(negatives, positives) among the training rows.'''
+    negatives = positives = 0
+    for start, stop in iter_blocks(len(y), chunk_rows):
+        labels = np.asarray(y[start:stop])[~validation_rows(start, stop, every)]
+        positives += int(labels.sum())
+        negatives += int(len(labels) - labels.sum())
+    return negatives, positives
+
+def train_xgboost(X, y, params, chunk_rows, every, cache_dir, n_threads):
+    '''Trains an XGBoost booster from external-memory pages and returns it as a NativeModel.'''
+    try:
+        params = dict(params)
+        n_rounds = params.pop("n_estimators")
+        os.makedirs(cache_dir, exist_ok=True)
+        batches = TrainingBatches(X, y, chunk_rows, every, cache_prefix=os.path.join(cache_dir, "xgb"))
+        dtrain = xgb.ExtMemQuantileDMatrix(batches, max_bin=params.pop("max_bin", 256), nthread=n_threads)
+        native_params = {("seed" if key == "random_state" else key): value for key, value in params.items()}
+        booster = xgb.train({**native_params, "objective": "binary:logistic", "tree_method": "hist", "nthread": n_threads},
+                            dtrain, num_boost_round=n_rounds)
+        del dtrain
+        logging.info(f"XGBoost trained from external memory: {n_rounds} rounds, pages in {cache_dir}.")
+        return NativeModel("xgboost", NativeXGBoostModel(None, CLASSES, n_threads, booster=booster), estimator_name="XGBClassifier")
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def train_lightgbm(X, y, params, chunk_rows, every, n_threads):
+    '''Trains a LightGBM booster from a row Sequence and returns it as a NativeModel.'''
+    try:
+        params = dict(params)
+        n_rounds = params.pop("n_estimators")
+        dtrain = lgb.Dataset(TrainingRows(X, chunk_rows, every), label=training_labels(y, chunk_rows, every),
+                             params={"verbose": -1})
+        booster = lgb.train({**params, "objective": "binary", "num_threads": n_threads, "verbose": -1},
+                            dtrain, num_boost_round=n_rounds)
+        del dtrain
+        logging.info(f"LightGBM trained from a row sequence: {n_rounds} rounds.")
+        return NativeModel("lightgbm", NativeLightGBMModel(None, CLASSES, n_threads, booster=booster), estimator_name="LGBMClassifier")
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def positive_proba_in_chunks(model, X, chunk_rows, rows=None):
+    '''Positive-class probabilities of `model` over memory-mapped X, one block at a time.
+
+    `rows(start, stop)` optionally selects the rows of each block to keep.
+    '''
+    parts = []
+    for start, stop in iter_blocks(len(X), chunk_rows):
+        block = np.asarray(X[start:stop])
+        if rows is not None:
+            block = block[rows(start, stop)]
+        if len(block):
+            parts.append(model.predict_proba(block)[:, 1])
+    return np.concatenate(parts) if parts else np.empty(0)
+
+def labels_in_chunks(y, chunk_rows, rows=None):
+    parts = []
+    for start, stop in iter_blocks(len(y), chunk_rows):
+        labels = np.asarray(y[start:stop])
+        parts.append(labels[rows(start, stop)] if rows is not None else labels)
+    return np.concatenate(parts) if parts else np.empty(0, dtype=np.int8)
@@ -0,0 +1,210 @@
+import sys
+import numpy as np # type: ignore
+from src.exception import CustomException
+from src.logger import logging
+
+class CompiledPreprocessor:
+    '''Flat NumPy version of the fitted ColumnTransformer used at inference time.
+
+    Numeric columns are imputed with a constant and standardized with per-column
+    mean/scale vectors; categorical columns are looked up in a category -> output
+    index table and the (scaled) one-hot value is written directly. Rows are dicts
+    or a structured array and the output is a float32 feature buffer, so pandas and
+    the sklearn estimators are not touched on the serving path.
+    '''
+    def __init__(self, n_features, numeric_columns, numeric_index, numeric_fill, numeric_mean,
+                 numeric_scale, categorical_columns, categorical_fill, categorical_lookup,
+                 categorical_value, handle_unknown_error=False, source_digest=None):
+        self.n_features = n_features
+        self.numeric_columns = list(numeric_columns)
+        self.numeric_index = np.asarray(numeric_index, dtype=np.intp)
+        self.numeric_fill = np.asarray(numeric_fill, dtype=np.float64)
+        self.numeric_mean = np.asarray(numeric_mean, dtype=np.float64)
+        self.numeric_scale = np.asarray(numeric_scale, dtype=np.float64)
+        self.categorical_columns = list(categorical_columns)
+        self.categorical_fill = list(categorical_fill)
+        self.categorical_lookup = [dict(lookup) for lookup in categorical_lookup]
+        self.categorical_value = np.asarray(categorical_value, dtype=np.float32)
+        self.categorical_index = np.asarray(
+            sorted(i for lookup in self.categorical_lookup for i in lookup.values()), dtype=np.intp
+        )
+        self.handle_unknown_error = handle_unknown_error
+        self.source_digest = source_digest
+
+        # Plain-Python copies for the single-row path, where NumPy call overhead dominates.
+        self._numeric_row = list(zip(
+            self.numeric_columns, self.numeric_index.tolist(), self.numeric_fill.tolist(),
+            self.numeric_mean.tolist(), self.numeric_scale.tolist(),
+        ))
+        self._categorical_row = list(zip(
+            self.categorical_columns, self.categorical_fill, self.categorical_lookup,
+        ))
+        self._categorical_value = self.categorical_value.tolist()
+
+    def _category_index(self, column, lookup, value, fill):
+        if value is None or value != value:
+            value = fill
+        index = lookup.get(value)
+        if index is None and self.handle_unknown_error:
+            raise ValueError(f"Unknown category {value!r} in column {column}")
+        return index
+
+    def transform_one(self, record, out=None):
+        '''Transforms one dict into `out` (a float32 vector of length n_features).'''
+        if out is None:
+            out = np.zeros(self.n_features, dtype=np.float32)
+        else:
+            out[:] = 0
+        for column, index, fill, mean, scale in self._numeric_row:
+            value = record.get(column)
+            if value is None or value != value:
+                value = fill
+            out[index] = (value - mean) / scale
+        for column, fill, lookup in self._categorical_row:
+            index = self._category_index(column, lookup, record.get(column), fill)
+            if index is not None:
+                out[index] = self._categorical_value[index]
+        return out
+
+    def transform(self, records, out=None):
+        '''Transforms a dict, a list of dicts or a structured array into an (n, n_features) float32 buffer.'''
+        try:
+            if isinstance(records, dict):
+                records = [records]
+            n_rows = len(records)
+            if out is None:
+                out = np.empty((n_rows, self.n_features), dtype=np.float32)
+            elif out.shape != (n_rows, self.n_features):
+                raise ValueError(f"Output buffer has shape {out.shape}, expected {(n_rows, self.n_features)}")
+
+            if isinstance(records, np.ndarray) and records.dtype.names:
+                column = lambda name: records[name]
+            else:
+                column = lambda name: [record.get(name) for record in records]
+
+            numeric = np.empty((n_rows, len(self.numeric_columns)), dtype=np.float64)
+            for j, name in enumerate(self.numeric_columns):
+                numeric[:, j] = np.asarray(column(name), dtype=np.float64)
+            missing = np.isnan(numeric)
+            if missing.any():
+                numeric = np.where(missing, self.numeric_fill, numeric)
+            out[:, self.numeric_index] = (numeric - self.numeric_mean) / self.numeric_scale
+
+            out[:, self.categorical_index] = 0
+            for name, fill, lookup in self._categorical_row:
+                for i, value in enumerate(column(name)):
+                    if isinstance(value, bytes):
+                        value = value.decode()
+                    index = self._category_index(name, lookup, value, fill)
+                    if index is not None:
+                        out[i, index] = self._categorical_value[index]
+            return out
+        except Exception as e:
+            raise CustomException(e, sys)
+
+def _column_names(preprocessor, columns):
+    names = list(preprocessor.feature_names_in_)
+    return [names[c] if isinstance(c, (int, np.integer)) else c for c in columns]
+
+def compile_preprocessor(preprocessor, source_digest=None):
+    '''Compiles a fitted ColumnTransformer of imputer/one-hot/scaler pipelines into a CompiledPreprocessor.'''
+    try:
+        # Only needed when compiling; serving an exported CompiledPreprocessor must not import sklearn.
+        from sklearn.impute import SimpleImputer # type: ignore
+        from sklearn.preprocessing import StandardScaler, OneHotEncoder # type: ignore
+        numeric_columns, numeric_index, numeric_fill, numeric_mean, numeric_scale = [], [], [], [], []
+        categorical_columns, categorical_fill, categorical_lookup = [], [], []
+        categorical_value = {}
+        handle_unknown_error = False
+        offset = 0
+
+        for name, transformer, columns in preprocessor.transformers_:
+            columns = _column_names(preprocessor, columns)
+            if transformer == 'drop' or len(columns) == 0:
+                continue
+            steps = [step for _, step in transformer.steps] if hasattr(transformer, 'steps') else [transformer]
+            if transformer == 'passthrough':
+                steps = []
+
+            imputer = next((s for s in steps if isinstance(s, SimpleImputer)), None)
+            encoder = next((s for s in steps if isinstance(s, OneHotEncoder)), None)
+            scaler = next((s for s in steps if isinstance(s, StandardScaler)), None)
+            unsupported = [s for s in steps if s not in (imputer, encoder, scaler)]
+            if unsupported:
+                raise ValueError(f"Cannot compile step {type(unsupported[0]).__name__} in {name}")
+            if imputer is not None and getattr(imputer, 'indicator_', None) is not None:
+                raise ValueError(f"Cannot compile SimpleImputer with add_indicator in {name}")
+
+            if encoder is None:
+                width = len(columns)
+                fill = imputer.statistics_.astype(np.float64) if imputer is not None else np.full(width, np.nan)
+                mean = scaler.mean_ if scaler is not None and scaler.mean_ is not None else np.zeros(width)
+                scale = scaler.scale_ if scaler is not None and scaler.scale_ is not None else np.ones(width)
+                numeric_columns.extend(columns)
+                numeric_index.extend(range(offset, offset + width))
+                numeric_fill.extend(fill)
+                numeric_mean.extend(mean)
+                numeric_scale.extend(scale)
+                offset += width
+                continue
+
+            if getattr(encoder, '_infrequent_enabled', False):
+                raise ValueError(f"Cannot compile OneHotEncoder with infrequent categories in {name}")
+            if scaler is not None and scaler.with_mean:
+                raise ValueError(f"Cannot compile a centering scaler after one-hot encoding in {name}")
+            handle_unknown_error = handle_unknown_error or encoder.handle_unknown == 'error'
+
+            position = 0
+            for k, column in enumerate(columns):
+                drop = encoder.drop_idx_[k] if encoder.drop_idx_ is not None else None
+                lookup = {}
+                for i, category in enumerate(encoder.categories_[k].tolist()):
+                    if drop is not None and i == drop:
+                        continue
+                    scale = scaler.scale_[position] if scaler is not None and scaler.scale_ is not None else 1.0
+                    lookup[category] = offset + position
+                    categorical_value[offset + position] = 1.0 / scale
+                    position += 1
+                categorical_columns.append(column)
+                categorical_fill.append(imputer.statistics_[k] if imputer is not None else None)
+                categorical_lookup.append(lookup)
+            offset += position
+
+        value = np.zeros(offset, dtype=np.float32)
+        for index, v in categorical_value.items():
+            value[index] = v
+
+        logging.info(f"Compiled preprocessor into a {offset}-feature NumPy plan.")
+        return CompiledPreprocessor(
+            n_features=offset,
+            numeric_columns=numeric_columns,
+            numeric_index=numeric_index,
+            numeric_fill=numeric_fill,
+            numeric_mean=numeric_mean,
+            numeric_scale=numeric_scale,
+            categorical_columns=categorical_columns,
+            categorical_fill=categorical_fill,
+            categorical_lookup=categorical_lookup,
+            categorical_value=value,
+            handle_unknown_error=handle_unknown_error,
+            source_digest=source_digest,
+        )
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def check_parity(compiled, preprocessor, features_df, rtol=1e-5, atol=1e-5):
+    '''Raises if the compiled plan does not reproduce `preprocessor.transform(features_df)`.'''
+    try:
+        expected = preprocessor.transform(features_df)
+        if hasattr(expected, 'toarray'):
+            expected = expected.toarray()
+        actual = compiled.transform(features_df.to_dict('records'))
+        if expected.shape != actual.shape:
+            raise ValueError(f"Shape mismatch: sklearn {expected.shape}, compiled {actual.shape}")
+        max_error = float(np.max(np.abs(expected - actual))) if expected.size else 0.0
+        if not np.allclose(expected, actual, rtol=rtol, atol=atol):
+            raise ValueError(f"Compiled preprocessor differs from sklearn output (max abs error {max_error})")
+        logging.info(f"Compiled preprocessor parity check passed on {len(features_df)} rows (max abs error {max_error:.2e}).")
+        return max_error
+    except Exception as e:
+        raise CustomException(e, sys)
@@ -0,0 +1,295 @@
+import sys
+import json
+import numpy as np # type: ignore
+from src.exception import CustomException
+
+# How a node routes a missing value (NaN): to its default child, or as if it were 0.0
+# (LightGBM missing_type "None"); ZERO also sends 0.0 to the default child (missing_type "Zero").
+MISSING_DEFAULT, MISSING_AS_ZERO, MISSING_ZERO_DEFAULT = 0, 1, 2
+ROW_CHUNK = 4096
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+def _below_float32(value):
+    '''Largest float32 that is <= `value`, so `x32 <= value` holds exactly when `x32 <= result`.'''
+    # Out of float32 range (LightGBM writes +-1e300 for open-ended splits): answered without
+    # the overflowing cast.
+    if value >= FLOAT32_MAX:
+        return np.float32(FLOAT32_MAX)
+    if value < -FLOAT32_MAX:
+        return np.float32(-np.inf)
+    result = np.float32(value)
+    if float(result) > value:
+        result = np.nextafter(result, np.float32(-np.inf))
+    return result
+
+def _lightgbm_threshold(value):
+    '''float32 threshold t32 such that `x32 < t32` holds exactly when `x32 <= value`.'''
+    below = _below_float32(value)
+    # Next float32 above the largest float32 <= value; past the largest finite one that is +inf.
+    if below == FLOAT32_MAX:
+        return np.float32(np.inf)
+    return np.nextafter(below, np.float32(np.inf))
+
+class FlatTreeEnsemble:
+    '''A binary-classification tree ensemble as flat NumPy arrays.
+
+    Every node of every tree is a row of the node arrays (leaves have feature -1 and carry
+    a float32 value); `roots[t]` is the first node of tree t. All splits are `x < threshold`
+    with float32 thresholds and inputs, which reproduces XGBoost (`<`, float32) exactly and
+    LightGBM (`<=` on doubles) by rounding its thresholds to the next float32 boundary.
+    Rows are scored for all trees at once, one tree level per NumPy step.
+    '''
+    def __init__(self, feature, threshold, left, right, default_left, missing_mode, value,
+                 roots, depth, bias, sigmoid_scale=1.0):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.missing_mode = np.asarray(missing_mode, dtype=np.int8)
+        self.value = np.asarray(value, dtype=np.float32)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.depth = int(depth)
+        self.bias = float(bias)
+        self.sigmoid_scale = float(sigmoid_scale)
+        self._zero_missing = bool(np.any(self.missing_mode == MISSING_ZERO_DEFAULT))
+        self._nan_as_zero = bool(np.any(self.missing_mode == MISSING_AS_ZERO))
+        # Traversal tables: leaves point to themselves (feature 0, any threshold), so every
+        # row can take exactly `depth` steps without masking; children[2i] / [2i+1] = left / right.
+        nodes = np.arange(len(self.feature), dtype=np.int32)
+        leaf = self.feature < 0
+        self._feature = np.where(leaf, 0, self.feature).astype(np.intp)
+        self._children = np.stack(
+            [np.where(leaf, nodes, self.left), np.where(leaf, nodes, self.right)], axis=1
+        ).ravel().astype(np.intp)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def _leaves(self, X):
+        '''Index of the leaf each row reaches in each tree, shape (n_rows, n_trees).'''
+        n_rows, n_features = X.shape
+        flat_X = np.ascontiguousarray(X).ravel()
+        row_start = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+        node = np.repeat(self.roots.astype(np.intp)[None, :], n_rows, axis=0)
+        check_missing = bool(np.isnan(flat_X).any()) or self._zero_missing
+        for _ in range(self.depth):
+            x = flat_X.take(row_start + self._feature.take(node))
+            go_right = ~(x < self.threshold.take(node))
+            if check_missing:
+                go_right = self._route_missing(x, node, go_right)
+            node = self._children.take(2 * node + go_right)
+        return node
+
+    def _route_missing(self, x, node, go_right):
+        missing = np.isnan(x)
+        if self._nan_as_zero or self._zero_missing:
+            mode = self.missing_mode.take(node)
+            if self._nan_as_zero:
+                as_zero = missing & (mode == MISSING_AS_ZERO)
+                go_right = np.where(as_zero, ~(np.float32(0) < self.threshold.take(node)), go_right)
+                missing &= ~as_zero
+            if self._zero_missing:
+                missing |= (x == 0) & (mode == MISSING_ZERO_DEFAULT)
+        return np.where(missing, ~self.default_left.take(node), go_right)
+
+    def tree_values(self, X):
+        '''Leaf value of every tree for every row, shape (n_rows, n_trees).'''
+        X = np.asarray(X, dtype=np.float32)
+        return self.value[self._leaves(X)]
+
+    def margin(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        out = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], ROW_CHUNK):
+            chunk = X[start:start + ROW_CHUNK]
+            out[start:start + len(chunk)] = self.value[self._leaves(chunk)].sum(axis=1, dtype=np.float64)
+        return out + self.bias
+
+    def positive_proba(self, X):
+        return 1.0 / (1.0 + np.exp(-self.sigmoid_scale * self.margin(X)))
+
+    def select(self, trees, extra_bias=0.0):
+        '''New ensemble holding only the given trees (in order), with `extra_bias` added.'''
+        ends = np.append(self.roots[1:], self.n_nodes)
+        parts, roots, offset = [], [], 0
+        for tree in trees:
+            start, end = int(self.roots[tree]), int(ends[tree])
+            shift = offset - start
+            child = lambda column: np.where(column[start:end] >= 0, column[start:end] + shift, -1)
+            parts.append((self.feature[start:end], self.threshold[start:end], child(self.left), child(self.right),
+                          self.default_left[start:end], self.missing_mode[start:end], self.value[start:end]))
+            roots.append(offset)
+            offset += end - start
+        if not parts:
+            raise ValueError("An ensemble needs at least one tree")
+        return FlatTreeEnsemble(
+            *[np.concatenate(column) for column in zip(*parts)],
+            roots=roots, depth=self.depth, bias=self.bias + extra_bias, sigmoid_scale=self.sigmoid_scale
+        )
+
+    def constant_trees(self):
+        '''Indices of trees whose leaves all hold the same value (they only shift the margin).'''
+        ends = np.append(self.roots[1:], self.n_nodes)
+        constant = []
+        for tree, (start, end) in enumerate(zip(self.roots, ends)):
+            leaves = self.value[start:end][self.feature[start:end] < 0]
+            if np.all(leaves == leaves[0]):
+                constant.append(tree)
+        return constant
+
+    def arrays(self):
+        return {
+            "feature": self.feature, "threshold": self.threshold, "left": self.left, "right": self.right,
+            "default_left": self.default_left, "missing_mode": self.missing_mode, "value": self.value,
+            "roots": self.roots, "depth": np.asarray(self.depth), "bias": np.asarray(self.bias),
+            "sigmoid_scale": np.asarray(self.sigmoid_scale),
+        }
+
+    def save(self, file_path):
+        with open(file_path, 'wb') as model_file:
+            np.savez(model_file, **self.arrays())
+
+    @classmethod
+    def load(cls, file_path):
+        with np.load(file_path) as arrays:
+            return cls(**{name: arrays[name] for name in arrays.files})
+
+class _TreeBuilder:
+    '''Collects nodes tree by tree and tracks the maximum depth.'''
+    def __init__(self):
+        self.columns = {name: [] for name in ("feature", "threshold", "left", "right", "default_left", "missing_mode", "value")}
+        self.roots = []
+        self.depth = 0
+
+    def add_node(self, feature=-1, threshold=0.0, default_left=False, missing_mode=MISSING_DEFAULT, value=0.0):
+        index = len(self.columns["feature"])
+        for name, item in (("feature", feature), ("threshold", threshold), ("left", -1), ("right", -1),
+                           ("default_left", default_left), ("missing_mode", missing_mode), ("value", value)):
+            self.columns[name].append(item)
+        return index
+
+    def build(self, bias, sigmoid_scale=1.0):
+        return FlatTreeEnsemble(**self.columns, roots=self.roots, depth=self.depth, bias=bias, sigmoid_scale=sigmoid_scale)
+
+def _parse_float(value):
+    # XGBoost >= 2 writes some scalars as one-element vectors, e.g. "[7.3E-1]".
+    return float(str(value).strip("[]"))
+
+def from_xgboost(booster):
+    '''Flattens a binary:logistic XGBoost Booster (gbtree or dart, numerical splits).'''
+    try:
+        learner = json.loads(booster.save_raw("json"))["learner"]
+        objective = learner["objective"]["name"]
+        if objective != "binary:logistic":
+            raise ValueError(f"Flat trees support binary:logistic, got {objective}")
+        gradient_booster = learner["gradient_booster"]
+        if gradient_booster["name"] == "dart":
+            model = gradient_booster["gbtree"]["model"]
+            weights = [float(weight) for weight in gradient_booster["weight_drop"]]
+        elif gradient_booster["name"] == "gbtree":
+            model = gradient_booster["model"]
+            weights = None
+        else:
+            raise ValueError(f"Flat trees do not support the {gradient_booster['name']} booster")
+
+        builder = _TreeBuilder()
+        for t, tree in enumerate(model["trees"]):
+            if any(tree["split_type"]):
+                raise ValueError("Flat trees do not support categorical splits")
+            weight = weights[t] if weights is not None else 1.0
+            offset = len(builder.columns["feature"])
+            builder.roots.append(offset)
+            lefts, rights = tree["left_children"], tree["right_children"]
+            for node, (left, right) in enumerate(zip(lefts, rights)):
+                if left == -1:
+                    # A leaf's split_condition holds its (learning-rate scaled) value.
+                    builder.add_node(value=tree["split_conditions"][node] * weight)
+                else:
+                    index = builder.add_node(
+                        feature=tree["split_indices"][node],
+                        threshold=np.float32(tree["split_conditions"][node]),
+                        default_left=bool(tree["default_left"][node]),
+                    )
+                    builder.columns["left"][index] = offset + left
+                    builder.columns["right"][index] = offset + right
+            builder.depth = max(builder.depth, _depth(lefts, rights))
+
+        base_score = _parse_float(learner["learner_model_param"]["base_score"])
+        return builder.build(bias=float(np.log(base_score / (1.0 - base_score))))
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def _depth(lefts, rights, node=0):
+    stack, depth = [(node, 0)], 0
+    while stack:
+        node, level = stack.pop()
+        if lefts[node] == -1:
+            depth = max(depth, level)
+        else:
+            stack.extend(((lefts[node], level + 1), (rights[node], level + 1)))
+    return depth
+
+LIGHTGBM_MISSING_MODES = {"NaN": MISSING_DEFAULT, "None": MISSING_AS_ZERO, "Zero": MISSING_ZERO_DEFAULT}
+
+def from_lightgbm(booster):
+    '''Flattens a binary LightGBM Booster (gbdt or dart, numerical `<=` splits).'''
+    try:
+        dump = booster.dump_model()
+        objective = dump.get("objective", "")
+        if not objective.startswith("binary"):
+            raise ValueError(f"Flat trees support the binary objective, got {objective}")
+        if dump.get("num_tree_per_iteration", 1) != 1 or dump.get("average_output", False):
+            raise ValueError("Flat trees do not support multi-output or random-forest LightGBM models")
+        sigmoid_scale = 1.0
+        for token in objective.split():
+            if token.startswith("sigmoid:"):
+                sigmoid_scale = float(token.split(":", 1)[1])
+
+        builder = _TreeBuilder()
+        for tree in dump["tree_info"]:
+            builder.roots.append(len(builder.columns["feature"]))
+            # Iterative pre-order walk: (node dict, parent index, is_left, level).
+            stack = [(tree["tree_structure"], None, False, 0)]
+            while stack:
+                node, parent, is_left, level = stack.pop()
+                if "leaf_value" in node:
+                    index = builder.add_node(value=node["leaf_value"])
+                    builder.depth = max(builder.depth, level)
+                else:
+                    if node["decision_type"] != "<=":
+                        raise ValueError("Flat trees do not support categorical splits")
+                    index = builder.add_node(
+                        feature=node["split_feature"],
+                        threshold=_lightgbm_threshold(node["threshold"]),
+                        default_left=bool(node["default_left"]),
+                        missing_mode=LIGHTGBM_MISSING_MODES[node["missing_type"]],
+                    )
+                    stack.append((node["right_child"], index, False, level + 1))
+                    stack.append((node["left_child"], index, True, level + 1))
+                if parent is not None:
+                    builder.columns["left" if is_left else "right"][parent] = index
+        return builder.build(bias=0.0, sigmoid_scale=sigmoid_scale)
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def flatten_estimator(estimator):
+    '''FlatTreeEnsemble of a fitted XGBClassifier or LGBMClassifier, or of a NativeModel wrapping their booster.'''
+    kind = getattr(estimator, 'kind', None)
+    if kind == "xgboost":
+        return from_xgboost(estimator.impl.booster)
+    if kind == "lightgbm":
+        return from_lightgbm(estimator.impl.booster)
+    name = type(estimator).__name__
+    if name == "XGBClassifier":
+        return from_xgboost(estimator.get_booster())
+    if name == "LGBMClassifier":
+        return from_lightgbm(estimator.booster_)
+    raise ValueError(f"No flat tree conversion for {name}")
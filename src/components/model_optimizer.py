@@ -0,0 +1,198 @@
+import sys
+import os
+import json
+import time
+import pickle
+import numpy as np # type: ignore
+from dataclasses import dataclass
+from sklearn.metrics import f1_score, roc_auc_score # type: ignore
+from src.exception import CustomException
+from src.logger import logging
+from src.utils.common import file_digest
+from src.components.flat_trees import flatten_estimator
+from src.components.native_model import final_estimator, load_native_model, MANIFEST_FILE_NAME
+from src.components.decision_policy import DecisionPolicy, DecisionPolicyConfig
+
+REPORT_FILE_NAME = "optimization_report.json"
+
+@dataclass
+class ModelOptimizerConfig:
+    '''Post-training export of a trimmed, float32, flat-array copy of the best tree ensemble.'''
+    enabled: bool = os.getenv("MODEL_OPTIMIZE", "1") == "1"
+    output_dir: str = os.path.join("artifacts", "models", "optimized")
+    # Keep only the shortest prefix of boosting rounds whose test F1 / ROC-AUC stay within these drops.
+    trim_rounds: bool = os.getenv("OPTIMIZE_TRIM_ROUNDS", "1") == "1"
+    max_f1_drop: float = float(os.getenv("OPTIMIZE_MAX_F1_DROP", "0.002"))
+    max_auc_drop: float = float(os.getenv("OPTIMIZE_MAX_AUC_DROP", "0.001"))
+    latency_batch_rows: int = 1000
+    latency_repeats: int = 50
+
+# The fields that decide what gets exported; the rest only place it and shape the latency report.
+OPTIMIZER_TRAINING_FIELDS = ("enabled", "trim_rounds", "max_f1_drop", "max_auc_drop")
+
+def classification_scores(y_true, proba, policy):
+    '''F1 of the labels serving would give (`policy`'s calibration and threshold) and ROC-AUC of the probabilities.'''
+    y_true = np.asarray(y_true)
+    return {
+        "f1": float(f1_score(y_true, policy.apply(proba)[1])),
+        "roc_auc": float(roc_auc_score(y_true, proba)),
+    }
+
+def within(scores, reference, config):
+    return (
+        reference["f1"] - scores["f1"] <= config.max_f1_drop
+        and reference["roc_auc"] - scores["roc_auc"] <= config.max_auc_drop
+    )
+
+def shortest_prefix(ensemble, X, y, reference, config, policy):
+    '''Smallest number of leading trees whose scores stay within the allowed drops of `reference`.'''
+    # Margins of every prefix from one pass over the trees: column k-1 is the margin of the first k trees.
+    margins = ensemble.bias + np.cumsum(ensemble.tree_values(X), axis=1, dtype=np.float64)
+    for n_trees in range(1, ensemble.n_trees + 1):
+        proba = 1.0 / (1.0 + np.exp(-ensemble.sigmoid_scale * margins[:, n_trees - 1]))
+        if within(classification_scores(y, proba, policy), reference, config):
+            return n_trees
+    return ensemble.n_trees
+
+def single_row_latency_us(predict_proba, X, repeats):
+    timings = []
+    for i in range(repeats):
+        row = X[i % len(X)][None, :]
+        start = time.perf_counter()
+        predict_proba(row)
+        timings.append(time.perf_counter() - start)
+    return round(float(np.median(timings)) * 1e6, 1)
+
+def batch_rows_per_second(predict_proba, X, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        predict_proba(X)
+    return round(repeats * len(X) / (time.perf_counter() - start), 1)
+
+class ModelOptimizer:
+    '''Prunes and compiles the trained tree ensemble into a NumPy-only serving model.
+
+    The final XGBoost/LightGBM estimator is flattened into float32 node arrays
+    (`FlatTreeEnsemble`), trailing boosting rounds that do not move test F1/ROC-AUC
+    beyond the configured drops are trimmed, and trees with a single leaf value are
+    folded into the bias. The result must pass the F1/ROC-AUC parity check against
+    the original model before it is exported as a native "flat_trees" model
+    (`MODEL_SERVING_MODE=optimized`), with a size and latency report next to it.
+    '''
+    def __init__(self, config: ModelOptimizerConfig = None):
+        self.optimizer_config = config or ModelOptimizerConfig()
+
+    def manifest_path(self):
+        return os.path.join(self.optimizer_config.output_dir, MANIFEST_FILE_NAME)
+
+    def clear(self):
+        '''Removes the previous export, so a stale model is never served next to a new one.'''
+        if os.path.exists(self.manifest_path()):
+            os.remove(self.manifest_path())
+
+    def optimize(self, model, X_test, y_test, native_manifest_path=None, policy=None):
+        '''Returns the optimization report; the model is only exported when the report's status is "exported".
+
+        F1 parity is measured at serving's operating point: the labels of the decision
+        policy (calibration and threshold) fitted for `model`, or a 0.5 cutoff without one.
+        '''
+        try:
+            config = self.optimizer_config
+            decision_policy = DecisionPolicy(policy)
+            self.clear()
+            estimator = final_estimator(model)
+            estimator_name = getattr(estimator, 'estimator_name', None) or type(estimator).__name__
+            if estimator_name not in ("XGBClassifier", "LGBMClassifier"):
+                logging.info(f"No optimized export for {estimator_name}, only tree ensembles are pruned.")
+                return {"status": "skipped", "estimator": estimator_name}
+
+            X_test = np.asarray(X_test, dtype=np.float32)
+            original_proba = model.predict_proba(X_test)[:, 1]
+            reference = classification_scores(y_test, original_proba, decision_policy)
+
+            ensemble = flatten_estimator(estimator)
+            original_trees = ensemble.n_trees
+            n_trees = shortest_prefix(ensemble, X_test, y_test, reference, config, decision_policy) if config.trim_rounds else original_trees
+            ensemble = ensemble.select(range(n_trees))
+            constant = ensemble.constant_trees()
+            if constant and len(constant) < ensemble.n_trees:
+                folded = float(sum(ensemble.value[ensemble.roots[tree]] for tree in constant))
+                ensemble = ensemble.select([t for t in range(ensemble.n_trees) if t not in set(constant)], extra_bias=folded)
+
+            optimized_proba = ensemble.positive_proba(X_test)
+            scores = classification_scores(y_test, optimized_proba, decision_policy)
+            report = {
+                "estimator": estimator_name,
+                "original": {"trees": original_trees, **reference},
+                "optimized": {"trees": ensemble.n_trees, "nodes": ensemble.n_nodes, "depth": ensemble.depth, **scores},
+                "folded_constant_trees": len(constant),
+                "decision_threshold": decision_policy.threshold,
+                "calibrated": decision_policy.calibration_x is not None,
+                "label_agreement": float(np.mean(decision_policy.apply(optimized_proba)[1] == decision_policy.apply(original_proba)[1])),
+                "max_abs_probability_diff": float(np.max(np.abs(optimized_proba - original_proba))),
+            }
+            if not within(scores, reference, config):
+                report["status"] = "rejected"
+                logging.error(f"Optimized model failed the F1/ROC-AUC parity check, not exported: {report}")
+                return report
+
+            os.makedirs(config.output_dir, exist_ok=True)
+            model_path = os.path.join(config.output_dir, "model.npz")
+            ensemble.save(model_path)
+            manifest = {
+                "kind": "flat_trees",
+                "estimator": estimator_name,
+                "model_file": "model.npz",
+                "sha256": file_digest(model_path),
+                "classes": np.asarray(estimator.classes_).tolist(),
+            }
+            with open(self.manifest_path() + ".tmp", 'w') as manifest_file:
+                json.dump(manifest, manifest_file, indent=2)
+            os.replace(self.manifest_path() + ".tmp", self.manifest_path())
+
+            exported = load_native_model(self.manifest_path())
+            if not np.allclose(exported.predict_proba(X_test)[:, 1], optimized_proba, rtol=0, atol=1e-9):
+                raise ValueError("Exported flat-tree model does not reproduce the optimized ensemble")
+
+            report["size_bytes"] = {"pickled_estimator": len(pickle.dumps(estimator)), "optimized": os.path.getsize(model_path)}
+            candidates = {"sklearn": model, "optimized": exported}
+            if native_manifest_path is not None:
+                with open(native_manifest_path) as manifest_file:
+                    native_file = json.load(manifest_file)["model_file"]
+                report["size_bytes"]["native"] = os.path.getsize(os.path.join(os.path.dirname(native_manifest_path), native_file))
+                candidates["native"] = load_native_model(native_manifest_path)
+            batch = X_test[:config.latency_batch_rows]
+            report["single_row_latency_us"] = {
+                name: single_row_latency_us(candidate.predict_proba, X_test, config.latency_repeats * 4)
+                for name, candidate in candidates.items()
+            }
+            report["batch_rows_per_second"] = {
+                name: batch_rows_per_second(candidate.predict_proba, batch, config.latency_repeats)
+                for name, candidate in candidates.items()
+            }
+            report["status"] = "exported"
+            with open(os.path.join(config.output_dir, REPORT_FILE_NAME), 'w') as report_file:
+                json.dump(report, report_file, indent=2)
+            logging.info(f"Optimized model exported to {config.output_dir}: {report}")
+            return report
+        except Exception as e:
+            raise CustomException(e, sys)
+
+if __name__ == "__main__":
+    # Optimize an already trained model, e.g. `python -m src.components.model_optimizer artifacts/models/model.joblib`
+    from src.utils.common import load_object
+    from src.components.data_transformation import DataTransformation
+    default_model_path = os.path.join("artifacts", "models", "model.joblib")
+    model_path = sys.argv[1] if len(sys.argv) > 1 else default_model_path
+    # The native export belongs to the trained model; only compare against it for that model.
+    native_manifest = os.path.join("artifacts", "models", "native", MANIFEST_FILE_NAME)
+    if model_path != default_model_path or not os.path.exists(native_manifest):
+        native_manifest = None
+    _, _, X_test, y_test = DataTransformation().load_arrays()
+    # Likewise the decision policy was fitted for the trained model.
+    policy = None
+    if native_manifest is not None and os.path.exists(DecisionPolicyConfig.policy_path):
+        with open(DecisionPolicyConfig.policy_path) as policy_file:
+            policy = json.load(policy_file)
+    report = ModelOptimizer().optimize(load_object(model_path), X_test, y_test, native_manifest_path=native_manifest, policy=policy)
+    print(json.dumps(report, indent=2))
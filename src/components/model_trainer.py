@@ -1,5 +1,10 @@
 import os
 import sys
+import json
+import math
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 
 import mlflow # type: ignore
@@ -8,11 +13,31 @@ import mlflow.sklearn # type: ignore
 from src.logger import logging
 from src.exception import CustomException
 from src.utils.common import save_object
+from src.components.native_model import export_native_model, load_native_model, check_native_parity, MANIFEST_FILE_NAME
+from src.utils.array_cache import CachedSampler, estimator_fingerprint
+from src.utils.stage_state import code_digest, config_fingerprint, fingerprint
+from src.components.drift_monitor import numeric_reference, save_reference, DriftMonitorConfig, DRIFT_REFERENCE_FIELDS
+from src.components.model_optimizer import ModelOptimizer, ModelOptimizerConfig, OPTIMIZER_TRAINING_FIELDS
+from src.components.flat_trees import FlatTreeEnsemble
+from src.components.decision_policy import fit_policy, save_policy, select_threshold, DecisionPolicy, DecisionPolicyConfig, POLICY_TRAINING_FIELDS
+from src.components.external_memory import (train_xgboost, train_lightgbm, positive_proba_in_chunks, labels_in_chunks,
+                                            class_counts, validation_rows)
+from src.utils.cv_cluster import CVCluster, ClusterBackend
+from src.utils.tracking import SweepTracker, TrackingConfig
+
+import numpy as np # type: ignore
+import sklearn # type: ignore
+import xgboost # type: ignore
+import lightgbm # type: ignore
+import imblearn # type: ignore
+from joblib import parallel_config # type: ignore
 
 from imblearn.over_sampling import SMOTE # type: ignore
 from imblearn.pipeline import Pipeline # type: ignore
 from sklearn.linear_model import LogisticRegression # type: ignore
-from sklearn.model_selection import StratifiedKFold, GridSearchCV # type: ignore
+from sklearn.experimental import enable_halving_search_cv # type: ignore # noqa: F401
+from sklearn.model_selection import StratifiedKFold, GridSearchCV, HalvingRandomSearchCV, cross_val_predict # type: ignore
+from sklearn.base import clone # type: ignore
 from xgboost import XGBClassifier # type: ignore
 from lightgbm import LGBMClassifier # type: ignore
 from sklearn.metrics import f1_score # type: ignore
@@ -20,97 +45,420 @@ from sklearn.metrics import f1_score # type: ignore
 @dataclass
 class ModelTrainerConfig:
     trained_model_file_path = os.path.join("artifacts", "models", "model.joblib")
+    native_model_dir = os.path.join("artifacts", "models", "native")
+    # Distribution of the winning model's test-set probabilities, the drift monitor's prediction reference.
+    prediction_reference_file_path = DriftMonitorConfig.prediction_reference_path
+    # Calibration and decision threshold fitted on the best model's out-of-fold probabilities.
+    decision_policy_file_path = DecisionPolicyConfig.policy_path
+    # "grid" runs the full GridSearchCV sweeps; "halving" runs budgeted successive halving.
+    search_mode: str = os.getenv("TRAIN_SEARCH_MODE", "grid")
+    # Upper bound on CV fits per model in halving mode.
+    max_fits_per_model: int = int(os.getenv("TRAIN_MAX_FITS_PER_MODEL", "60"))
+    halving_factor: int = 3
+    # Cores are split between CV workers and booster threads so that cv_jobs * model_threads <= n_cores.
+    n_cores: int = int(os.getenv("TRAIN_N_CORES", str(os.cpu_count() or 1)))
+    model_threads: int = int(os.getenv("TRAIN_MODEL_THREADS", "1"))
+    parallel_models: bool = os.getenv("TRAIN_PARALLEL_MODELS", "0") == "1"
+    # Memoize SMOTE output per CV fold in the array cache instead of resampling for every candidate.
+    cache_resampling: bool = os.getenv("ARRAY_CACHE", "1") == "1"
+    # "local" runs CV fits in joblib processes on this machine; "cluster" sends them to the
+    # CV workers configured by CVClusterConfig (TRAIN_CV_WORKERS, or local worker processes).
+    cv_backend: str = os.getenv("TRAIN_CV_BACKEND", "local")
+    # Out-of-core mode (see DataIngestionConfig): the boosters are trained from external-memory
+    # data in blocks of this many rows, with fixed settings instead of the searches.
+    chunk_rows: int = int(os.getenv("TRAIN_CHUNK_ROWS", "0"))
+    # Out-of-core mode: share of the training rows held out to pick the model and fit the decision policy.
+    validation_share: float = 0.1
+    # Out-of-core mode: test rows the native export and the optimizer are checked on (their
+    # per-tree margins take rows x trees floats).
+    eval_rows: int = 20000
+    external_memory_dir = os.path.join("artifacts", "cache", "external_memory")
+
+def allocate_cores(n_cores, n_sweeps, model_threads):
+    '''Splits `n_cores` over concurrent sweeps, returning (cv_jobs, model_threads) per sweep.'''
+    per_sweep = max(1, n_cores // max(1, n_sweeps))
+    model_threads = max(1, min(model_threads, per_sweep))
+    return max(1, per_sweep // model_threads), model_threads
+
+def halving_candidates(max_fits, n_splits, factor):
+    '''Number of starting candidates whose successive-halving schedule stays within `max_fits` CV fits.'''
+    # Fits ~= n_candidates * n_splits * (1 + 1/f + 1/f^2 + ...) <= n_candidates * n_splits * f / (f - 1)
+    return max(factor, math.floor(max_fits * (factor - 1) / (factor * n_splits)))
 
 class ModelTrainer:
     def __init__(self):
         self.model_trainer_config = ModelTrainerConfig()
+        self.search_report = {}
+        self.optimization_report = {}
+        self.policy_report = {}
+        self.cv_cluster = None
+        self.tracking_config = TrackingConfig()
+        self.sweep_tracker = None
+
+    def stage_fingerprint(self, input_digests):
+        '''Fingerprint of this stage: training arrays, trainer, decision policy, optimizer and drift config, model grid and code version.'''
+        config = self.model_trainer_config
+        _, model_threads = allocate_cores(config.n_cores, 3 if config.parallel_models else 1, config.model_threads)
+        return fingerprint(
+            inputs=input_digests,
+            config=config_fingerprint(config),
+            decision_policy=config_fingerprint(DecisionPolicyConfig(), POLICY_TRAINING_FIELDS),
+            optimizer=config_fingerprint(ModelOptimizerConfig(), OPTIMIZER_TRAINING_FIELDS),
+            drift=config_fingerprint(DriftMonitorConfig(), DRIFT_REFERENCE_FIELDS),
+            models={name: estimator_fingerprint(model) for name, model in self.get_models(model_threads).items()},
+            params=json.dumps(self.get_params(), sort_keys=True, default=str),
+            code=code_digest(ModelTrainer, export_native_model, CachedSampler, save_object, numeric_reference,
+                             ModelOptimizer, FlatTreeEnsemble, fit_policy, select_threshold, train_xgboost),
+            libraries=[sklearn.__version__, xgboost.__version__, lightgbm.__version__, imblearn.__version__],
+        )
     
-    def initiate_model_trainer(self, train_array, test_array):
-        try:
-            logging.info('Splitting training and testing data.')
-            X_train, y_train, X_test, y_test = (
-                train_array[:, :-1],
-                train_array[:, -1],
-                test_array[:, :-1],
-                test_array[:, -1],
-            )
-            
-            models = {
-                "LogisticRegression": LogisticRegression(random_state=42, max_iter=1000),
-                "XGBClassifier": XGBClassifier(random_state=42, n_jobs=-1),
-                "LGBMClassifier": LGBMClassifier(random_state=42, n_jobs=-1, verbose=-1)
+    def output_paths(self):
+        '''Files written by a completed training run: the model, its native and (if any) optimized export.'''
+        config = self.model_trainer_config
+        manifest_path = os.path.join(config.native_model_dir, MANIFEST_FILE_NAME)
+        with open(manifest_path) as manifest_file:
+            native_file = json.load(manifest_file)["model_file"]
+        outputs = {
+            "model": config.trained_model_file_path,
+            "native_manifest": manifest_path,
+            "native_model": os.path.join(config.native_model_dir, native_file),
+            "prediction_reference": config.prediction_reference_file_path,
+            "decision_policy": config.decision_policy_file_path,
+        }
+        optimizer = ModelOptimizer()
+        if os.path.exists(optimizer.manifest_path()):
+            outputs["optimized_manifest"] = optimizer.manifest_path()
+            outputs["optimized_model"] = os.path.join(optimizer.optimizer_config.output_dir, "model.npz")
+        return outputs
+    
+    def get_models(self, model_threads):
+        return {
+            "LogisticRegression": LogisticRegression(random_state=42, max_iter=1000),
+            "XGBClassifier": XGBClassifier(random_state=42, n_jobs=model_threads),
+            "LGBMClassifier": LGBMClassifier(random_state=42, n_jobs=model_threads, verbose=-1)
+        }
+
+    def get_params(self):
+        params = {
+            'LogisticRegression': {
+                'model__C': [0.1, 1, 10],
+                'model__penalty': ['l2'],
+                'model__solver': ['lbfgs', 'liblinear']
+            },
+            'XGBClassifier': {
+                'model__learning_rate': [0.01, 0.1],
+                'model__n_estimators': [100, 200],
+                'model__max_depth': [3, 5, 7],
+                'model__subsample': [0.8, 1.0],
+                'model__scale_pos_weight': [1, 3]
+            },
+            'LGBMClassifier': {
+                'model__learning_rate': [0.01, 0.1],
+                'model__n_estimators': [100, 200],
+                'model__num_leaves': [31, 50],
+                'model__boosting_type': ['gbdt', 'dart'],
+                'model__class_weight': [None, 'balanced']
             }
-            
-            params = {
-                'LogisticRegression': {
-                    'model__C': [0.1, 1, 10],
-                    'model__penalty': ['l2'], 
-                    'model__solver': ['lbfgs', 'liblinear']
-                },
-                'XGBClassifier': {
-                    'model__learning_rate': [0.01, 0.1],
-                    'model__n_estimators': [100, 200],
-                    'model__max_depth': [3, 5, 7],
-                    'model__subsample': [0.8, 1.0], 
-                    'model__scale_pos_weight': [1, 3] 
-                },
-                'LGBMClassifier': {
-                    'model__learning_rate': [0.01, 0.1],
-                    'model__n_estimators': [100, 200],
-                    'model__num_leaves': [31, 50], 
-                    'model__boosting_type': ['gbdt', 'dart'],
-                    'model__class_weight': [None, 'balanced'] 
+        }
+        if self.model_trainer_config.search_mode == "halving":
+            # Candidates are sampled, so the space can be wider; dart is dropped because it is
+            # several times slower than gbdt and never needed for this problem size.
+            params['LogisticRegression']['model__C'] = [0.01, 0.03, 0.1, 0.3, 1, 3, 10, 30]
+            params['XGBClassifier']['model__learning_rate'] = [0.01, 0.03, 0.05, 0.1, 0.2]
+            params['XGBClassifier']['model__max_depth'] = [3, 4, 5, 6, 7]
+            params['LGBMClassifier']['model__learning_rate'] = [0.01, 0.03, 0.05, 0.1, 0.2]
+            params['LGBMClassifier']['model__num_leaves'] = [15, 31, 50, 80]
+            params['LGBMClassifier']['model__boosting_type'] = ['gbdt']
+        return params
+
+    def get_external_memory_params(self, negatives, positives):
+        '''Fixed booster settings of out-of-core training, from the middle of the search grids.
+
+        Class weights stand in for SMOTE, which needs the whole training set in memory.
+        '''
+        return {
+            "XGBClassifier": {"learning_rate": 0.1, "n_estimators": 200, "max_depth": 5, "subsample": 0.8,
+                              "scale_pos_weight": negatives / max(positives, 1), "random_state": 42},
+            "LGBMClassifier": {"learning_rate": 0.1, "n_estimators": 200, "num_leaves": 31, "boosting_type": "gbdt",
+                               "is_unbalance": True, "random_state": 42},
+        }
+
+    def build_search(self, pipeline, param, cv, n_jobs):
+        config = self.model_trainer_config
+        if config.search_mode == "halving":
+            return HalvingRandomSearchCV(
+                estimator=pipeline,
+                param_distributions=param,
+                n_candidates=halving_candidates(config.max_fits_per_model, cv.get_n_splits(), config.halving_factor),
+                factor=config.halving_factor,
+                # Start from the largest subsample that still ends on the full training set;
+                # tiny first rounds leave SMOTE without enough minority neighbours.
+                min_resources='exhaust',
+                scoring='f1',
+                cv=cv,
+                n_jobs=n_jobs,
+                random_state=42,
+                verbose=1
+            )
+        if config.search_mode != "grid":
+            raise ValueError(f"Unknown search mode: {config.search_mode}")
+        return GridSearchCV(
+            estimator=pipeline,
+            param_grid=param,
+            scoring='f1',
+            cv=cv,
+            n_jobs=n_jobs,
+            verbose=2
+        )
+
+    def run_search(self, model_name, model, param, X_train, y_train, cv, n_jobs):
+        sampler = SMOTE(random_state=42)
+        if self.model_trainer_config.cache_resampling:
+            sampler = CachedSampler(sampler)
+        pipeline = Pipeline(steps=[
+            ('smote', sampler),
+            ('model', model)
+        ])
+        gs = self.build_search(pipeline, param, cv, n_jobs)
+        start = time.perf_counter()
+        with self.cv_context():
+            gs.fit(X_train, y_train)
+        seconds = time.perf_counter() - start
+
+        n_fits = int(len(gs.cv_results_['params']) * cv.get_n_splits())
+        logging.info(f"{model_name} best f1 score: {gs.best_score_} ({n_fits} fits in {seconds:.1f}s)")
+        report = {
+            "best_score": float(gs.best_score_),
+            "best_params": gs.best_params_,
+            "seconds": round(seconds, 2),
+            "n_fits": n_fits,
+        }
+        if self.sweep_tracker is not None:
+            self.sweep_tracker.log_sweep(model_name, gs.cv_results_, report)
+        return gs, report
+
+    def cv_context(self):
+        '''joblib backend of the CV fits: the default local one, or the CV cluster's.
+
+        Entered around each search, since joblib's backend setting is per thread.
+        '''
+        if self.cv_cluster is None:
+            return nullcontext()
+        return parallel_config(backend=ClusterBackend(self.cv_cluster))
+
+    def run_searches(self, models, params, X_train, y_train, cv, cv_jobs):
+        '''Runs one search per model, concurrently when `parallel_models` is set.'''
+        if self.model_trainer_config.parallel_models:
+            with ThreadPoolExecutor(max_workers=len(models)) as executor:
+                futures = {
+                    model_name: executor.submit(
+                        self.run_search, model_name, model, params[model_name], X_train, y_train, cv, cv_jobs
+                    )
+                    for model_name, model in models.items()
                 }
+                return {model_name: future.result() for model_name, future in futures.items()}
+        return {
+            model_name: self.run_search(model_name, model, params[model_name], X_train, y_train, cv, cv_jobs)
+            for model_name, model in models.items()
+        }
+
+    def fit_decision_policy(self, best_model, X_train, y_train, X_test, y_test, cv, n_jobs):
+        '''Fits calibration and threshold on out-of-fold probabilities of the best configuration.
+
+        The folds are the search's folds, so with ARRAY_CACHE the SMOTE output is reused.
+        Test-set F1 at the default 0.5 cutoff and at the tuned threshold is recorded with it.
+        '''
+        logging.info("Computing out-of-fold probabilities for the decision policy.")
+        with self.cv_context():
+            oof = cross_val_predict(clone(best_model), X_train, y_train, cv=cv, method="predict_proba", n_jobs=n_jobs)[:, 1]
+        policy = fit_policy(oof, y_train)
+        calibrated_test = DecisionPolicy(policy).calibrate(best_model.predict_proba(X_test)[:, 1])
+        policy["test"] = {
+            "f1_at_0.5": float(f1_score(y_test, best_model.predict(X_test))),
+            "f1_at_threshold": float(f1_score(y_test, (calibrated_test >= policy["threshold"]).astype(int))),
+        }
+        save_policy(policy, self.model_trainer_config.decision_policy_file_path)
+        return policy, calibrated_test
+
+    def save_best_model(self, best_model, X_eval):
+        '''Saves the best model and its native export (checked against it on `X_eval`); returns the manifest path.'''
+        save_object(
+            file_path=self.model_trainer_config.trained_model_file_path,
+            obj=best_model
+        )
+
+        logging.info("Exporting best model in its native format.")
+        manifest_path = export_native_model(best_model, self.model_trainer_config.native_model_dir)
+        check_native_parity(load_native_model(manifest_path), best_model, X_eval)
+        return manifest_path
+
+    def save_serving_artifacts(self, best_model, policy, calibrated_test, manifest_path, X_eval, y_eval):
+        '''Policy report, prediction drift reference and the optimized export of the best model.'''
+        self.policy_report = {"threshold": policy["threshold"], "objective": policy["objective"], **policy["test"]}
+        # Serving feeds calibrated probabilities to the drift monitor, so the reference is calibrated too.
+        save_reference(
+            numeric_reference(calibrated_test, DriftMonitorConfig.n_bins),
+            self.model_trainer_config.prediction_reference_file_path
+        )
+        optimizer = ModelOptimizer()
+        if optimizer.optimizer_config.enabled:
+            logging.info("Pruning and compiling the best model for serving.")
+            self.optimization_report = optimizer.optimize(best_model, X_eval, y_eval, native_manifest_path=manifest_path, policy=policy)
+        else:
+            optimizer.clear()
+
+    def train_out_of_core(self, X_train, y_train, X_test, y_test):
+        '''Out-of-core training on the memory-mapped arrays of a chunked transformation.
+
+        Every 1/validation_share-th training row is held out. Each booster is trained once
+        on the other rows, read in blocks of `chunk_rows` (XGBoost from external-memory
+        pages, LightGBM from a row sequence), since a search would repeat those passes for
+        every candidate and fold, and kept as a native booster (NativeModel) rather than
+        rebuilt into an sklearn estimator. The best held-out F1 wins, and the decision policy is
+        fitted on its held-out probabilities. Besides one block, memory holds a label per
+        training row (LightGBM) and a probability per held-out and test row.
+        '''
+        config = self.model_trainer_config
+        every = max(2, round(1 / config.validation_share))
+        holdout = lambda start, stop: validation_rows(start, stop, every)
+        negatives, positives = class_counts(y_train, config.chunk_rows, every)
+        y_valid = labels_in_chunks(y_train, config.chunk_rows, holdout)
+        logging.info(f"Out-of-core training on {negatives + positives} rows in blocks of {config.chunk_rows}, "
+                     f"{len(y_valid)} held out, {config.n_cores} booster thread(s).")
+
+        model_report, best_estimators, valid_proba = {}, {}, {}
+        for model_name, params in self.get_external_memory_params(negatives, positives).items():
+            start = time.perf_counter()
+            if model_name == "XGBClassifier":
+                model = train_xgboost(X_train, y_train, params, config.chunk_rows, every, config.external_memory_dir, config.n_cores)
+            else:
+                model = train_lightgbm(X_train, y_train, params, config.chunk_rows, every, config.n_cores)
+            valid_proba[model_name] = positive_proba_in_chunks(model, X_train, config.chunk_rows, holdout)
+            model_report[model_name] = float(f1_score(y_valid, valid_proba[model_name] > 0.5))
+            best_estimators[model_name] = model
+            self.search_report[model_name] = {
+                "best_score": model_report[model_name],
+                "best_params": params,
+                "seconds": round(time.perf_counter() - start, 2),
+                "n_fits": 1,
             }
+            logging.info(f"{model_name} held-out f1 score: {model_report[model_name]} ({self.search_report[model_name]['seconds']}s)")
+
+        best_model_name = max(model_report, key=model_report.get)
+        best_model = best_estimators[best_model_name]
+        policy = fit_policy(valid_proba[best_model_name], y_valid)
+        test_proba = positive_proba_in_chunks(best_model, X_test, config.chunk_rows)
+        calibrated_test = DecisionPolicy(policy).calibrate(test_proba)
+        y_test_all = labels_in_chunks(y_test, config.chunk_rows)
+        policy["test"] = {
+            "f1_at_0.5": float(f1_score(y_test_all, (test_proba > 0.5).astype(int))),
+            "f1_at_threshold": float(f1_score(y_test_all, (calibrated_test >= policy["threshold"]).astype(int))),
+        }
+        save_policy(policy, config.decision_policy_file_path)
+        return best_model_name, best_model, model_report, policy, calibrated_test
+
+    def initiate_out_of_core_trainer(self, X_train, y_train, X_test, y_test):
+        config = self.model_trainer_config
+        tracking = self.tracking_config
+        if tracking.mode not in ("batched", "autolog", "off"):
+            raise ValueError(f"Unknown tracking mode: {tracking.mode}")
+        if tracking.mode != "off":
             mlflow.set_experiment("Credit_Risk_Model_Training")
-            mlflow.sklearn.autolog(log_models=False)
+        parent_run = mlflow.start_run(run_name="Parent_Training_Run") if tracking.mode != "off" else nullcontext()
+        # The export checks and the optimizer's F1/AUC parity run on the first test rows.
+        X_eval = np.asarray(X_test[:config.eval_rows])
+        y_eval = np.asarray(y_test[:config.eval_rows])
+        with parent_run:
+            best_model_name, best_model, model_report, policy, calibrated_test = self.train_out_of_core(X_train, y_train, X_test, y_test)
+            manifest_path = self.save_best_model(best_model, X_eval)
+            if tracking.mode != "off":
+                mlflow.log_metrics({f"{name}_heldout_f1_score": score for name, score in model_report.items()})
+                mlflow.log_metric("best_f1_score", model_report[best_model_name])
+                mlflow.log_params({"best_model": best_model_name, "training_mode": "out_of_core", "chunk_rows": config.chunk_rows})
+                # The best model is a native booster, not an sklearn estimator: log its native export.
+                mlflow.log_artifacts(config.native_model_dir, artifact_path="best_model")
+
+        self.save_serving_artifacts(best_model, policy, calibrated_test, manifest_path, X_eval, y_eval)
+        logging.info(f"Out-of-core report: {self.search_report}")
+        logging.info("Model training completed successfully.")
+        return model_report[best_model_name]
+
+    def initiate_model_trainer(self, X_train, y_train, X_test, y_test):
+        try:
+            config = self.model_trainer_config
+            if config.chunk_rows > 0:
+                return self.initiate_out_of_core_trainer(X_train, y_train, X_test, y_test)
+            n_sweeps = 3 if config.parallel_models else 1
+            cv_jobs, model_threads = allocate_cores(config.n_cores, n_sweeps, config.model_threads)
+            if config.cv_backend == "cluster":
+                self.cv_cluster = CVCluster.start()
+                cv_jobs = self.cv_cluster.n_workers
+            elif config.cv_backend != "local":
+                raise ValueError(f"Unknown CV backend: {config.cv_backend}")
+            logging.info(f"CV backend: {config.cv_backend}, search mode: {config.search_mode}, {n_sweeps} concurrent sweep(s), "
+                         f"{cv_jobs} CV worker(s) x {model_threads} booster thread(s) each.")
+
+            models = self.get_models(model_threads)
+            params = self.get_params()
+
+            tracking = self.tracking_config
+            if tracking.mode not in ("batched", "autolog", "off"):
+                raise ValueError(f"Unknown tracking mode: {tracking.mode}")
+            if tracking.mode != "off":
+                mlflow.set_experiment("Credit_Risk_Model_Training")
+                # Autolog tracks the active run per thread, so concurrent sweeps log summaries explicitly instead.
+                mlflow.sklearn.autolog(log_models=False, disable=tracking.mode != "autolog" or config.parallel_models)
             logging.info('Starting model training and hyperparameter tuning.')
-            
+
             model_report = {}
             best_estimators = {}
             skf = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
-            
-            with mlflow.start_run(run_name="Parent_Training_Run"):
-                for model_name in models.keys():
-                    model = models.get(model_name, 'Model not found')
-                    param = params.get(model_name, 'No parameters found')
-                    
-                    pipeline = Pipeline(steps=[
-                        ('smote', SMOTE(random_state=42)),
-                        ('model', model)
-                    ])
-                    gs = GridSearchCV(
-                        estimator=pipeline,
-                        param_grid=param,
-                        scoring='f1',
-                        cv=skf,
-                        n_jobs=-1,
-                        verbose=2
-                    )
-                    gs.fit(X_train, y_train)
+
+            parent_run = mlflow.start_run(run_name="Parent_Training_Run") if tracking.mode != "off" else nullcontext()
+            with parent_run as run:
+                if tracking.mode == "batched":
+                    self.sweep_tracker = SweepTracker(run.info.run_id, tracking)
+                elif tracking.mode == "autolog" and config.parallel_models:
+                    self.sweep_tracker = SweepTracker(run.info.run_id, TrackingConfig(mode="autolog", detail="summary", background=False))
+                results = self.run_searches(models, params, X_train, y_train, skf, cv_jobs)
+
+                for model_name, (gs, report) in results.items():
                     model_report[model_name] = gs.best_score_
                     best_estimators[model_name] = gs.best_estimator_
-                    
-                    logging.info(f"{model_name} best f1 score: {gs.best_score_}")
-                    
+                    self.search_report[model_name] = report
+
                 best_model_name = max(model_report, key=model_report.get)
                 best_model = best_estimators[best_model_name]
-            
-                mlflow.sklearn.log_model(
-                    sk_model=best_model,
-                    artifact_path="best_model",
-                    registered_model_name="CreditCardDefaultModel"
-                )
-                mlflow.log_metric("best_f1_score", model_report[best_model_name])
-                mlflow.log_param("best_model", best_model_name)
-            
-            save_object(
-                file_path=self.model_trainer_config.trained_model_file_path,
-                obj=best_model
-            )
+
+                if tracking.mode != "off":
+                    mlflow.sklearn.log_model(
+                        sk_model=best_model,
+                        artifact_path="best_model",
+                        registered_model_name="CreditCardDefaultModel"
+                    )
+                run_params = {"best_model": best_model_name, "search_mode": config.search_mode, "cv_backend": config.cv_backend}
+                if self.sweep_tracker is not None:
+                    self.sweep_tracker.log(metrics={"best_f1_score": model_report[best_model_name]}, params=run_params)
+                    logging.info(f"MLflow tracking ({tracking.mode}, {self.sweep_tracker.config.detail}): {self.sweep_tracker.close()}")
+                    self.sweep_tracker = None
+                elif tracking.mode == "autolog":
+                    mlflow.log_metric("best_f1_score", model_report[best_model_name])
+                    mlflow.log_params(run_params)
+
+            manifest_path = self.save_best_model(best_model, X_test)
+            policy, calibrated_test = self.fit_decision_policy(best_model, X_train, y_train, X_test, y_test, skf, cv_jobs)
+            self.save_serving_artifacts(best_model, policy, calibrated_test, manifest_path, X_test, y_test)
+            logging.info(f"Search report: {self.search_report}")
             logging.info("Model training completed successfully.")
-            
+
             return model_report[best_model_name]
-                
+
         except Exception as e:
-            raise CustomException(e, sys)
\ No newline at end of file
+            raise CustomException(e, sys)
+        finally:
+            if self.sweep_tracker is not None:
+                self.sweep_tracker.close()
+                self.sweep_tracker = None
+            if self.cv_cluster is not None:
+                self.cv_cluster.close()
+                self.cv_cluster = None
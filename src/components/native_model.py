@@ -0,0 +1,182 @@
+import sys
+import os
+import json
+import numpy as np # type: ignore
+from src.exception import CustomException
+from src.logger import logging
+from src.utils.common import file_digest
+from src.components.flat_trees import FlatTreeEnsemble
+
+MANIFEST_FILE_NAME = "manifest.json"
+
+def final_estimator(model):
+    '''Returns the last step of a fitted (imblearn/sklearn) Pipeline, or the model itself.'''
+    return model.steps[-1][1] if hasattr(model, 'steps') else model
+
+class NativeXGBoostModel:
+    '''XGBoost Booster scored with `inplace_predict`, without DMatrix or the sklearn wrapper.
+
+    Loaded from `model_path`, or wraps an already trained `booster`.
+    '''
+    def __init__(self, model_path, classes, n_threads=1, booster=None):
+        import xgboost as xgb # type: ignore
+        if booster is None:
+            booster = xgb.Booster()
+            booster.load_model(model_path)
+        self.booster = booster
+        self.set_threads(n_threads)
+        self.classes_ = np.asarray(classes)
+
+    def set_threads(self, n_threads):
+        self.booster.set_param({"nthread": n_threads})
+
+    def positive_proba(self, X):
+        return self.booster.inplace_predict(X)
+
+    def save(self, model_path):
+        self.booster.save_model(model_path)
+
+class NativeLightGBMModel:
+    '''LightGBM Booster loaded from its text model file, or wrapping an already trained `booster`.'''
+    def __init__(self, model_path, classes, n_threads=1, booster=None):
+        import lightgbm as lgb # type: ignore
+        self.booster = booster if booster is not None else lgb.Booster(model_file=model_path)
+        self.set_threads(n_threads)
+        self.classes_ = np.asarray(classes)
+
+    def set_threads(self, n_threads):
+        self.n_threads = n_threads
+
+    def positive_proba(self, X):
+        return self.booster.predict(X, num_threads=self.n_threads)
+
+    def save(self, model_path):
+        self.booster.save_model(model_path)
+
+class NativeLinearModel:
+    '''Logistic regression reduced to its raw coefficients.'''
+    def __init__(self, model_path, classes, n_threads=1):
+        with np.load(model_path) as params:
+            self.coef = params["coef"].astype(np.float64).ravel()
+            self.intercept = float(params["intercept"].ravel()[0])
+        self.classes_ = np.asarray(classes)
+
+    def positive_proba(self, X):
+        return 1.0 / (1.0 + np.exp(-(X @ self.coef + self.intercept)))
+
+class NativeFlatTreeModel:
+    '''Pruned float32 tree ensemble written by ModelOptimizer, scored with NumPy only.'''
+    def __init__(self, model_path, classes, n_threads=1):
+        self.ensemble = FlatTreeEnsemble.load(model_path)
+        self.classes_ = np.asarray(classes)
+
+    def positive_proba(self, X):
+        return self.ensemble.positive_proba(X)
+
+NATIVE_MODEL_FILES = {"xgboost": "model.ubj", "lightgbm": "model.txt"}
+
+NATIVE_MODEL_KINDS = {
+    "xgboost": NativeXGBoostModel,
+    "lightgbm": NativeLightGBMModel,
+    "linear": NativeLinearModel,
+    "flat_trees": NativeFlatTreeModel,
+}
+
+class NativeModel:
+    '''sklearn-like facade (`predict_proba`, `predict`, `classes_`) over a native booster.'''
+    def __init__(self, kind, impl, estimator_name=None):
+        self.kind = kind
+        self.impl = impl
+        self.estimator_name = estimator_name
+        self.classes_ = impl.classes_
+
+    def predict_proba(self, X):
+        positive = np.asarray(self.impl.positive_proba(X), dtype=np.float64).ravel()
+        proba = np.empty((positive.shape[0], 2), dtype=np.float64)
+        proba[:, 1] = positive
+        proba[:, 0] = 1.0 - positive
+        return proba
+
+    def predict(self, X):
+        return self.classes_[(self.impl.positive_proba(X) > 0.5).astype(np.intp)]
+
+    def set_threads(self, n_threads):
+        if hasattr(self.impl, 'set_threads'):
+            self.impl.set_threads(n_threads)
+
+def export_native_model(model, output_dir):
+    '''Writes the final estimator of `model` in its native format and returns the manifest path.
+
+    XGBoost -> Booster UBJ, LightGBM -> model text file, LogisticRegression -> coefficients (.npz).
+    A NativeModel wrapping a trained booster (out-of-core training) is written as its booster.
+    '''
+    try:
+        estimator = final_estimator(model)
+        estimator_name = getattr(estimator, 'estimator_name', None) or type(estimator).__name__
+        if len(estimator.classes_) != 2:
+            raise ValueError(f"Native export supports binary classifiers, got {len(estimator.classes_)} classes")
+        os.makedirs(output_dir, exist_ok=True)
+
+        if isinstance(estimator, NativeModel) and hasattr(estimator.impl, 'save'):
+            kind, model_file = estimator.kind, NATIVE_MODEL_FILES[estimator.kind]
+            estimator.impl.save(os.path.join(output_dir, model_file))
+        elif estimator_name == "XGBClassifier":
+            kind, model_file = "xgboost", NATIVE_MODEL_FILES["xgboost"]
+            estimator.get_booster().save_model(os.path.join(output_dir, model_file))
+        elif estimator_name == "LGBMClassifier":
+            kind, model_file = "lightgbm", NATIVE_MODEL_FILES["lightgbm"]
+            estimator.booster_.save_model(os.path.join(output_dir, model_file))
+        elif estimator_name == "LogisticRegression":
+            kind, model_file = "linear", "model.npz"
+            np.savez(os.path.join(output_dir, model_file), coef=estimator.coef_, intercept=estimator.intercept_)
+        else:
+            raise ValueError(f"No native export for {estimator_name}")
+
+        manifest = {
+            "kind": kind,
+            "estimator": estimator_name,
+            "model_file": model_file,
+            "sha256": file_digest(os.path.join(output_dir, model_file)),
+            "classes": np.asarray(estimator.classes_).tolist(),
+        }
+        manifest_path = os.path.join(output_dir, MANIFEST_FILE_NAME)
+        # Written aside and renamed: the model registry reloads when the manifest changes.
+        with open(manifest_path + ".tmp", 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        os.replace(manifest_path + ".tmp", manifest_path)
+        logging.info(f"Native {kind} model exported to: {output_dir}")
+        return manifest_path
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def load_native_model(manifest_path, n_threads=1):
+    '''Loads the native model described by an export manifest.'''
+    try:
+        with open(manifest_path, 'r') as manifest_file:
+            manifest = json.load(manifest_file)
+        model_path = os.path.join(os.path.dirname(manifest_path), manifest["model_file"])
+        impl = NATIVE_MODEL_KINDS[manifest["kind"]](model_path, manifest["classes"], n_threads=n_threads)
+        logging.info(f"Native {manifest['kind']} model loaded from: {model_path}")
+        return NativeModel(manifest["kind"], impl, estimator_name=manifest.get("estimator"))
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def check_native_parity(native_model, model, X, atol=1e-6):
+    '''Raises if the native model's probabilities differ from the fitted model's.'''
+    try:
+        expected = model.predict_proba(X)[:, 1]
+        actual = native_model.predict_proba(X)[:, 1]
+        max_error = float(np.max(np.abs(expected - actual))) if len(X) else 0.0
+        if max_error > atol:
+            raise ValueError(f"Native model differs from the fitted model (max abs error {max_error})")
+        logging.info(f"Native model parity check passed (max abs error {max_error:.2e}).")
+        return max_error
+    except Exception as e:
+        raise CustomException(e, sys)
+
+if __name__ == "__main__":
+    # Export an already trained model, e.g. `python -m src.components.native_model artifacts/models/model.joblib`
+    from src.utils.common import load_object
+    model_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join("artifacts", "models", "model.joblib")
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.join("artifacts", "models", "native")
+    print(export_native_model(load_object(model_path), output_dir))
@@ -0,0 +1,256 @@
+import sys
+import numpy as np # type: ignore
+from src.exception import CustomException
+from src.logger import logging
+from src.components.drift_monitor import MISSING
+
+class QuantileSketch:
+    '''Weighted summary of a numeric stream for medians and quantiles in bounded memory.
+
+    Keeps the distinct values seen and their counts, so quantiles are exact (NumPy's
+    linear interpolation) while a column has at most `capacity` distinct values; ages,
+    amounts and rates rounded to cents stay far below that. Past it, neighbouring values
+    are merged into weighted centroids of equal rank width, bounding the rank error of
+    a quantile by about 2 / capacity.
+    '''
+    def __init__(self, capacity=100_000):
+        self.capacity = capacity
+        self.values = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.count = 0
+        self.exact = True
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return
+        chunk_values, chunk_counts = np.unique(values, return_counts=True)
+        merged, inverse = np.unique(np.concatenate([self.values, chunk_values]), return_inverse=True)
+        self.weights = np.bincount(inverse, weights=np.concatenate([self.weights, chunk_counts]), minlength=len(merged))
+        self.values = merged
+        self.count += int(values.size)
+        if len(self.values) > self.capacity:
+            self._compress()
+
+    def _compress(self):
+        cumulative = np.cumsum(self.weights)
+        # Half the capacity, so the sketch is not compressed again on every update.
+        group = np.floor((cumulative - self.weights) / cumulative[-1] * (self.capacity // 2)).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, np.diff(group) != 0])
+        weights = np.add.reduceat(self.weights, starts)
+        self.values = np.add.reduceat(self.values * self.weights, starts) / weights
+        self.weights = weights
+        self.exact = False
+
+    def quantile(self, q):
+        '''Quantile(s) of the values seen, with the interpolation of `np.quantile`.'''
+        q = np.asarray(q, dtype=np.float64)
+        if self.count == 0:
+            return np.full(q.shape, np.nan)
+        position = q * (self.count - 1)
+        lower, upper = np.floor(position), np.ceil(position)
+        cumulative = np.cumsum(self.weights)
+        at_rank = lambda rank: self.values[np.minimum(np.searchsorted(cumulative, rank, side='right'), len(self.values) - 1)]
+        return at_rank(lower) * (upper - position + (upper == lower)) + at_rank(upper) * (position - lower)
+
+    def mode(self):
+        '''Most frequent value, the smallest one on ties (as SimpleImputer's most_frequent).'''
+        return float(self.values[np.argmax(self.weights)]) if self.count else np.nan
+
+class RunningMoments:
+    '''Count, mean and sum of squared deviations of a stream (Chan et al. pairwise update).'''
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.merge(values.size, float(values.mean()) if values.size else 0.0, float(((values - values.mean()) ** 2).sum()) if values.size else 0.0)
+
+    def merge(self, count, mean, m2):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+class StreamingPreprocessorStats:
+    '''Statistics of the training features accumulated chunk by chunk for the repo's ColumnTransformer.
+
+    The unfitted transformer definition says which columns are imputed with the mean,
+    median or most frequent value and which are one-hot encoded. `update` accumulates,
+    per numeric column, running moments, a quantile sketch and the missing count, and per
+    categorical column the value counts. `fitted_preprocessor` then returns the same
+    transformer with its fitted state (imputer statistics, category vocabularies, scaler
+    means/variances) set from those statistics, as if it had been fitted on all rows
+    at once. A second pass (`count_reference`) gives the drift monitor's reference
+    histograms on the quantile edges.
+    '''
+    def __init__(self, preprocessor, sketch_capacity=100_000, n_bins=10):
+        self.preprocessor = preprocessor
+        self.n_bins = n_bins
+        self.rows = 0
+        self.columns = None
+        self.numeric = {}
+        self.categorical = {}
+        for _, transformer, columns in preprocessor.transformers:
+            steps = dict(transformer.steps)
+            target = self.categorical if 'one_hot_encoder' in steps else self.numeric
+            for column in columns:
+                target[column] = {"missing": 0}
+        for column, stats in self.numeric.items():
+            stats.update(moments=RunningMoments(), sketch=QuantileSketch(sketch_capacity))
+        for column, stats in self.categorical.items():
+            stats.update(counts={})
+        self._edges = None
+        self._reference_counts = None
+
+    def update(self, features_df):
+        '''Accumulates one chunk of raw training features.'''
+        if self.columns is None:
+            self.columns = list(features_df.columns)
+        self.rows += len(features_df)
+        for column, stats in self.numeric.items():
+            values = features_df[column].to_numpy(dtype=np.float64)
+            stats["missing"] += int(np.isnan(values).sum())
+            stats["moments"].update(values)
+            stats["sketch"].update(values)
+        for column, stats in self.categorical.items():
+            series = features_df[column]
+            stats["missing"] += int(series.isna().sum())
+            for value, count in series.value_counts(sort=False).items():
+                if count:
+                    stats["counts"][value] = stats["counts"].get(value, 0) + int(count)
+
+    def _numeric_fill(self, strategy, stats, fill_value=None):
+        if strategy == "mean":
+            return stats["moments"].mean
+        if strategy == "median":
+            return float(stats["sketch"].quantile(0.5))
+        if strategy == "most_frequent":
+            return stats["sketch"].mode()
+        return fill_value
+
+    def _category_fill(self, counts):
+        top = max(counts.values())
+        return min(value for value, count in counts.items() if count == top)
+
+    def _seed_frame(self):
+        '''Small frame holding every category seen, to fit the transformer's structure on.'''
+        import pandas as pd # type: ignore
+        n_rows = max([2] + [len(stats["counts"]) for stats in self.categorical.values()])
+        frame = {}
+        for column in self.columns:
+            if column in self.categorical:
+                categories = sorted(self.categorical[column]["counts"])
+                frame[column] = pd.Categorical([categories[i % len(categories)] for i in range(n_rows)], categories=categories)
+            else:
+                frame[column] = np.arange(n_rows, dtype=np.float64)
+        return pd.DataFrame(frame, columns=self.columns)
+
+    def fitted_preprocessor(self):
+        '''A clone of the transformer definition whose fitted state comes from the accumulated statistics.'''
+        try:
+            from sklearn.base import clone # type: ignore
+            preprocessor = clone(self.preprocessor).fit(self._seed_frame())
+            for name, transformer, columns in preprocessor.transformers_:
+                if transformer == 'drop' or transformer == 'passthrough':
+                    continue
+                steps = dict(transformer.steps)
+                imputer, encoder, scaler = steps.get('imputer'), steps.get('one_hot_encoder'), steps.get('scaler')
+                if encoder is None:
+                    fills, means, variances = [], [], []
+                    for column in columns:
+                        stats = self.numeric[column]
+                        moments = stats["moments"]
+                        fill = self._numeric_fill(imputer.strategy, stats, imputer.fill_value) if imputer is not None else np.nan
+                        # Moments of the imputed column: the observed values plus `missing` copies of the fill value.
+                        imputed = RunningMoments()
+                        imputed.merge(moments.count, moments.mean, moments.m2)
+                        imputed.merge(stats["missing"], fill, 0.0)
+                        fills.append(fill)
+                        means.append(imputed.mean)
+                        variances.append(imputed.m2 / max(imputed.count, 1))
+                    if imputer is not None:
+                        imputer.statistics_ = np.asarray(fills, dtype=np.float64)
+                    if scaler is not None:
+                        self._set_scaler(scaler, np.asarray(means), np.asarray(variances))
+                    continue
+
+                fills, one_hot_means = [], []
+                for k, column in enumerate(columns):
+                    stats = self.categorical[column]
+                    counts = dict(stats["counts"])
+                    fill = self._category_fill(counts)
+                    counts[fill] += stats["missing"]
+                    categories = encoder.categories_[k].tolist()
+                    if categories != sorted(counts):
+                        raise ValueError(f"Category vocabulary mismatch in {column}")
+                    drop = encoder.drop_idx_[k] if encoder.drop_idx_ is not None else None
+                    fills.append(fill)
+                    one_hot_means.extend(counts[category] / self.rows for i, category in enumerate(categories) if i != drop)
+                if imputer is not None:
+                    imputer.statistics_ = np.asarray(fills, dtype=object)
+                if scaler is not None:
+                    p = np.asarray(one_hot_means, dtype=np.float64)
+                    self._set_scaler(scaler, p, p * (1.0 - p))
+            logging.info(f"Preprocessor statistics fitted incrementally on {self.rows} rows.")
+            return preprocessor
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _set_scaler(self, scaler, means, variances):
+        if scaler.mean_ is not None:
+            scaler.mean_ = means
+        if scaler.var_ is not None:
+            scaler.var_ = variances
+        if scaler.scale_ is not None:
+            scale = np.sqrt(variances)
+            # StandardScaler leaves constant columns unscaled.
+            scaler.scale_ = np.where(scale < 10 * np.finfo(np.float64).eps, 1.0, scale)
+        scaler.n_samples_seen_ = self.rows
+
+    def count_reference(self, features_df):
+        '''Second pass: counts the rows of one chunk in the drift reference's numeric bins.'''
+        if self._edges is None:
+            self._edges = {
+                column: np.unique(stats["sketch"].quantile(np.linspace(0, 1, self.n_bins + 1)[1:-1]))
+                if stats["sketch"].count else np.array([])
+                for column, stats in self.numeric.items()
+            }
+            self._reference_counts = {column: np.zeros(len(edges) + 2) for column, edges in self._edges.items()}
+        for column, edges in self._edges.items():
+            values = features_df[column].to_numpy(dtype=np.float64)
+            present = values[~np.isnan(values)]
+            counts = self._reference_counts[column]
+            counts[:-1] += np.bincount(np.searchsorted(edges, present, side='right'), minlength=len(edges) + 1)
+            counts[-1] += len(values) - present.size
+
+    def feature_reference(self):
+        '''Drift reference in the format of `build_feature_reference`, from the accumulated counts.'''
+        reference = {}
+        for column in self.columns:
+            if column in self.numeric:
+                reference[column] = {
+                    "type": "numeric",
+                    "edges": self._edges[column].tolist(),
+                    "proportions": (self._reference_counts[column] / max(self.rows, 1)).tolist(),
+                }
+                continue
+            stats = self.categorical[column]
+            counts = {}
+            for value, count in stats["counts"].items():
+                counts[str(value)] = counts.get(str(value), 0) + count
+            categories = sorted(counts)
+            proportions = [counts[category] for category in categories] + [0, stats["missing"]]
+            reference[column] = {
+                "type": "categorical",
+                "categories": [category for category in categories if category != MISSING],
+                "proportions": (np.asarray(proportions, dtype=np.float64) / max(self.rows, 1)).tolist(),
+            }
+        return {"rows": self.rows, "features": reference}
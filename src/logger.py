@@ -5,15 +5,24 @@ from datetime import datetime
 LOG_FILE = f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.log"
 
 logs_path = os.path.join(os.getcwd(), "logs")
-os.makedirs(logs_path, exist_ok=True)
 
 LOG_FILE_PATH = os.path.join(logs_path, LOG_FILE)
 
+class DeferredFileHandler(logging.FileHandler):
+    '''Creates the logs directory and the log file on the first record, not at import,
+    so processes that never log (tooling, idle workers) leave no empty files behind.'''
+    def __init__(self, filename):
+        super().__init__(filename, delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
 logging.basicConfig(
-    filename=LOG_FILE_PATH,
+    handlers=[DeferredFileHandler(LOG_FILE_PATH)],
     level=logging.INFO,
     format='[%(asctime)s] %(lineno)d %(name)s - %(levelname)s - %(message)s',
 )
 
 if __name__ == "__main__":
-    logging.info("Logging has started.")
\ No newline at end of file
+    logging.info("Logging has started.")
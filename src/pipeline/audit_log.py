@@ -0,0 +1,190 @@
+import os
+import json
+import time
+import uuid
+import queue
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from src.logger import logging
+from src.utils.metrics import AUDIT_LOG_QUEUE_DEPTH, AUDIT_LOG_WRITTEN, AUDIT_LOG_DROPPED, AUDIT_LOG_FLUSH_SECONDS
+
+AUDIT_NUMERIC_FIELDS = (
+    "person_age", "person_income", "person_emp_length", "loan_amnt", "loan_int_rate",
+    "loan_percent_income", "cb_person_cred_hist_length",
+)
+AUDIT_CATEGORICAL_FIELDS = ("person_home_ownership", "loan_intent", "loan_grade", "cb_person_default_on_file")
+
+@dataclass
+class AuditLogConfig:
+    '''Structured log of every scored application, written off the request path.'''
+    enabled: bool = os.getenv("AUDIT_LOG", "1") == "1"
+    directory: str = os.getenv("AUDIT_LOG_DIR", os.path.join("logs", "predictions"))
+    # "jsonl" or "parquet" (a Parquet file is readable once it has been rotated or closed).
+    file_format: str = os.getenv("AUDIT_LOG_FORMAT", "jsonl")
+    max_queue: int = int(os.getenv("AUDIT_LOG_MAX_QUEUE", "100000"))
+    batch_size: int = int(os.getenv("AUDIT_LOG_BATCH_SIZE", "2000"))
+    flush_interval: float = float(os.getenv("AUDIT_LOG_FLUSH_SECONDS", "1"))
+    rotate_bytes: int = int(os.getenv("AUDIT_LOG_ROTATE_MB", "64")) * 1024 * 1024
+    rotate_seconds: float = float(os.getenv("AUDIT_LOG_ROTATE_SECONDS", "3600"))
+    # How long a blocking submit (from a worker thread) waits in total for queue space before dropping.
+    block_seconds: float = float(os.getenv("AUDIT_LOG_BLOCK_SECONDS", "0.05"))
+
+def _parquet_schema():
+    import pyarrow as pa # type: ignore
+    return pa.schema(
+        [("request_id", pa.string()), ("timestamp", pa.float64()), ("source", pa.string()),
+         ("model", pa.string()), ("version", pa.string()), ("latency_ms", pa.float64()),
+         ("probability", pa.float64()), ("label", pa.int64()), ("decision", pa.string())]
+        + [(field, pa.float64()) for field in AUDIT_NUMERIC_FIELDS]
+        + [(field, pa.string()) for field in AUDIT_CATEGORICAL_FIELDS]
+    )
+
+class RotatingWriter:
+    '''Appends batches of records to size/age-rotated JSONL or Parquet files, one series per process.'''
+    def __init__(self, config: AuditLogConfig):
+        self.config = config
+        self._file = None
+        self._path = None
+        self._opened_at = 0.0
+        self._sequence = 0
+        self._schema = _parquet_schema() if config.file_format == "parquet" else None
+
+    def _open(self):
+        os.makedirs(self.config.directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        self._sequence += 1
+        self._path = os.path.join(
+            self.config.directory, f"predictions-{stamp}-{os.getpid()}-{self._sequence:04d}.{self.config.file_format}"
+        )
+        if self._schema is not None:
+            import pyarrow.parquet as pq # type: ignore
+            self._file = pq.ParquetWriter(self._path, self._schema)
+        else:
+            self._file = open(self._path, 'a', encoding='utf-8')
+        self._opened_at = time.monotonic()
+
+    def _should_rotate(self):
+        return (
+            time.monotonic() - self._opened_at >= self.config.rotate_seconds
+            or os.path.getsize(self._path) >= self.config.rotate_bytes
+        )
+
+    def write(self, records):
+        if self._file is not None and self._should_rotate():
+            self.close()
+        if self._file is None:
+            self._open()
+        if self._schema is not None:
+            import pyarrow as pa # type: ignore
+            self._file.write_table(pa.Table.from_pylist(records, schema=self._schema))
+        else:
+            self._file.write("".join(json.dumps(record) + "\n" for record in records))
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class AuditLog:
+    '''Bounded queue of prediction records drained by one background writer thread.
+
+    `submit` only builds small dicts and enqueues them. When the queue is full the
+    records are dropped and counted (async callers never wait; threadpool callers
+    wait up to `block_seconds` per call), so a slow disk cannot stall scoring.
+    '''
+    def __init__(self, config: AuditLogConfig = None):
+        self.audit_config = config or AuditLogConfig()
+        self._queue = queue.Queue(maxsize=self.audit_config.max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if not self.audit_config.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        '''Writes out everything still queued and closes the current file.'''
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, records, probabilities, labels, version, model, latency_seconds, source, decisions=None, block=False):
+        if self._thread is None:
+            return
+        if decisions is None:
+            decisions = [None] * len(records)
+        timestamp = time.time()
+        latency_ms = latency_seconds * 1000
+        # One deadline for the whole call, so a large batch waits at most block_seconds in total.
+        deadline = time.monotonic() + self.audit_config.block_seconds if block else None
+        dropped = 0
+        for record, probability, label, decision in zip(records, probabilities, labels, decisions):
+            entry = {
+                "request_id": uuid.uuid4().hex,
+                "timestamp": timestamp,
+                "source": source,
+                "model": model,
+                "version": version,
+                "latency_ms": latency_ms,
+                "probability": float(probability),
+                "label": int(label),
+                "decision": decision,
+            }
+            for field in AUDIT_NUMERIC_FIELDS:
+                value = record.get(field)
+                entry[field] = None if value is None else float(value)
+            for field in AUDIT_CATEGORICAL_FIELDS:
+                entry[field] = record.get(field)
+            try:
+                remaining = deadline - time.monotonic() if block else 0
+                if remaining > 0:
+                    self._queue.put(entry, timeout=remaining)
+                else:
+                    self._queue.put_nowait(entry)
+            except queue.Full:
+                dropped += 1
+        if dropped:
+            AUDIT_LOG_DROPPED.labels("queue_full").inc(dropped)
+        AUDIT_LOG_QUEUE_DEPTH.set(self._queue.qsize())
+
+    def _drain(self, first):
+        batch = [first]
+        while len(batch) < self.audit_config.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        writer = RotatingWriter(self.audit_config)
+        try:
+            while True:
+                try:
+                    first = self._queue.get(timeout=self.audit_config.flush_interval)
+                except queue.Empty:
+                    if self._stop.is_set():
+                        break
+                    continue
+                batch = self._drain(first)
+                start = time.perf_counter()
+                try:
+                    writer.write(batch)
+                    AUDIT_LOG_WRITTEN.inc(len(batch))
+                except Exception as e:
+                    AUDIT_LOG_DROPPED.labels("write_error").inc(len(batch))
+                    logging.error(f"Writing {len(batch)} audit records failed: {str(e)}")
+                    writer.close()
+                AUDIT_LOG_FLUSH_SECONDS.observe(time.perf_counter() - start)
+                AUDIT_LOG_QUEUE_DEPTH.set(self._queue.qsize())
+        finally:
+            writer.close()
+
+audit_log = AuditLog()
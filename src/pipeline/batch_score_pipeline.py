@@ -0,0 +1,101 @@
+import sys
+import time
+import resource
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List
+import pandas as pd # type: ignore
+from src.exception import CustomException
+from src.logger import logging
+from src.pipeline.predict_pipeline import PredictPipeline, FEATURE_COLUMNS
+from src.pipeline.model_registry import model_registry
+from src.utils.common import iter_frames, FrameWriter
+
+@dataclass
+class BatchScoreConfig:
+    '''Configuration for streaming a large application file through the saved model.'''
+    input_path: str
+    output_path: str
+    chunk_size: int = 50000
+    workers: int = 1
+    keep_columns: List[str] = field(default_factory=list)
+
+def score_chunk(chunk, keep_columns=()):
+    '''Scores one chunk and returns the kept input columns plus probability, prediction and decision.'''
+    probabilities, labels, decisions, _ = PredictPipeline().predict_batch(chunk[FEATURE_COLUMNS])
+    scored = chunk[list(keep_columns)].reset_index(drop=True) if keep_columns else pd.DataFrame(index=range(len(chunk)))
+    scored["probability"] = probabilities
+    scored["prediction"] = labels
+    scored["decision"] = decisions
+    return scored
+
+def _init_worker():
+    # Forked workers inherit the parent's loaded registry; spawned ones load their own.
+    model_registry.get()
+
+def peak_rss_mb():
+    '''Peak resident set size of this process and of its (finished) children, in MB.'''
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return own, children
+
+class BatchScorePipeline:
+    def __init__(self, config: BatchScoreConfig):
+        self.score_config = config
+
+    def _score_sequential(self, chunks, writer):
+        rows = 0
+        for chunk in chunks:
+            writer.write(score_chunk(chunk, self.score_config.keep_columns))
+            rows += len(chunk)
+        return rows
+
+    def _score_parallel(self, chunks, writer):
+        # At most 2 chunks per worker in flight keeps memory bounded; results are written in input order.
+        rows = 0
+        max_in_flight = self.score_config.workers * 2
+        in_flight = deque()
+        with ProcessPoolExecutor(max_workers=self.score_config.workers, initializer=_init_worker) as pool:
+            for chunk in chunks:
+                in_flight.append(pool.submit(score_chunk, chunk, self.score_config.keep_columns))
+                if len(in_flight) >= max_in_flight:
+                    scored = in_flight.popleft().result()
+                    writer.write(scored)
+                    rows += len(scored)
+            while in_flight:
+                scored = in_flight.popleft().result()
+                writer.write(scored)
+                rows += len(scored)
+        return rows
+
+    def run_pipeline(self):
+        try:
+            config = self.score_config
+            logging.info(f"Batch scoring {config.input_path} -> {config.output_path} "
+                         f"(chunk size {config.chunk_size}, workers {config.workers}).")
+            model_registry.load()
+
+            start = time.perf_counter()
+            chunks = iter_frames(config.input_path, config.chunk_size)
+            with FrameWriter(config.output_path) as writer:
+                if config.workers > 1:
+                    rows = self._score_parallel(chunks, writer)
+                else:
+                    rows = self._score_sequential(chunks, writer)
+            elapsed = time.perf_counter() - start
+
+            own_rss, worker_rss = peak_rss_mb()
+            report = {
+                "rows": rows,
+                "seconds": round(elapsed, 3),
+                "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else None,
+                "peak_rss_mb": round(own_rss, 1),
+                "peak_worker_rss_mb": round(worker_rss, 1),
+                "version": model_registry.status().get("version"),
+            }
+            logging.info(f"Batch scoring completed: {report}")
+            return report
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,126 @@
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from src.logger import logging
+from src.pipeline.predict_pipeline import PredictPipeline
+from src.utils.metrics import MICRO_BATCH_QUEUE_DEPTH, MICRO_BATCH_SIZE, MICRO_BATCH_WAIT_SECONDS
+
+@dataclass
+class MicroBatcherConfig:
+    '''Coalescing window: a batch closes after `max_wait_ms` or `max_batch_size` records.'''
+    max_wait_ms: float = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "5"))
+    max_batch_size: int = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+    workers: int = int(os.getenv("MICRO_BATCH_WORKERS", "1"))
+
+class MicroBatcher:
+    '''Coalesces concurrent single-record predictions into vectorized batches.
+
+    Callers await `submit`; collector tasks drain the queue, score each batch with
+    one `PredictPipeline.predict_records` call in a worker thread, and resolve the
+    waiting futures. The event loop never runs the model itself.
+    '''
+    def __init__(self, predict_pipeline: PredictPipeline = None, config: MicroBatcherConfig = None):
+        self.predict_pipeline = predict_pipeline or PredictPipeline()
+        self.batcher_config = config or MicroBatcherConfig()
+        self._queue = None
+        self._tasks = []
+        self._executor = None
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.batcher_config.workers, thread_name_prefix="micro-batcher"
+        )
+        self._tasks = [
+            asyncio.create_task(self._collect()) for _ in range(self.batcher_config.workers)
+        ]
+        logging.info(f"Micro-batcher started with {self.batcher_config}.")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        pending = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        self._fail(pending, RuntimeError("Micro-batcher stopped"))
+        MICRO_BATCH_QUEUE_DEPTH.set(0)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def submit(self, record):
+        '''Queues one application dict and returns its (probability, label, decision, version) once scored.'''
+        if not self._tasks:
+            raise RuntimeError("Micro-batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((record, future, time.perf_counter()))
+        MICRO_BATCH_QUEUE_DEPTH.set(self._queue.qsize())
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        max_wait = self.batcher_config.max_wait_ms / 1000
+        max_size = self.batcher_config.max_batch_size
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                deadline = loop.time() + max_wait
+                while len(batch) < max_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    # asyncio.wait rather than wait_for: wait_for can swallow a cancellation
+                    # that races with the get completing, which would hang stop().
+                    getter = asyncio.ensure_future(self._queue.get())
+                    try:
+                        done, _ = await asyncio.wait({getter}, timeout=timeout)
+                    finally:
+                        if not getter.done():
+                            getter.cancel()
+                    if not done:
+                        break
+                    batch.append(getter.result())
+                MICRO_BATCH_QUEUE_DEPTH.set(self._queue.qsize())
+                await self._score(loop, batch)
+            except asyncio.CancelledError:
+                self._fail(batch, RuntimeError("Micro-batcher stopped"))
+                raise
+
+    def _fail(self, batch, error):
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _score(self, loop, batch):
+        batch = [item for item in batch if not item[1].done()]
+        if not batch:
+            return
+        now = time.perf_counter()
+        for _, _, queued_at in batch:
+            MICRO_BATCH_WAIT_SECONDS.observe(now - queued_at)
+        MICRO_BATCH_SIZE.observe(len(batch))
+
+        try:
+            records = [record for record, _, _ in batch]
+            probabilities, labels, decisions, version = await loop.run_in_executor(
+                self._executor, self._predict, records
+            )
+        except Exception as e:
+            self._fail(batch, e)
+            return
+
+        for i, (_, future, _) in enumerate(batch):
+            if not future.done():
+                future.set_result((float(probabilities[i]), int(labels[i]), decisions[i], version))
+
+    def _predict(self, records):
+        return self.predict_pipeline.predict_records(records)
@@ -0,0 +1,285 @@
+import sys
+import os
+import time
+import hashlib
+import threading
+from dataclasses import dataclass, replace
+from src.exception import CustomException
+from src.logger import logging
+from src.utils.common import load_object, file_digest
+from src.components.fast_preprocessor import compile_preprocessor
+from src.components.native_model import load_native_model, final_estimator, MANIFEST_FILE_NAME
+from src.components.decision_policy import DecisionPolicy, DecisionPolicyConfig
+
+@dataclass
+class ModelRegistryConfig:
+    '''Configuration for the serving artifacts and how often they are checked for changes.'''
+    preprocessor_path: str = os.path.join("artifacts", "models", "preprocessor.joblib")
+    model_path: str = os.path.join("artifacts", "models", "model.joblib")
+    fast_preprocessor_path: str = os.path.join("artifacts", "models", "fast_preprocessor.joblib")
+    native_manifest_path: str = os.path.join("artifacts", "models", "native", MANIFEST_FILE_NAME)
+    optimized_manifest_path: str = os.path.join("artifacts", "models", "optimized", MANIFEST_FILE_NAME)
+    # Calibration and threshold learned with the model; optional for models trained before it existed.
+    decision_policy_path: str = DecisionPolicyConfig.policy_path
+    # "sklearn" serves model.joblib; "native" serves the booster exported by ModelTrainer;
+    # "optimized" serves the pruned flat-tree ensemble written by ModelOptimizer (NumPy only).
+    serving_mode: str = os.getenv("MODEL_SERVING_MODE", "sklearn")
+    # Booster threads per serving process (native boosters and sklearn-API XGBoost/LightGBM);
+    # gunicorn.conf.py divides the cores between workers. NATIVE_MODEL_THREADS is the old name.
+    model_threads: int = int(os.getenv("MODEL_THREADS", os.getenv("NATIVE_MODEL_THREADS", "1")))
+    # Memory-map the NumPy arrays inside the joblib artifacts, so worker processes share them.
+    mmap_artifacts: bool = os.getenv("MODEL_MMAP", "1") == "1"
+    use_fast_preprocessor: bool = os.getenv("FAST_PREPROCESSOR", "1") == "1"
+    # With a valid exported fast preprocessor, unpickle the sklearn one (and import sklearn for it)
+    # only when a DataFrame path first needs it.
+    lazy_preprocessor: bool = os.getenv("LAZY_PREPROCESSOR", "1") == "1"
+    # Score a dummy application on every new snapshot before it is served.
+    warmup: bool = os.getenv("MODEL_WARMUP", "1") == "1"
+    reload_check_interval: float = float(os.getenv("MODEL_RELOAD_CHECK_INTERVAL", "5"))
+
+@dataclass(frozen=True)
+class LoadedArtifacts:
+    '''Immutable snapshot of the preprocessor and model that are served together.'''
+    preprocessor: object
+    model: object
+    version: str
+    loaded_at: float
+    load_time_seconds: float
+    fast_preprocessor: object = None
+    model_name: str = ""
+    warmup_seconds: float = 0.0
+    policy: object = None
+
+class LazyArtifact:
+    '''Stands in for a joblib artifact and loads it on first attribute access.'''
+    def __init__(self, file_path, mmap_mode=None):
+        self._file_path = file_path
+        self._mmap_mode = mmap_mode
+        self._obj = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._obj is not None
+
+    def get(self):
+        if self._obj is None:
+            with self._lock:
+                if self._obj is None:
+                    self._obj = load_object(self._file_path, mmap_mode=self._mmap_mode)
+        return self._obj
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+def model_name(model):
+    '''Returns the estimator class name, looking through a fitted Pipeline.'''
+    return getattr(model, 'estimator_name', None) or type(final_estimator(model)).__name__
+
+def set_model_threads(model, n_threads):
+    '''Caps the threads a fitted sklearn-API booster (XGBoost/LightGBM `n_jobs`) or a native booster predicts with.'''
+    estimator = final_estimator(model)
+    if hasattr(estimator, 'get_params') and 'n_jobs' in estimator.get_params(deep=False):
+        estimator.set_params(n_jobs=n_threads)
+    elif hasattr(estimator, 'set_threads'):
+        estimator.set_threads(n_threads)
+    return model
+
+def file_signature(file_path, optional=False):
+    '''Returns a cheap (mtime, size) signature used to detect changed files.'''
+    if optional and not os.path.exists(file_path):
+        return None
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+class ModelRegistry:
+    '''Process-wide holder of the serving artifacts.
+
+    Artifacts are loaded once and shared by every request. On access the files'
+    mtime/size are checked at most every `reload_check_interval` seconds; when they
+    change and the content hash differs, a new snapshot is loaded and swapped in.
+    Requests already holding the previous snapshot finish with it.
+    '''
+    def __init__(self, config: ModelRegistryConfig = None):
+        self.registry_config = config or ModelRegistryConfig()
+        self._lock = threading.Lock()
+        self._artifacts = None
+        self._signatures = None
+        self._last_check = 0.0
+        self._warmup = None
+
+    def set_warmup(self, warmup):
+        '''Registers `warmup(artifacts)`, run on each newly loaded snapshot before it replaces the active one.'''
+        self._warmup = warmup
+
+    def _model_file(self):
+        # In native/optimized mode the manifest carries the model file's sha256, so it versions the model.
+        if self.registry_config.serving_mode == "native":
+            return self.registry_config.native_manifest_path
+        if self.registry_config.serving_mode == "optimized":
+            return self.registry_config.optimized_manifest_path
+        return self.registry_config.model_path
+
+    def _mmap_mode(self):
+        return 'r' if self.registry_config.mmap_artifacts else None
+
+    def _load_model(self):
+        if self.registry_config.serving_mode in ("native", "optimized"):
+            return load_native_model(self._model_file(), n_threads=self.registry_config.model_threads)
+        model = load_object(self.registry_config.model_path, mmap_mode=self._mmap_mode())
+        return set_model_threads(model, self.registry_config.model_threads)
+
+    def _signature(self):
+        return (
+            file_signature(self.registry_config.preprocessor_path),
+            file_signature(self._model_file()),
+            file_signature(self.registry_config.decision_policy_path, optional=True),
+        )
+
+    def _digests(self):
+        return (
+            file_digest(self.registry_config.preprocessor_path),
+            file_digest(self._model_file()),
+        )
+
+    def _load_exported_fast_preprocessor(self, preprocessor_digest):
+        '''Returns the exported compiled preprocessor if it was compiled from the current preprocessor.'''
+        if not self.registry_config.use_fast_preprocessor:
+            return None
+        try:
+            path = self.registry_config.fast_preprocessor_path
+            if os.path.exists(path):
+                compiled = load_object(path, mmap_mode=self._mmap_mode())
+                if compiled.source_digest == preprocessor_digest:
+                    return compiled
+                logging.info("Exported fast preprocessor does not match the preprocessor, recompiling.")
+        except Exception as e:
+            logging.error(f"Exported fast preprocessor unreadable: {str(e)}")
+        return None
+
+    def _compile_fast_preprocessor(self, preprocessor, preprocessor_digest):
+        '''Compiles the preprocessor when no usable exported one exists.'''
+        if not self.registry_config.use_fast_preprocessor:
+            return None
+        try:
+            return compile_preprocessor(preprocessor, source_digest=preprocessor_digest)
+        except Exception as e:
+            logging.error(f"Fast preprocessor unavailable, serving through sklearn: {str(e)}")
+            return None
+
+    def load(self):
+        '''Loads the artifacts from disk and makes them the active snapshot.'''
+        try:
+            with self._lock:
+                return self._load_locked()
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _load_locked(self):
+        start = time.perf_counter()
+        signatures = self._signature()
+        preprocessor_digest, model_digest = self._digests()
+        version_source = preprocessor_digest + model_digest
+        if os.path.exists(self.registry_config.decision_policy_path):
+            # Labels depend on the learned threshold, so it versions the predictions too.
+            version_source += file_digest(self.registry_config.decision_policy_path)
+        version = hashlib.sha256(version_source.encode()).hexdigest()[:12]
+
+        if self._artifacts is not None and self._artifacts.version == version:
+            logging.info(f"Artifacts unchanged (version {version}), keeping loaded model.")
+            self._signatures = signatures
+            return self._artifacts
+
+        logging.info(f"Loading serving artifacts version {version}.")
+        model = self._load_model()
+        fast_preprocessor = self._load_exported_fast_preprocessor(preprocessor_digest)
+        if fast_preprocessor is not None and self.registry_config.lazy_preprocessor:
+            preprocessor = LazyArtifact(self.registry_config.preprocessor_path, mmap_mode=self._mmap_mode())
+        else:
+            preprocessor = load_object(self.registry_config.preprocessor_path, mmap_mode=self._mmap_mode())
+            if fast_preprocessor is None:
+                fast_preprocessor = self._compile_fast_preprocessor(preprocessor, preprocessor_digest)
+
+        artifacts = LoadedArtifacts(
+            preprocessor=preprocessor,
+            model=model,
+            version=version,
+            loaded_at=time.time(),
+            load_time_seconds=time.perf_counter() - start,
+            fast_preprocessor=fast_preprocessor,
+            model_name=model_name(model),
+            policy=DecisionPolicy.load(self.registry_config.decision_policy_path),
+        )
+        if self._warmup is not None and self.registry_config.warmup:
+            warmup_start = time.perf_counter()
+            self._warmup(artifacts)
+            artifacts = replace(artifacts, warmup_seconds=time.perf_counter() - warmup_start)
+        self._artifacts = artifacts
+        self._signatures = signatures
+        self._last_check = time.monotonic()
+        logging.info(
+            f"Artifacts version {version} loaded in {artifacts.load_time_seconds:.3f}s, "
+            f"warmed up in {artifacts.warmup_seconds:.3f}s."
+        )
+        return self._artifacts
+
+    def get(self):
+        '''Returns the active snapshot, reloading it first if the files changed on disk.'''
+        artifacts = self._artifacts
+        if artifacts is None:
+            return self.load()
+
+        now = time.monotonic()
+        if now - self._last_check < self.registry_config.reload_check_interval:
+            return artifacts
+
+        try:
+            with self._lock:
+                if now - self._last_check < self.registry_config.reload_check_interval:
+                    return self._artifacts
+                self._last_check = now
+                if self._signature() != self._signatures:
+                    return self._load_locked()
+                return self._artifacts
+        except Exception as e:
+            # A half-written artifact must not take serving down; keep the last good snapshot.
+            logging.error(f"Reloading artifacts failed, keeping version {artifacts.version}: {str(e)}")
+            return artifacts
+
+    def set_threads(self, n_threads):
+        '''Booster threads of the active snapshot and of the snapshots loaded after it.'''
+        with self._lock:
+            self.registry_config.model_threads = n_threads
+            if self._artifacts is not None:
+                set_model_threads(self._artifacts.model, n_threads)
+
+    def metric_labels(self):
+        '''(model, version) of the active snapshot, used to label the inference metrics.'''
+        artifacts = self._artifacts
+        if artifacts is None:
+            return "none", "none"
+        return artifacts.model_name, artifacts.version
+
+    def status(self):
+        '''Returns a JSON-serializable summary of the active snapshot.'''
+        artifacts = self._artifacts
+        if artifacts is None:
+            return {"loaded": False}
+        return {
+            "loaded": True,
+            "version": artifacts.version,
+            "model": artifacts.model_name,
+            "serving_mode": self.registry_config.serving_mode,
+            "loaded_at": artifacts.loaded_at,
+            "load_time_seconds": round(artifacts.load_time_seconds, 6),
+            "warmup_seconds": round(artifacts.warmup_seconds, 6),
+            "sklearn_preprocessor_loaded": not isinstance(artifacts.preprocessor, LazyArtifact) or artifacts.preprocessor.loaded,
+            "fast_preprocessor": artifacts.fast_preprocessor is not None,
+            "model_threads": self.registry_config.model_threads,
+            "decision_policy": artifacts.policy.describe(),
+            "pid": os.getpid(),
+            "preprocessor_path": self.registry_config.preprocessor_path,
+            "model_path": self._model_file(),
+        }
+
+model_registry = ModelRegistry()
@@ -1,31 +1,128 @@
 import sys
-import pandas as pd # type: ignore
+import numpy as np # type: ignore
 from src.exception import CustomException
-from src.logger import logging
-from src.utils.common import load_object
+from src.pipeline.model_registry import ModelRegistry, model_registry
+from src.pipeline.prediction_cache import PredictionCache, prediction_cache
+from src.components.drift_monitor import DriftMonitor, drift_monitor
+from src.utils.metrics import observe_stage
+
+FEATURE_COLUMNS = [
+    "person_age", "person_income", "person_home_ownership", "person_emp_length",
+    "loan_intent", "loan_grade", "loan_amnt", "loan_int_rate",
+    "cb_person_default_on_file", "loan_percent_income", "cb_person_cred_hist_length",
+]
+
+# A typical application, scored when a model is loaded so the first real request does not pay
+# for lazy initialisation in the preprocessor and booster.
+WARMUP_RECORD = {
+    "person_age": 28, "person_income": 55000.0, "person_home_ownership": "RENT", "person_emp_length": 4.0,
+    "loan_intent": "EDUCATION", "loan_grade": "B", "loan_amnt": 9000.0, "loan_int_rate": 11.0,
+    "cb_person_default_on_file": "N", "loan_percent_income": 0.16, "cb_person_cred_hist_length": 5.0,
+}
+
+def records_to_data_frame(records):
+    '''Builds one columnar DataFrame from a sequence of application objects or dicts.'''
+    try:
+        # pandas is only needed when the compiled preprocessor is unavailable.
+        import pandas as pd # type: ignore
+        if records and isinstance(records[0], dict):
+            columns = {col: [record[col] for record in records] for col in FEATURE_COLUMNS}
+        else:
+            columns = {col: [getattr(record, col) for record in records] for col in FEATURE_COLUMNS}
+        return pd.DataFrame(columns, columns=FEATURE_COLUMNS)
+    except Exception as e:
+        raise CustomException(e, sys)
 
 class PredictPipeline:
-    def __init__(self):
-        pass
+    def __init__(self, registry: ModelRegistry = None, cache: PredictionCache = None, monitor: DriftMonitor = None):
+        self.registry = registry or model_registry
+        self.cache = cache or prediction_cache
+        self.monitor = monitor or drift_monitor
     
     def predict(self, features):
+        '''Labels of a feature frame under the decision policy (learned threshold and grade cutoffs).'''
         try:
-            logging.info("Loading preprocessor and model for prediction.")
-            preprocessor_path = "artifacts/models/preprocessor.joblib"
-            model_path = "artifacts/models/model.joblib"
-            
-            preprocessor = load_object(preprocessor_path)
-            model = load_object(model_path)
-            
-            logging.info("Transforming input features using the preprocessor.")
-            data_scaled = preprocessor.transform(features)
-            
-            logging.info("Making predictions using the trained model.")
-            preds = model.predict(data_scaled)
-            
+            artifacts = self.registry.get()
+            _, preds, _ = self._score(
+                artifacts, self._transform(artifacts, artifacts.preprocessor.transform, features), features["loan_grade"].tolist()
+            )
             return preds
         except Exception as e:
             raise CustomException(e, sys)
+    
+    def _transform(self, artifacts, transform, features):
+        with observe_stage("preprocess", artifacts.model_name, artifacts.version, rows=len(features)):
+            return transform(features)
+    
+    def _score(self, artifacts, data_scaled, grades):
+        '''Calibrated positive-class probabilities and policy labels for a transformed batch.'''
+        with observe_stage("predict", artifacts.model_name, artifacts.version, rows=len(data_scaled)):
+            proba = artifacts.model.predict_proba(data_scaled)
+        probabilities, labels = artifacts.policy.apply(proba[:, 1], grades)
+        return probabilities, labels, artifacts.version
+    
+    def predict_batch(self, features):
+        '''Scores a whole frame in one transform/predict_proba/policy pass.
+
+        Returns the calibrated probabilities, the labels, the decision bands and the artifact version.
+        '''
+        try:
+            artifacts = self.registry.get()
+            data_scaled = self._transform(artifacts, artifacts.preprocessor.transform, features)
+            probabilities, labels, version = self._score(artifacts, data_scaled, features["loan_grade"].tolist())
+            return probabilities, labels, artifacts.policy.decisions(probabilities), version
+        except Exception as e:
+            raise CustomException(e, sys)
+    
+    def _score_records(self, artifacts, records):
+        if artifacts.fast_preprocessor is not None:
+            data_scaled = self._transform(artifacts, artifacts.fast_preprocessor.transform, records)
+        else:
+            data_scaled = self._transform(artifacts, artifacts.preprocessor.transform, records_to_data_frame(records))
+        return self._score(artifacts, data_scaled, [record.get("loan_grade") for record in records])
+    
+    def warmup(self, artifacts, batch_size=32):
+        '''Scores WARMUP_RECORD alone and as a small batch against a snapshot that is not served yet.
+
+        Runs outside the metrics, cache, drift monitor and audit log, so it leaves no trace
+        in what production traffic is measured against; the drift reference is only loaded.
+        '''
+        if artifacts.fast_preprocessor is not None:
+            transform = artifacts.fast_preprocessor.transform
+        else:
+            transform = lambda records: artifacts.preprocessor.transform(records_to_data_frame(records))
+        for n in (1, batch_size):
+            artifacts.model.predict_proba(transform([WARMUP_RECORD] * n))
+        self.monitor.prepare(artifacts.version)
+
+    def predict_records(self, records):
+        '''Scores a list of application dicts, through the compiled preprocessor when available.
+
+        Returns the calibrated probabilities, the labels, the decision bands and the
+        artifact version. With the prediction cache enabled, only applications not seen
+        with the active model version are transformed and scored; labels of cached
+        probabilities come from the active policy. Every scored batch, cached or not,
+        feeds the drift monitor.
+        '''
+        try:
+            artifacts = self.registry.get()
+            if not self.cache.enabled:
+                probabilities, labels, version = self._score_records(artifacts, records)
+                self.monitor.update(records, probabilities, version)
+                return probabilities, labels, artifacts.policy.decisions(probabilities), version
+            
+            keys, cached = self.cache.get_many(records, artifacts.version)
+            missing = [i for i, value in enumerate(cached) if value is None]
+            probabilities = np.array([np.nan if value is None else value for value in cached], dtype=np.float64)
+            if missing:
+                scored_probabilities, _, _ = self._score_records(artifacts, [records[i] for i in missing])
+                probabilities[missing] = scored_probabilities
+                self.cache.put_many([keys[i] for i in missing], scored_probabilities.tolist(), artifacts.version)
+            labels = artifacts.policy.labels(probabilities, [record.get("loan_grade") for record in records])
+            self.monitor.update(records, probabilities, artifacts.version)
+            return probabilities, labels, artifacts.policy.decisions(probabilities), artifacts.version
+        except Exception as e:
+            raise CustomException(e, sys)
 
 class CustomData:
     '''Mapping input features for prediction.'''
@@ -45,8 +142,12 @@ class CustomData:
         self.loan_percent_income = loan_percent_income
         self.cb_person_cred_hist_length = cb_person_cred_hist_length
     
+    def get_data_as_dict(self):
+        return {col: getattr(self, col) for col in FEATURE_COLUMNS}
+    
     def get_data_as_data_frame(self):
         try:
+            import pandas as pd # type: ignore
             custom_data_input_dict = {
                 "person_age": [self.person_age],
                 "person_income": [self.person_income],
@@ -61,7 +162,6 @@ class CustomData:
                 "cb_person_cred_hist_length": [self.cb_person_cred_hist_length]
             }
             
-            logging.info("Converting input data to DataFrame.")
             return pd.DataFrame(custom_data_input_dict)
         except Exception as e:
             raise CustomException(e, sys)
\ No newline at end of file
@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import math
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from src.logger import logging
+from src.utils.metrics import PREDICTION_CACHE_HITS, PREDICTION_CACHE_MISSES, PREDICTION_CACHE_EVICTIONS
+
+# The CustomData fields (predict_pipeline.FEATURE_COLUMNS), in a fixed order.
+CACHE_FIELDS = (
+    "person_age", "person_income", "person_home_ownership", "person_emp_length",
+    "loan_intent", "loan_grade", "loan_amnt", "loan_int_rate",
+    "cb_person_default_on_file", "loan_percent_income", "cb_person_cred_hist_length",
+)
+
+@dataclass
+class PredictionCacheConfig:
+    '''Optional cache of the calibrated probability per application and model version.
+
+    Labels are not cached: they depend on the grade cutoffs serving reads from the
+    environment, so they are derived from the active policy on every request.
+    '''
+    enabled: bool = os.getenv("PREDICTION_CACHE", "0") == "1"
+    # "memory": per-process LRU; "disk": SQLite file shared by all workers on the host.
+    backend: str = os.getenv("PREDICTION_CACHE_BACKEND", "memory")
+    max_entries: int = int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", "100000"))
+    ttl_seconds: float = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+    disk_path: str = os.getenv("PREDICTION_CACHE_PATH", os.path.join("artifacts", "cache", "predictions.sqlite"))
+
+def _canonical(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, str):
+        return value
+    # 25, 25.0 and numpy scalars of either are the same application.
+    return repr(float(value))
+
+def record_key(record, version):
+    '''Canonical hash of the eleven application fields and the model version.'''
+    payload = json.dumps([version] + [_canonical(record.get(field)) for field in CACHE_FIELDS])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class MemoryBackend:
+    '''Thread-safe LRU with per-entry expiry, private to the process.'''
+    name = "memory"
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        values, expired = [], 0
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] < now:
+                    del self._entries[key]
+                    expired += 1
+                    entry = None
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                values.append(entry[1] if entry is not None else None)
+        return values, expired
+
+    def put_many(self, items, version):
+        expires_at = time.monotonic() + self.ttl_seconds
+        evicted = 0
+        with self._lock:
+            for key, value in items:
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def clear(self, keep_version=None):
+        # Entries of one process all belong to the version it served before.
+        with self._lock:
+            self._entries.clear()
+
+class DiskBackend:
+    '''SQLite (WAL) store shared by the worker processes of one host.
+
+    Rows carry an absolute expiry and a last-used time; on writes the table is trimmed
+    back to `max_entries` by dropping the least recently used rows.
+    '''
+    name = "disk"
+
+    def __init__(self, path, max_entries, ttl_seconds):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    def _connect(self):
+        # Connections must not cross a fork; reopen in each worker.
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            # Files written when labels were cached hold them in a `predictions` table; drop it.
+            connection.execute("DROP TABLE IF EXISTS predictions")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS scores ("
+                "key TEXT PRIMARY KEY, version TEXT, probability REAL, expires_at REAL, last_used REAL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)")
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def get_many(self, keys):
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            rows = []
+            # Stay under SQLite's bound-parameter limit for large batches.
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows.extend(connection.execute(
+                    f"SELECT key, probability, expires_at FROM scores WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall())
+            found = {key: probability for key, probability, expires_at in rows if expires_at >= now}
+            expired = [key for key, _, expires_at in rows if expires_at < now]
+            if expired:
+                connection.executemany("DELETE FROM scores WHERE key = ?", [(key,) for key in expired])
+            if found:
+                connection.executemany("UPDATE scores SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+        return [found.get(key) for key in keys], len(expired)
+
+    def put_many(self, items, version):
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            connection.executemany(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?)",
+                [(key, version, float(probability), now + self.ttl_seconds, now) for key, probability in items]
+            )
+            excess = connection.execute("SELECT COUNT(*) FROM scores").fetchone()[0] - self.max_entries
+            if excess > 0:
+                connection.execute(
+                    "DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY last_used LIMIT ?)", (excess,)
+                )
+        return max(excess, 0)
+
+    def clear(self, keep_version=None):
+        # Other workers may already write entries for the new version; keep those.
+        with self._lock:
+            self._connect().execute("DELETE FROM scores WHERE version IS NOT ?", (keep_version,))
+
+class PredictionCache:
+    '''Looks up and stores predictions by `record_key`, tracking hits, misses and evictions.
+
+    The model version is part of every key, so a new artifact never serves old
+    predictions; when the version changes the previous entries are dropped.
+    '''
+    def __init__(self, config: PredictionCacheConfig = None):
+        self.cache_config = config or PredictionCacheConfig()
+        self.enabled = self.cache_config.enabled
+        self.backend = None
+        self._version = None
+        if self.enabled:
+            config = self.cache_config
+            if config.backend == "memory":
+                self.backend = MemoryBackend(config.max_entries, config.ttl_seconds)
+            elif config.backend == "disk":
+                self.backend = DiskBackend(config.disk_path, config.max_entries, config.ttl_seconds)
+            else:
+                raise ValueError(f"Unknown prediction cache backend: {config.backend}")
+
+    def _check_version(self, version):
+        if version != self._version:
+            # Also runs on first use, dropping what an earlier process left for older versions.
+            logging.info(f"Prediction cache now serving model version {version}, dropping other versions.")
+            self.backend.clear(keep_version=version)
+            self._version = version
+
+    def get_many(self, records, version):
+        '''Returns (keys, [calibrated probability or None per record]).'''
+        self._check_version(version)
+        keys = [record_key(record, version) for record in records]
+        values, expired = self.backend.get_many(keys)
+        hits = sum(value is not None for value in values)
+        PREDICTION_CACHE_HITS.labels(self.backend.name).inc(hits)
+        PREDICTION_CACHE_MISSES.labels(self.backend.name).inc(len(values) - hits)
+        if expired:
+            PREDICTION_CACHE_EVICTIONS.labels(self.backend.name).inc(expired)
+        return keys, values
+
+    def put_many(self, keys, values, version):
+        evicted = self.backend.put_many(list(zip(keys, values)), version)
+        if evicted:
+            PREDICTION_CACHE_EVICTIONS.labels(self.backend.name).inc(evicted)
+
+prediction_cache = PredictionCache()
@@ -0,0 +1,30 @@
+import os
+from typing import List
+from pydantic import BaseModel, Field # type: ignore
+
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+
+class CreditApplication(BaseModel):
+    '''A single loan application, with the same fields as the HTML form.'''
+    person_age: int = Field(..., ge=0)
+    person_income: float = Field(..., ge=0)
+    person_home_ownership: str
+    person_emp_length: float = Field(..., ge=0)
+    loan_intent: str
+    loan_grade: str
+    loan_amnt: float = Field(..., ge=0)
+    loan_int_rate: float = Field(..., ge=0)
+    cb_person_default_on_file: str
+    loan_percent_income: float = Field(..., ge=0)
+    cb_person_cred_hist_length: float = Field(..., ge=0)
+
+class BatchPredictRequest(BaseModel):
+    records: List[CreditApplication] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class BatchPredictResponse(BaseModel):
+    version: str
+    count: int
+    # Calibrated default probabilities, policy labels (1 = default risk) and decision bands.
+    probabilities: List[float]
+    labels: List[int]
+    decisions: List[str]
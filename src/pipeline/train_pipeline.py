@@ -5,36 +5,98 @@ from src.logger import logging
 from src.components.data_ingestion import DataIngestion
 from src.components.data_transformation import DataTransformation
 from src.components.model_trainer import ModelTrainer
+from src.utils.stage_state import StageState
 
+STAGES = ("data_ingestion", "data_transformation", "model_trainer")
 
 class TrainPipeline:
-    def __init__(self):
+    '''Ingestion -> transformation -> training, skipping stages whose recorded fingerprint still matches.
+
+    `force=True` reruns every stage; a collection of stage names reruns only those
+    (later stages still rerun if the forced stage produces different outputs).
+    '''
+    def __init__(self, force=None):
         self.data_ingestion = DataIngestion()
         self.data_transformation = DataTransformation()
         self.model_trainer = ModelTrainer()
-    
+        self.stage_state = StageState()
+        self.force = force
+        self.stage_report = {}
+
+    def _forced(self, stage):
+        return self.force is True or (bool(self.force) and stage in self.force)
+
+    def _run_stage(self, stage, stage_fingerprint, run):
+        '''Returns the stage record, calling `run() -> (outputs, result)` only when the record is not current.'''
+        record = None if self._forced(stage) else self.stage_state.current(stage, stage_fingerprint)
+        if record is not None:
+            logging.info(f"Stage {stage}: up to date ({stage_fingerprint[:12]}), reusing its outputs.")
+            self.stage_report[stage] = "skipped"
+            return record
+
+        logging.info(f"Stage {stage}: running ({stage_fingerprint[:12]}).")
+        # Drop the old record first, so a crash part-way through cannot leave it looking valid.
+        self.stage_state.invalidate(stage)
+        outputs, result = run()
+        self.stage_report[stage] = "ran"
+        return self.stage_state.save(stage, stage_fingerprint, outputs, result)
+
+    @staticmethod
+    def _digests(record):
+        return {name: output["sha256"] for name, output in record["outputs"].items()}
+
     def run_pipeline(self):
         try:
             logging.info("Starting End-to-End Training Pipeline")
-            
+
             # Ingestion data
-            train_path, test_path = self.data_ingestion.initiate_data_ingestion()
-            
+            def ingest():
+                train_path, test_path = self.data_ingestion.initiate_data_ingestion()
+                return {"train": train_path, "test": test_path}, None
+            ingestion = self._run_stage("data_ingestion", self.data_ingestion.stage_fingerprint(), ingest)
+
             # Transform data
-            train_arr, test_arr, preprocessor_file_path = self.data_transformation.initiate_data_transformation(train_path, test_path)
-            
+            def transform():
+                self.data_transformation.initiate_data_transformation(
+                    ingestion["outputs"]["train"]["path"], ingestion["outputs"]["test"]["path"]
+                )
+                config = self.data_transformation.data_transformation_config
+                return {
+                    "preprocessor": config.preprocessor_obj_file_path,
+                    "fast_preprocessor": config.fast_preprocessor_obj_file_path,
+                    "drift_reference": config.drift_reference_file_path,
+                    **self.data_transformation.array_paths(),
+                }, None
+            transformation = self._run_stage(
+                "data_transformation",
+                self.data_transformation.stage_fingerprint(self._digests(ingestion)),
+                transform
+            )
+
             # Train model
-            model_score = self.model_trainer.initiate_model_trainer(train_arr, test_arr)
-            
-            logging.info(f"Training Pipeline Completed. Best Model Scores: {model_score}")
-            
+            def train():
+                X_train, y_train, X_test, y_test = self.data_transformation.load_arrays()
+                model_score = self.model_trainer.initiate_model_trainer(X_train, y_train, X_test, y_test)
+                return self.model_trainer.output_paths(), {
+                    "best_score": model_score,
+                    "search_report": self.model_trainer.search_report,
+                    "optimization_report": self.model_trainer.optimization_report,
+                    "policy_report": self.model_trainer.policy_report,
+                }
+            training = self._run_stage(
+                "model_trainer",
+                self.model_trainer.stage_fingerprint(self._digests(transformation)),
+                train
+            )
+
+            model_score = training["result"]["best_score"]
+            logging.info(f"Training Pipeline Completed. Best Model Scores: {model_score} (stages: {self.stage_report})")
+
             return model_score
-        
+
         except Exception as e:
             raise CustomException(e, sys)
-    
+
 if __name__ == "__main__":
     pipeline = TrainPipeline()
     pipeline.run_pipeline()
-            
-            
\ No newline at end of file
@@ -0,0 +1,144 @@
+import sys
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import numpy as np # type: ignore
+from dataclasses import dataclass
+from src.logger import logging
+from src.exception import CustomException
+
+from sklearn.base import BaseEstimator, clone # type: ignore
+
+@dataclass
+class ArrayCacheConfig:
+    '''Location and size bound of the content-addressed training cache.'''
+    cache_dir: str = os.getenv("ARRAY_CACHE_DIR", os.path.join("artifacts", "cache"))
+    max_bytes: int = int(os.getenv("ARRAY_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+    enabled: bool = os.getenv("ARRAY_CACHE", "1") == "1"
+
+def array_digest(array):
+    '''Content hash of a NumPy array, including its dtype and shape.'''
+    array = np.ascontiguousarray(array)
+    digest = hashlib.sha256(f"{array.dtype.str}{array.shape}".encode())
+    digest.update(array.view(np.uint8).reshape(-1) if array.size else b'')
+    return digest.hexdigest()
+
+def estimator_fingerprint(estimator):
+    '''Stable description of an (unfitted) estimator's configuration, nested params included.'''
+    params = estimator.get_params(deep=True)
+    return json.dumps(
+        [type(estimator).__name__] + sorted(
+            (name, repr(value)) for name, value in params.items() if not hasattr(value, 'get_params')
+        )
+    )
+
+class ArrayCache:
+    '''Content-addressed store of `.npy` arrays (plus side files), read back memory-mapped.
+
+    Each entry is a directory named by its key. Entries are written to a temporary
+    directory and renamed into place, so concurrent writers of the same key are safe.
+    The least recently used entries are evicted once the cache exceeds `max_bytes`.
+    '''
+    def __init__(self, config: ArrayCacheConfig = None):
+        self.cache_config = config or ArrayCacheConfig()
+
+    @staticmethod
+    def key(*parts):
+        return hashlib.sha256(json.dumps([str(part) for part in parts]).encode()).hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.cache_config.cache_dir, key)
+
+    def get(self, key):
+        '''Returns {name: memory-mapped array} for a cached entry, or None on a miss.'''
+        if not self.cache_config.enabled:
+            return None
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, "index.json")) as index_file:
+                names = json.load(index_file)["arrays"]
+            arrays = {name: np.load(os.path.join(entry, f"{name}.npy"), mmap_mode='r') for name in names}
+            os.utime(entry)
+            return arrays
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def get_file(self, key, name):
+        '''Returns the path of a side file stored with an entry, or None.'''
+        path = os.path.join(self._entry(key), name)
+        return path if os.path.exists(path) else None
+
+    def put(self, key, arrays, files=None):
+        '''Stores named arrays and optional side files (name -> source path) under `key`.'''
+        if not self.cache_config.enabled:
+            return
+        try:
+            os.makedirs(self.cache_config.cache_dir, exist_ok=True)
+            entry = self._entry(key)
+            if os.path.exists(entry):
+                return
+            staging = tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_config.cache_dir)
+            for name, array in arrays.items():
+                np.save(os.path.join(staging, f"{name}.npy"), np.asarray(array))
+            for name, source in (files or {}).items():
+                shutil.copyfile(source, os.path.join(staging, name))
+            with open(os.path.join(staging, "index.json"), 'w') as index_file:
+                json.dump({"arrays": list(arrays)}, index_file)
+            try:
+                os.rename(staging, entry)
+            except OSError:
+                # Another process stored the same key first.
+                shutil.rmtree(staging, ignore_errors=True)
+            self.evict()
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def evict(self):
+        '''Removes least recently used entries until the cache fits in `max_bytes`.'''
+        cache_dir = self.cache_config.cache_dir
+        entries = []
+        for name in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, name)
+            if name.startswith(".tmp-") or not os.path.isdir(path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+            entries.append((os.stat(path).st_mtime, size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.cache_config.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            logging.info(f"Evicted cache entry: {path}")
+
+class CachedSampler(BaseEstimator):
+    '''Wraps an imblearn sampler so identical resampling (same data, same sampler) is computed once.
+
+    GridSearchCV refits SMOTE on the same fold for every candidate; with this wrapper the
+    resampled fold is stored in the ArrayCache and memory-mapped back on later fits, in this
+    run and in later runs on unchanged data.
+    '''
+    def __init__(self, sampler=None, cache_dir=None, max_bytes=None):
+        self.sampler = sampler
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _cache(self):
+        config = ArrayCacheConfig()
+        if self.cache_dir is not None:
+            config.cache_dir = self.cache_dir
+        if self.max_bytes is not None:
+            config.max_bytes = self.max_bytes
+        return ArrayCache(config)
+
+    def fit_resample(self, X, y, **params):
+        cache = self._cache()
+        key = ArrayCache.key("resample", array_digest(X), array_digest(np.asarray(y)), estimator_fingerprint(self.sampler))
+        cached = cache.get(key)
+        if cached is not None:
+            return cached["X"], cached["y"]
+        X_res, y_res = clone(self.sampler).fit_resample(X, y, **params)
+        cache.put(key, {"X": X_res, "y": y_res})
+        return X_res, y_res
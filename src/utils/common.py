@@ -1,16 +1,19 @@
 import sys
 import os
-import yaml # type: ignore
+import hashlib
 import joblib # type: ignore
 from src.logger import logging
 from src.exception import CustomException
-from ensure import ensure_annotations # type: ignore
-from box import ConfigBox # type: ignore
 from pathlib import Path
 
-def read_yaml(file_path: Path) -> ConfigBox:
+# yaml, box and pandas are imported inside the functions that use them: the serving
+# path only needs load_object/file_digest and should not pay for them at startup.
+
+def read_yaml(file_path: Path) -> "ConfigBox":
     '''Reads a YAML file and returns its contents as a ConfigBox object.'''
     try:
+        import yaml # type: ignore
+        from box import ConfigBox # type: ignore
         with open(file_path, 'r') as yaml_file:
             content = yaml.safe_load(yaml_file)
             logging.info(f"YAML file: {file_path} loaded successfully")
@@ -29,24 +32,168 @@ def create_directories(path_to_directories: list, verbose=True):
         raise CustomException(e, sys)
 
 def save_object(file_path, obj):
-    '''Saves a Python object to a file using joblib.'''
+    '''Saves a Python object to a file using joblib.
+
+    The object is written to a temporary file and renamed into place, so readers
+    (including processes that memory-mapped the previous file) never see a partial file.
+    '''
     try:
         dir_path = os.path.dirname(file_path)
         os.makedirs(dir_path, exist_ok=True)
-        with open(file_path, 'wb') as file_obj:
+        tmp_path = f"{file_path}.tmp-{os.getpid()}"
+        with open(tmp_path, 'wb') as file_obj:
             joblib.dump(obj, file_obj)
-            logging.info(f"Object saved successfully at: {file_path}")
+        os.replace(tmp_path, file_path)
+        logging.info(f"Object saved successfully at: {file_path}")
     except Exception as e:
         raise CustomException(e, sys)
 
-def load_object(file_path):
-    '''Loads a Python object from a file using joblib.'''
+def load_object(file_path, mmap_mode=None):
+    '''Loads a Python object from a file using joblib.
+
+    With `mmap_mode='r'` the NumPy arrays inside the object are memory-mapped from the
+    file instead of copied, so processes loading the same file share those pages.
+    '''
     try:
         if not os.path.exists(file_path):
-            raise CustomException(f"The file: {file_path} does not exist", sys)
+            raise FileNotFoundError(f"The file: {file_path} does not exist")
+        if mmap_mode is not None:
+            obj = joblib.load(file_path, mmap_mode=mmap_mode)
+        else:
+            with open(file_path, 'rb') as file_obj:
+                obj = joblib.load(file_obj)
+        logging.info(f"Object loaded successfully from: {file_path}")
+        return obj
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def file_digest(file_path, chunk_size=1024 * 1024):
+    '''Returns the sha256 hex digest of a file, read in chunks.'''
+    try:
+        digest = hashlib.sha256()
         with open(file_path, 'rb') as file_obj:
-            obj = joblib.load(file_obj)
-            logging.info(f"Object loaded successfully from: {file_path}")
-            return obj
+            for chunk in iter(lambda: file_obj.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
     except Exception as e:
-        raise CustomException(e, sys)
\ No newline at end of file
+        raise CustomException(e, sys)
+
+def read_frame(file_path, **kwargs):
+    '''Reads a DataFrame from a Parquet or CSV file, chosen by extension.'''
+    try:
+        import pandas as pd # type: ignore
+        if str(file_path).endswith(".parquet"):
+            return pd.read_parquet(file_path, **kwargs)
+        return pd.read_csv(file_path, **kwargs)
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def write_frame(df, file_path):
+    '''Writes a DataFrame to Parquet (dtypes preserved) or CSV, chosen by extension.'''
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        if str(file_path).endswith(".parquet"):
+            df.to_parquet(file_path, index=False)
+        else:
+            df.to_csv(file_path, index=False)
+        logging.info(f"Data written to: {file_path}")
+    except Exception as e:
+        raise CustomException(e, sys)
+
+FRAME_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".json": "jsonl", ".parquet": "parquet", ".pq": "parquet"}
+
+def frame_format(file_path):
+    '''"csv", "jsonl" or "parquet", from the file extension.'''
+    suffix = os.path.splitext(str(file_path))[1].lower()
+    if suffix not in FRAME_FORMATS:
+        raise ValueError(f"Unsupported file type '{suffix}', expected one of {sorted(FRAME_FORMATS)}")
+    return FRAME_FORMATS[suffix]
+
+def iter_frames(file_path, chunk_rows, **kwargs):
+    '''Yields a Parquet, JSON Lines or CSV file as DataFrames of at most `chunk_rows` rows.'''
+    try:
+        import pandas as pd # type: ignore
+        fmt = frame_format(file_path)
+        if fmt == "parquet":
+            import pyarrow.parquet as pq # type: ignore
+            for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_rows):
+                yield batch.to_pandas()
+        elif fmt == "jsonl":
+            yield from pd.read_json(file_path, lines=True, chunksize=chunk_rows, **kwargs)
+        else:
+            yield from pd.read_csv(file_path, chunksize=chunk_rows, **kwargs)
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def count_rows(file_path, chunk_size=1024 * 1024):
+    '''Number of data rows of a Parquet file (from its metadata) or a CSV file with a header line.'''
+    try:
+        if str(file_path).endswith(".parquet"):
+            import pyarrow.parquet as pq # type: ignore
+            return pq.ParquetFile(file_path).metadata.num_rows
+        lines, last = 0, b"\n"
+        with open(file_path, 'rb') as file_obj:
+            for chunk in iter(lambda: file_obj.read(chunk_size), b''):
+                lines += chunk.count(b"\n")
+                last = chunk[-1:]
+        return lines + (last != b"\n") - 1
+    except Exception as e:
+        raise CustomException(e, sys)
+
+class FrameWriter:
+    '''Appends DataFrame chunks to one Parquet (a row group per chunk), JSON Lines or CSV file.
+
+    The file is written under a temporary name and renamed into place on `close()`.
+    Parquet chunks are cast to the first chunk's schema, so per-chunk categorical
+    dictionaries and index widths, or an integer column that is float in a chunk
+    with missing values, do not change the file's schema.
+    '''
+    def __init__(self, file_path):
+        self.file_path = str(file_path)
+        self.format = frame_format(self.file_path)
+        self.tmp_path = f"{self.file_path}.tmp-{os.getpid()}"
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+        os.makedirs(os.path.dirname(os.path.abspath(self.file_path)), exist_ok=True)
+
+    def write(self, df):
+        if self.format == "parquet":
+            import pyarrow as pa # type: ignore
+            import pyarrow.parquet as pq # type: ignore
+            if self._writer is None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                self._schema = pa.schema([
+                    field.with_type(pa.dictionary(pa.int32(), field.type.value_type)) if pa.types.is_dictionary(field.type) else field
+                    for field in table.schema
+                ])
+                self._writer = pq.ParquetWriter(self.tmp_path, self._schema)
+            self._writer.write_table(pa.Table.from_pandas(df, preserve_index=False).cast(self._schema))
+        elif self.format == "jsonl":
+            payload = df.to_json(orient='records', lines=True)
+            with open(self.tmp_path, 'w' if self.rows == 0 else 'a') as out_file:
+                # Older pandas versions omit the trailing newline, which would glue chunks together.
+                out_file.write(payload if payload.endswith("\n") else payload + "\n")
+        else:
+            df.to_csv(self.tmp_path, mode='w' if self.rows == 0 else 'a', header=self.rows == 0, index=False)
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if not os.path.exists(self.tmp_path):
+            raise ValueError(f"No rows were written to {self.file_path}")
+        os.replace(self.tmp_path, self.file_path)
+        logging.info(f"{self.rows} rows written to: {self.file_path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            if self._writer is not None:
+                self._writer.close()
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
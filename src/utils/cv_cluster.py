@@ -0,0 +1,356 @@
+import io
+import os
+import sys
+import queue
+import pickle
+import secrets
+import signal
+import subprocess
+import argparse
+import threading
+import traceback
+from concurrent.futures import Future
+from dataclasses import dataclass
+from multiprocessing.connection import Listener, Client, AuthenticationError
+import numpy as np # type: ignore
+from joblib.parallel import ParallelBackendBase # type: ignore
+from src.logger import logging
+from src.exception import CustomException
+from src.utils.array_cache import array_digest
+
+@dataclass
+class CVClusterConfig:
+    '''Workers that run cross-validation fits when TRAIN_CV_BACKEND=cluster.'''
+    # "host:port,host:port" of running workers (`python -m src.utils.cv_cluster --port 7000`).
+    # Empty starts `local_workers` worker processes on this machine instead.
+    workers: str = os.getenv("TRAIN_CV_WORKERS", "")
+    local_workers: int = int(os.getenv("TRAIN_CV_LOCAL_WORKERS", "2"))
+    # Shared secret of the workers; messages are pickles, so remote workers require one.
+    authkey: str = os.getenv("TRAIN_CV_AUTHKEY", "")
+    # Arrays at least this large are sent to each worker once and referenced by digest in every task.
+    min_shared_bytes: int = int(os.getenv("TRAIN_CV_MIN_SHARED_BYTES", str(16 * 1024)))
+
+def parse_addresses(spec):
+    addresses = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        host, port = item.rsplit(":", 1)
+        addresses.append((host, int(port)))
+    return addresses
+
+class _SharedArrays:
+    '''Large arrays referenced by tasks, by content digest; an array object is hashed once.'''
+    def __init__(self, min_bytes):
+        self.min_bytes = min_bytes
+        self._digests = {}
+        self._arrays = {}
+        self._lock = threading.Lock()
+
+    def reference(self, obj):
+        if type(obj) not in (np.ndarray, np.memmap) or obj.dtype.hasobject or obj.nbytes < self.min_bytes:
+            return None
+        with self._lock:
+            # The array is kept alive in `_digests`, so its id cannot be reused by another object.
+            entry = self._digests.get(id(obj))
+            if entry is None:
+                entry = self._digests[id(obj)] = (obj, array_digest(obj))
+                self._arrays.setdefault(entry[1], obj)
+            return entry[1]
+
+    def get(self, digest):
+        return self._arrays[digest]
+
+class _TaskPickler(pickle.Pickler):
+    def __init__(self, file, shared):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.shared = shared
+        self.digests = set()
+
+    def persistent_id(self, obj):
+        digest = self.shared.reference(obj)
+        if digest is not None:
+            self.digests.add(digest)
+        return digest
+
+class _TaskUnpickler(pickle.Unpickler):
+    def __init__(self, file, arrays):
+        super().__init__(file)
+        self.arrays = arrays
+
+    def persistent_load(self, digest):
+        return self.arrays[digest]
+
+def _serve_connection(conn):
+    '''Runs tasks from one client until it closes; arrays it sends are kept for the connection's lifetime.'''
+    arrays = {}
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        kind = message[0]
+        if kind == "array":
+            _, digest, dtype, shape = message
+            # Read-only, like the memory-mapped arrays joblib hands to local workers.
+            arrays[digest] = np.frombuffer(conn.recv_bytes(), dtype=dtype).reshape(shape)
+        elif kind == "task":
+            try:
+                result = ("result", _TaskUnpickler(io.BytesIO(message[1]), arrays).load()())
+            except Exception as e:
+                try:
+                    pickle.dumps(e)
+                except Exception:
+                    e = None
+                result = ("error", e, traceback.format_exc())
+            conn.send(result)
+        elif kind == "close":
+            return
+
+def serve(address, authkey, once=False):
+    '''Worker loop: accepts one client at a time and runs its tasks.
+
+    The bound "host:port" is printed first (port 0 picks a free one); `once` exits
+    after the first client disconnects, as local workers do.
+    '''
+    with Listener(address, authkey=authkey) as listener:
+        print(f"{listener.address[0]}:{listener.address[1]}", flush=True)
+        logging.info(f"CV worker listening on {listener.address}")
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, OSError) as e:
+                logging.error(f"CV worker rejected a connection: {e}")
+                continue
+            with conn:
+                _serve_connection(conn)
+            if once:
+                return
+
+def _forward_output(stream):
+    for line in stream:
+        sys.stdout.write(line)
+
+def start_workers(n_workers, authkey, host="127.0.0.1", port=0, once=True):
+    '''Starts `n_workers` worker processes on consecutive ports (or free ones for port 0).
+
+    Workers are fresh interpreters running this module, like workers on another node,
+    so they do not depend on how the calling program was started.
+    '''
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, TRAIN_CV_AUTHKEY=authkey,
+               PYTHONPATH=os.pathsep.join(filter(None, [project_root, os.environ.get("PYTHONPATH")])))
+    processes = []
+    for i in range(n_workers):
+        command = [sys.executable, "-m", "src.utils.cv_cluster", "--host", host, "--port", str(port + i if port else 0)]
+        processes.append(subprocess.Popen(command + (["--once"] if once else []), env=env, stdout=subprocess.PIPE, text=True))
+    addresses = []
+    for process in processes:
+        bound = process.stdout.readline().strip()
+        if not bound:
+            raise RuntimeError(f"CV worker exited with code {process.wait()} before listening")
+        addresses.append(parse_addresses(bound)[0])
+        # Fits print progress (GridSearchCV verbose output); pass it on as joblib's local workers do.
+        threading.Thread(target=_forward_output, args=(process.stdout,), daemon=True).start()
+    return processes, addresses
+
+class CVCluster:
+    '''Connections to CV workers and the task queue feeding them.
+
+    One dispatcher thread per worker takes the next task from the queue, first sends
+    the worker any shared array the task references that it does not hold yet, then
+    waits for the result. Each large array (the training matrix, fold indices) therefore
+    crosses the network once per worker, however many fits use it. Tasks of a worker
+    that disconnects are requeued for the others.
+    '''
+    def __init__(self, addresses, authkey, min_shared_bytes=16 * 1024, processes=()):
+        self.addresses = list(addresses)
+        self.processes = list(processes)
+        self.stats = {"workers": len(self.addresses), "tasks": 0, "task_bytes": 0, "arrays_sent": 0, "array_bytes": 0}
+        self._shared = _SharedArrays(min_shared_bytes)
+        self._tasks = queue.Queue()
+        self._lock = threading.Lock()
+        self._alive = 0
+        self._threads = []
+        for address in self.addresses:
+            conn = Client(address, authkey=authkey.encode())
+            thread = threading.Thread(target=self._dispatch, args=(address, conn), name=f"cv-worker-{address[1]}", daemon=True)
+            self._alive += 1
+            self._threads.append(thread)
+            thread.start()
+        logging.info(f"Connected to {len(self.addresses)} CV worker(s): {self.addresses}")
+
+    @classmethod
+    def start(cls, config: CVClusterConfig = None):
+        '''Connects to the configured workers, or starts local ones when none are configured.'''
+        try:
+            config = config or CVClusterConfig()
+            addresses = parse_addresses(config.workers)
+            if addresses:
+                if not config.authkey:
+                    raise ValueError("TRAIN_CV_AUTHKEY must be set to use remote CV workers")
+                return cls(addresses, config.authkey, config.min_shared_bytes)
+            authkey = config.authkey or secrets.token_hex(16)
+            processes, addresses = start_workers(config.local_workers, authkey)
+            return cls(addresses, authkey, config.min_shared_bytes, processes)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @property
+    def n_workers(self):
+        return self._alive
+
+    def submit(self, func):
+        '''Queues `func()` for the next free worker and returns its Future.'''
+        buffer = io.BytesIO()
+        pickler = _TaskPickler(buffer, self._shared)
+        pickler.dump(func)
+        future = Future()
+        with self._lock:
+            if self._alive == 0:
+                future.set_exception(RuntimeError("No CV worker is connected"))
+                return future
+            self.stats["tasks"] += 1
+            self.stats["task_bytes"] += buffer.tell()
+            self._tasks.put((future, buffer.getvalue(), pickler.digests))
+        return future
+
+    def _dispatch(self, address, conn):
+        held = set()
+        while True:
+            item = self._tasks.get()
+            if item is None:
+                break
+            future, payload, digests = item
+            if future.cancelled():
+                continue
+            try:
+                for digest in digests - held:
+                    array = np.ascontiguousarray(self._shared.get(digest))
+                    conn.send(("array", digest, array.dtype.str, array.shape))
+                    conn.send_bytes(array)
+                    held.add(digest)
+                    with self._lock:
+                        self.stats["arrays_sent"] += 1
+                        self.stats["array_bytes"] += array.nbytes
+                conn.send(("task", payload))
+                kind, *body = conn.recv()
+            except (EOFError, OSError) as e:
+                logging.error(f"Lost CV worker {address}: {e!r}")
+                self._retire(item)
+                return
+            if future.cancelled():
+                continue
+            if kind == "result":
+                future.set_result(body[0])
+            else:
+                error, remote_traceback = body
+                logging.error(f"CV task failed on worker {address}:\n{remote_traceback}")
+                future.set_exception(error if error is not None else RuntimeError(remote_traceback))
+        try:
+            conn.send(("close",))
+        except OSError:
+            pass
+        conn.close()
+
+    def _retire(self, item):
+        '''Requeues the task of a lost worker, or fails every queued task when it was the last one.'''
+        with self._lock:
+            self._alive -= 1
+            if self._alive > 0:
+                self._tasks.put(item)
+                return
+            pending = [item]
+            while True:
+                try:
+                    pending.append(self._tasks.get_nowait())
+                except queue.Empty:
+                    break
+        for future, _, _ in filter(None, pending):
+            if not future.done():
+                future.set_exception(RuntimeError("All CV workers were lost"))
+
+    def cancel_pending(self):
+        '''Cancels the queued tasks; tasks already running on a worker finish.'''
+        while True:
+            try:
+                item = self._tasks.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item[0].cancel()
+
+    def close(self):
+        self.cancel_pending()
+        for _ in self._threads:
+            self._tasks.put(None)
+        for thread in self._threads:
+            thread.join()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.terminate()
+        logging.info(f"CV cluster closed: {self.stats}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ClusterBackend(ParallelBackendBase):
+    '''joblib backend running each call on a `CVCluster` worker.
+
+    Use it around any joblib-parallel scikit-learn call, e.g.
+    `with parallel_config(backend=ClusterBackend(cluster)): search.fit(X, y)`.
+    Calls are not batched: a CV fit takes far longer than a round trip to a worker.
+    '''
+    supports_retrieve_callback = True
+
+    def __init__(self, cluster, **kwargs):
+        super().__init__(**kwargs)
+        self.cluster = cluster
+
+    def effective_n_jobs(self, n_jobs):
+        return max(1, self.cluster.n_workers)
+
+    def submit(self, func, callback=None):
+        future = self.cluster.submit(func)
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+    def retrieve_result_callback(self, future):
+        return future.result()
+
+    def abort_everything(self, ensure_ready=True):
+        self.cluster.cancel_pending()
+
+    def get_nested_backend(self):
+        # Workers run one fit at a time; the boosters' own threads use the worker's cores.
+        return "sequential", None
+
+if __name__ == "__main__":
+    # Start workers on a node, e.g. `TRAIN_CV_AUTHKEY=... python -m src.utils.cv_cluster --port 7000 --slots 4`,
+    # then train with TRAIN_CV_BACKEND=cluster TRAIN_CV_WORKERS=node:7000,node:7001,node:7002,node:7003
+    parser = argparse.ArgumentParser(description="Run cross-validation worker processes on this node.")
+    # Loopback by default; workers run pickled tasks, so expose them (--host 0.0.0.0) on a trusted network only.
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7000)
+    parser.add_argument("--slots", type=int, default=1, help="Worker processes, on consecutive ports")
+    parser.add_argument("--once", action="store_true", help="Exit when the first client disconnects")
+    args = parser.parse_args()
+    authkey = CVClusterConfig().authkey
+    if not authkey:
+        sys.exit("Set TRAIN_CV_AUTHKEY to the cluster's shared secret.")
+    if args.slots == 1:
+        serve((args.host, args.port), authkey.encode(), once=args.once)
+    else:
+        processes, addresses = start_workers(args.slots, authkey, args.host, args.port, once=args.once)
+        print(f"CV workers listening on {addresses}", flush=True)
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            for process in processes:
+                process.wait()
+        finally:
+            for process in processes:
+                process.terminate()
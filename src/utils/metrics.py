@@ -0,0 +1,117 @@
+import time
+from contextlib import contextmanager
+from prometheus_client import Counter, Gauge, Histogram # type: ignore
+
+# Registered on the default registry, which the Instrumentator exposes on /metrics. Under
+# gunicorn (PROMETHEUS_MULTIPROC_DIR set) every worker writes its own files and /metrics
+# aggregates them; gauges therefore declare how their per-worker values are combined.
+
+MICRO_BATCH_QUEUE_DEPTH = Gauge(
+    "micro_batch_queue_depth",
+    "Single-record predictions waiting to be coalesced into a batch.",
+    multiprocess_mode="livesum",
+)
+MICRO_BATCH_SIZE = Histogram(
+    "micro_batch_size",
+    "Number of records scored together in one micro-batch.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+MICRO_BATCH_WAIT_SECONDS = Histogram(
+    "micro_batch_wait_seconds",
+    "Time a record spent queued before its batch was scored.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+# Per-stage inference latency, labeled with the serving model and artifact version.
+# Stages: form_parsing, custom_data, preprocess, predict, render.
+INFERENCE_STAGE_SECONDS = Histogram(
+    "inference_stage_seconds",
+    "Time spent in one stage of the inference path (per call; batched stages cover the whole batch).",
+    ["stage", "model", "version"],
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+             0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+INFERENCE_STAGE_ROWS = Counter(
+    "inference_stage_rows",
+    "Records processed by each inference stage.",
+    ["stage", "model", "version"],
+)
+INFERENCE_STAGE_ERRORS = Counter(
+    "inference_stage_errors",
+    "Inference stage calls that raised.",
+    ["stage", "model", "version"],
+)
+
+@contextmanager
+def observe_stage(stage, model, version, rows=1):
+    '''Times the enclosed block into INFERENCE_STAGE_SECONDS and counts its rows (or its error).'''
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        INFERENCE_STAGE_ERRORS.labels(stage, model, version).inc()
+        raise
+    finally:
+        INFERENCE_STAGE_SECONDS.labels(stage, model, version).observe(time.perf_counter() - start)
+    INFERENCE_STAGE_ROWS.labels(stage, model, version).inc(rows)
+
+def record_stage(stage, model, version, seconds, rows=1):
+    '''Records a stage whose duration was measured elsewhere (e.g. from the request arrival time).'''
+    INFERENCE_STAGE_SECONDS.labels(stage, model, version).observe(seconds)
+    INFERENCE_STAGE_ROWS.labels(stage, model, version).inc(rows)
+
+PREDICTION_CACHE_HITS = Counter(
+    "prediction_cache_hits",
+    "Predictions served from the prediction cache.",
+    ["backend"],
+)
+PREDICTION_CACHE_MISSES = Counter(
+    "prediction_cache_misses",
+    "Prediction cache lookups that had to be scored.",
+    ["backend"],
+)
+PREDICTION_CACHE_EVICTIONS = Counter(
+    "prediction_cache_evictions",
+    "Prediction cache entries dropped for capacity or expiry.",
+    ["backend"],
+)
+
+AUDIT_LOG_QUEUE_DEPTH = Gauge(
+    "audit_log_queue_depth",
+    "Prediction audit records waiting for the background writer.",
+    multiprocess_mode="livesum",
+)
+AUDIT_LOG_WRITTEN = Counter(
+    "audit_log_records_written",
+    "Prediction audit records written to the audit files.",
+)
+AUDIT_LOG_DROPPED = Counter(
+    "audit_log_records_dropped",
+    "Prediction audit records dropped because the queue was full or the write failed.",
+    ["reason"],
+)
+AUDIT_LOG_FLUSH_SECONDS = Histogram(
+    "audit_log_flush_seconds",
+    "Time to write one batch of audit records.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+# Drift of the serving traffic against the training reference, per input column and "prediction".
+# Each worker scores its own traffic; across workers the worst value is reported.
+DRIFT_PSI = Gauge(
+    "drift_psi",
+    "Population stability index of recent traffic against the training reference.",
+    ["feature"],
+    multiprocess_mode="max",
+)
+DRIFT_KS = Gauge(
+    "drift_ks",
+    "Kolmogorov-Smirnov distance (on reference bins) of recent traffic against the training reference.",
+    ["feature"],
+    multiprocess_mode="max",
+)
+DRIFT_WINDOW_RECORDS = Gauge(
+    "drift_window_records",
+    "Records the current drift scores are computed over.",
+    multiprocess_mode="max",
+)
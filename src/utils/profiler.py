@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from src.logger import logging
+
+@dataclass
+class SamplingProfilerConfig:
+    '''The profiling endpoint is off unless PROFILER_ENABLED=1; captures are bounded in length.'''
+    enabled: bool = os.getenv("PROFILER_ENABLED", "0") == "1"
+    default_interval_ms: float = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+    max_seconds: float = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    '''Wall-clock sampling profiler over all Python threads of the process.
+
+    A daemon thread reads `sys._current_frames()` every `interval` seconds and counts
+    each thread's stack. `folded()` returns the counts in the collapsed-stack format
+    ("thread;outer;...;inner count" per line) read by flamegraph.pl, speedscope and
+    inferno. Nothing runs while no capture is in progress.
+    '''
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self.n_samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            self.samples[";".join(reversed(stack))] += 1
+        self.n_samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        logging.info(f"Sampling profiler collected {self.n_samples} samples.")
+        return self
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+def profile_for(seconds, interval=0.005):
+    '''Samples the process for `seconds` (blocking the caller) and returns the folded stacks.'''
+    profiler = SamplingProfiler(interval).start()
+    try:
+        time.sleep(seconds)
+    finally:
+        profiler.stop()
+    return profiler.folded()
@@ -0,0 +1,99 @@
+import sys
+import os
+import json
+import time
+import hashlib
+import inspect
+from dataclasses import dataclass
+from src.logger import logging
+from src.exception import CustomException
+from src.utils.common import file_digest
+
+@dataclass
+class StageStateConfig:
+    '''Where the training pipeline records which stage outputs are up to date.'''
+    state_dir: str = os.getenv("PIPELINE_STATE_DIR", os.path.join("artifacts", "pipeline"))
+
+def code_digest(*objects):
+    '''Hash of the source files defining the given modules/classes/functions: the code version of a stage.'''
+    digest = hashlib.sha256()
+    for source_file in sorted({inspect.getsourcefile(obj) for obj in objects}):
+        digest.update(file_digest(source_file).encode())
+    return digest.hexdigest()
+
+def config_fingerprint(config, fields=None):
+    '''Public, non-callable attributes of a config object (dataclass fields and class defaults).
+
+    `fields` restricts it to the attributes a stage actually uses, e.g. the training-side
+    fields of a config that also holds serving-only settings.
+    '''
+    names = sorted(dir(config)) if fields is None else sorted(fields)
+    return {
+        name: str(getattr(config, name)) for name in names
+        if not name.startswith('_') and not callable(getattr(config, name))
+    }
+
+def fingerprint(**parts):
+    '''Stable hash of a stage's inputs, config and code version.'''
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+class StageState:
+    '''Per-stage records of the fingerprint a stage last completed with and the outputs it produced.
+
+    A record is only written after a stage succeeds and is removed before the stage
+    reruns, so after a crash the pipeline resumes from the first stage without a
+    valid record. A record is valid when its fingerprint matches and every output
+    file still exists with the digest it was written with.
+    '''
+    def __init__(self, config: StageStateConfig = None):
+        self.state_config = config or StageStateConfig()
+
+    def _record_path(self, stage):
+        return os.path.join(self.state_config.state_dir, f"{stage}.json")
+
+    def load(self, stage):
+        try:
+            with open(self._record_path(stage)) as record_file:
+                return json.load(record_file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def current(self, stage, stage_fingerprint):
+        '''Returns the stage record when its outputs can be reused as they are, otherwise None.'''
+        record = self.load(stage)
+        if record is None:
+            logging.info(f"Stage {stage}: no completed run recorded.")
+            return None
+        if record.get("fingerprint") != stage_fingerprint:
+            logging.info(f"Stage {stage}: inputs, config or code changed.")
+            return None
+        for name, output in record.get("outputs", {}).items():
+            if not os.path.exists(output["path"]) or file_digest(output["path"]) != output["sha256"]:
+                logging.info(f"Stage {stage}: output {name} is missing or was modified.")
+                return None
+        return record
+
+    def invalidate(self, stage):
+        try:
+            os.remove(self._record_path(stage))
+        except FileNotFoundError:
+            pass
+
+    def save(self, stage, stage_fingerprint, outputs, result=None):
+        '''Records a completed stage; `outputs` maps names to the files it produced.'''
+        try:
+            os.makedirs(self.state_config.state_dir, exist_ok=True)
+            record = {
+                "stage": stage,
+                "fingerprint": stage_fingerprint,
+                "completed_at": time.time(),
+                "outputs": {name: {"path": path, "sha256": file_digest(path)} for name, path in outputs.items()},
+                "result": result,
+            }
+            record_path = self._record_path(stage)
+            with open(record_path + ".tmp", 'w') as record_file:
+                json.dump(record, record_file, indent=2, default=str)
+            os.replace(record_path + ".tmp", record_path)
+            return record
+        except Exception as e:
+            raise CustomException(e, sys)
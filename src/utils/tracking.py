@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from src.logger import logging
+
+from mlflow.tracking import MlflowClient # type: ignore
+from mlflow.entities import Metric, Param, RunTag # type: ignore
+
+# log_batch accepts up to 1000 metrics, 100 params and 100 tags, and 1000 entities in total, per request.
+MAX_METRICS_PER_BATCH = 800
+MAX_PARAMS_PER_BATCH = 100
+
+DETAIL_LEVELS = ("summary", "candidates", "runs")
+
+@dataclass
+class TrackingConfig:
+    '''How a training run is tracked in MLflow.'''
+    # "batched": buffer each sweep's results and write them with log_batch when the sweep ends;
+    # "autolog": mlflow.sklearn.autolog, one child run per candidate logged synchronously; "off": no MLflow.
+    mode: str = os.getenv("TRAIN_TRACKING", "batched")
+    # Batched mode only. "summary": best score, params and timing per sweep; "candidates": also every
+    # candidate's CV scores (metrics stepped by candidate) and params on the parent run; "runs": also
+    # one child run per candidate, like autolog.
+    detail: str = os.getenv("TRAIN_TRACKING_DETAIL", "candidates")
+    # Write batches from a background thread; they are flushed before the parent run ends.
+    background: bool = os.getenv("TRAIN_TRACKING_ASYNC", "1") == "1"
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class SweepTracker:
+    '''Buffers search results and writes them to one MLflow run in a few log_batch calls.
+
+    `log_sweep` is called once per finished search (from whichever thread ran it) and turns
+    its `cv_results_` into metrics and params at the configured detail level. Writes go
+    through one background thread when `background` is set, in submission order;
+    `flush()` waits for them. Tracking errors are logged, never raised into training.
+    '''
+    def __init__(self, run_id, config: TrackingConfig = None, client=None):
+        self.config = config or TrackingConfig()
+        if self.config.detail not in DETAIL_LEVELS:
+            raise ValueError(f"Unknown tracking detail: {self.config.detail}")
+        self.run_id = run_id
+        self.client = client or MlflowClient()
+        self.stats = {"calls": 0, "metrics": 0, "params": 0, "child_runs": 0, "write_seconds": 0.0, "flush_wait_seconds": 0.0}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mlflow-tracking") if self.config.background else None
+        self._futures = []
+        self._experiment_id = None
+
+    def _log_batch(self, run_id, metrics=(), params=(), tags=()):
+        metric_chunks = list(_chunks(list(metrics), MAX_METRICS_PER_BATCH))
+        param_chunks = list(_chunks(list(params), MAX_PARAMS_PER_BATCH))
+        requests = max(len(metric_chunks), len(param_chunks), 1 if tags else 0)
+        for request in range(requests):
+            self.client.log_batch(
+                run_id,
+                metrics=metric_chunks[request] if request < len(metric_chunks) else [],
+                params=param_chunks[request] if request < len(param_chunks) else [],
+                tags=list(tags) if request == 0 else [],
+            )
+        return requests
+
+    def _write(self, writes):
+        start = time.perf_counter()
+        calls = metrics = params = child_runs = 0
+        try:
+            for write in writes:
+                run_id = self.run_id
+                if write.get("child_run_name"):
+                    if self._experiment_id is None:
+                        self._experiment_id = self.client.get_run(self.run_id).info.experiment_id
+                    run = self.client.create_run(
+                        self._experiment_id,
+                        run_name=write["child_run_name"],
+                        tags={"mlflow.parentRunId": self.run_id},
+                    )
+                    run_id = run.info.run_id
+                    child_runs += 1
+                    calls += 1
+                calls += self._log_batch(run_id, write.get("metrics", ()), write.get("params", ()), write.get("tags", ()))
+                metrics += len(write.get("metrics", ()))
+                params += len(write.get("params", ()))
+                if write.get("child_run_name"):
+                    self.client.set_terminated(run_id)
+                    calls += 1
+        except Exception as e:
+            logging.error(f"MLflow tracking write failed, results of this batch are not tracked: {e!r}")
+        with self._lock:
+            self.stats["calls"] += calls
+            self.stats["metrics"] += metrics
+            self.stats["params"] += params
+            self.stats["child_runs"] += child_runs
+            self.stats["write_seconds"] += time.perf_counter() - start
+
+    def _submit(self, writes):
+        if self._executor is None:
+            self._write(writes)
+        else:
+            self._futures.append(self._executor.submit(self._write, writes))
+
+    def log(self, metrics=None, params=None):
+        '''Buffers run-level metrics and params as one write.'''
+        timestamp = int(time.time() * 1000)
+        self._submit([{
+            "metrics": [Metric(key, float(value), timestamp, 0) for key, value in (metrics or {}).items()],
+            "params": [Param(key, str(value)) for key, value in (params or {}).items()],
+        }])
+
+    def log_sweep(self, model_name, cv_results, report):
+        '''Tracks one finished search: its summary and, per the detail level, its candidates.'''
+        timestamp = int(time.time() * 1000)
+        summary = {
+            "metrics": [
+                Metric(f"{model_name}_best_f1_score", report["best_score"], timestamp, 0),
+                Metric(f"{model_name}_search_seconds", report["seconds"], timestamp, 0),
+                Metric(f"{model_name}_n_fits", report["n_fits"], timestamp, 0),
+            ],
+            "params": [Param(f"{model_name}_best_{key}", str(value)) for key, value in report["best_params"].items()],
+        }
+        writes = [summary]
+        if self.config.detail == "summary":
+            self._submit(writes)
+            return
+        columns = {
+            "cv_f1": cv_results["mean_test_score"],
+            "cv_f1_std": cv_results["std_test_score"],
+            "fit_seconds": cv_results["mean_fit_time"],
+        }
+        for name, values in columns.items():
+            summary["metrics"].extend(
+                Metric(f"{model_name}_candidate_{name}", float(value), timestamp, step) for step, value in enumerate(values)
+            )
+        summary["params"].extend(
+            Param(f"{model_name}_candidate_{step}", json.dumps(params, sort_keys=True, default=str))
+            for step, params in enumerate(cv_results["params"])
+        )
+        if self.config.detail == "runs":
+            for step, params in enumerate(cv_results["params"]):
+                writes.append({
+                    "child_run_name": f"{model_name}_{step}",
+                    "metrics": [Metric(name, float(values[step]), timestamp, 0) for name, values in columns.items()],
+                    "params": [Param(key, str(value)) for key, value in params.items()],
+                    "tags": [RunTag("model", model_name)],
+                })
+        self._submit(writes)
+
+    def flush(self):
+        '''Waits for pending background writes and returns the tracking stats.'''
+        start = time.perf_counter()
+        for future in self._futures:
+            future.result()
+        self._futures = []
+        self.stats["flush_wait_seconds"] += time.perf_counter() - start
+        return dict(self.stats, write_seconds=round(self.stats["write_seconds"], 3),
+                    flush_wait_seconds=round(self.stats["flush_wait_seconds"], 3))
+
+    def close(self):
+        stats = self.flush()
+        if self._executor is not None:
+            self._executor.shutdown()
+        return stats
@@ -0,0 +1,41 @@
+'''Errors of the batch scoring endpoint as API clients see them.'''
+import sys
+from types import SimpleNamespace
+import pytest # type: ignore
+from fastapi.testclient import TestClient # type: ignore
+
+import app as app_module
+from src.exception import CustomException
+from src.pipeline.predict_pipeline import WARMUP_RECORD
+
+def failing_pipeline(error):
+    def predict_records(records):
+        try:
+            raise error
+        except Exception as e:
+            raise CustomException(e, sys)
+    return SimpleNamespace(predict_records=predict_records)
+
+@pytest.fixture
+def client():
+    # Without the lifespan: no artifacts are loaded and the audit log is not started.
+    return TestClient(app_module.app, raise_server_exceptions=False)
+
+def test_server_errors_do_not_leak_details(monkeypatch, client):
+    monkeypatch.setattr(app_module, "predict_pipeline", failing_pipeline(FileNotFoundError("/srv/artifacts/model.joblib")))
+    response = client.post("/v1/predict/batch", json={"records": [WARMUP_RECORD]})
+    assert response.status_code == 500
+    assert response.json() == {"detail": "Internal error while scoring the batch"}
+    assert "/srv" not in response.text and ".py" not in response.text
+
+def test_invalid_record_values_are_client_errors(monkeypatch, client):
+    monkeypatch.setattr(app_module, "predict_pipeline", failing_pipeline(ValueError("Unknown category 'Z' in column loan_grade")))
+    response = client.post("/v1/predict/batch", json={"records": [{**WARMUP_RECORD, "loan_grade": "Z"}]})
+    assert response.status_code == 422
+    assert "Unknown category 'Z' in column loan_grade" in response.json()["detail"]
+    assert ".py" not in response.text
+
+def test_schema_violations_are_rejected_before_scoring(monkeypatch, client):
+    monkeypatch.setattr(app_module, "predict_pipeline", failing_pipeline(AssertionError("must not be called")))
+    assert client.post("/v1/predict/batch", json={"records": [{**WARMUP_RECORD, "person_age": -1}]}).status_code == 422
+    assert client.post("/v1/predict/batch", json={"records": []}).status_code == 422
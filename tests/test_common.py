@@ -0,0 +1,51 @@
+'''Chunked frame reading and writing shared by ingestion and batch scoring.'''
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+import pytest # type: ignore
+
+from src.utils.common import FrameWriter, iter_frames, frame_format
+
+def chunks():
+    first = pd.DataFrame({"id": [1, 2, 3], "loan_amnt": [1000, 2000, 3000], "loan_grade": ["A", "B", "C"]})
+    # pandas turns an integer column with missing values into float64.
+    second = pd.DataFrame({"id": [4, 5], "loan_amnt": [np.nan, 5000.0], "loan_grade": ["D", None]})
+    return first, second
+
+@pytest.mark.parametrize("suffix", [".parquet", ".jsonl", ".csv"])
+def test_chunks_round_trip(tmp_path, suffix):
+    path = tmp_path / "out" / f"scored{suffix}"
+    with FrameWriter(path) as writer:
+        for chunk in chunks():
+            writer.write(chunk)
+    assert writer.rows == 5
+    assert not list(path.parent.glob("*.tmp-*"))
+    frames = list(iter_frames(path, 2))
+    assert [len(frame) for frame in frames] == [2, 2, 1]
+    result = pd.concat(frames, ignore_index=True)
+    assert result["id"].tolist() == [1, 2, 3, 4, 5]
+    assert result["loan_amnt"].iloc[3] is None or np.isnan(result["loan_amnt"].iloc[3])
+    assert result["loan_amnt"].iloc[4] == 5000
+
+def test_parquet_keeps_the_first_chunk_schema(tmp_path):
+    import pyarrow.parquet as pq # type: ignore
+    path = tmp_path / "scored.parquet"
+    with FrameWriter(path) as writer:
+        for chunk in chunks():
+            writer.write(chunk)
+    schema = pq.read_schema(path)
+    assert str(schema.field("loan_amnt").type) == "int64"
+    assert pq.ParquetFile(path).metadata.num_row_groups == 2
+
+def test_failed_write_leaves_no_file(tmp_path):
+    path = tmp_path / "scored.csv"
+    with pytest.raises(RuntimeError):
+        with FrameWriter(path) as writer:
+            writer.write(chunks()[0])
+            raise RuntimeError("scoring failed")
+    assert list(tmp_path.iterdir()) == []
+
+def test_unknown_extension_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        frame_format(tmp_path / "scored.xlsx")
+    with pytest.raises(ValueError):
+        FrameWriter(tmp_path / "scored.xlsx")
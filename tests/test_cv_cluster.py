@@ -0,0 +1,43 @@
+'''Cross-validation on local CV cluster workers against the local joblib backend.'''
+import numpy as np # type: ignore
+import pytest # type: ignore
+from joblib import parallel_config # type: ignore
+from sklearn.datasets import make_classification # type: ignore
+from sklearn.linear_model import LogisticRegression # type: ignore
+from sklearn.model_selection import GridSearchCV, StratifiedKFold # type: ignore
+
+from src.utils.cv_cluster import CVCluster, CVClusterConfig, ClusterBackend
+
+def grid_search():
+    return GridSearchCV(
+        LogisticRegression(max_iter=500),
+        {"C": [0.01, 0.1, 1.0, 10.0], "class_weight": [None, "balanced"]},
+        cv=StratifiedKFold(n_splits=3, shuffle=True, random_state=42),
+        scoring="f1",
+        n_jobs=2,
+    )
+
+@pytest.fixture(scope="module")
+def data():
+    # Large enough that X and the fold indices are sent to each worker once, by digest.
+    return make_classification(n_samples=3000, n_features=12, weights=[0.8], random_state=0)
+
+def test_two_local_workers_match_local_backend(data):
+    X, y = data
+    with parallel_config(backend="loky"):
+        local = grid_search().fit(X, y)
+
+    config = CVClusterConfig()
+    config.workers = ""
+    config.local_workers = 2
+    with CVCluster.start(config) as cluster:
+        assert cluster.n_workers == 2
+        with parallel_config(backend=ClusterBackend(cluster)):
+            remote = grid_search().fit(X, y)
+        stats = dict(cluster.stats)
+
+    assert stats["tasks"] == len(local.cv_results_["params"]) * 3
+    assert stats["arrays_sent"] > 0
+    for key in ["mean_test_score"] + [f"split{k}_test_score" for k in range(3)]:
+        np.testing.assert_array_equal(remote.cv_results_[key], local.cv_results_[key])
+    assert remote.best_params_ == local.best_params_
@@ -0,0 +1,92 @@
+'''Decision policy: threshold selection, calibration and the serving-time rules.'''
+import numpy as np # type: ignore
+import pytest # type: ignore
+from sklearn.isotonic import IsotonicRegression # type: ignore
+from sklearn.metrics import f1_score # type: ignore
+
+from src.components.decision_policy import (DecisionPolicy, DecisionPolicyConfig, fit_policy, parse_bands,
+                                            parse_grade_cutoffs, save_policy, select_threshold)
+from src.exception import CustomException
+
+@pytest.fixture(scope="module")
+def scores():
+    rng = np.random.default_rng(0)
+    y = (rng.random(3000) < 0.2).astype(int)
+    # Overconfident, rounded scores: ties between rows and a calibration that is far from identity.
+    raw = np.clip(0.5 * y + rng.normal(0.3, 0.2, len(y)), 0, 1).round(2)
+    return raw, y
+
+def brute_force(probabilities, y, score):
+    return {cutoff: score((probabilities >= cutoff).astype(int)) for cutoff in np.unique(probabilities)}
+
+def test_f1_threshold_is_the_best_cutoff(scores):
+    raw, y = scores
+    threshold, value = select_threshold(raw, y, "f1")
+    candidates = brute_force(raw, y, lambda labels: f1_score(y, labels))
+    assert value == pytest.approx(max(candidates.values()))
+    assert candidates[threshold] == pytest.approx(value)
+
+def test_cost_threshold_minimizes_the_weighted_errors(scores):
+    raw, y = scores
+    threshold, value = select_threshold(raw, y, "cost", cost_fn=5.0, cost_fp=1.0)
+    cost = lambda labels: 5.0 * np.sum((labels == 0) & (y == 1)) + 1.0 * np.sum((labels == 1) & (y == 0))
+    candidates = brute_force(raw, y, cost)
+    assert value == pytest.approx(min(candidates.values()))
+    assert candidates[threshold] == pytest.approx(value)
+
+def test_unknown_objective_is_rejected(scores):
+    with pytest.raises(CustomException):
+        select_threshold(*scores, objective="accuracy")
+
+def test_fitted_policy_calibrates_like_isotonic_regression(scores, tmp_path):
+    raw, y = scores
+    policy = fit_policy(raw, y, DecisionPolicyConfig(objective="f1"))
+    path = str(tmp_path / "decision_policy.json")
+    save_policy(policy, path)
+    loaded = DecisionPolicy.load(path, DecisionPolicyConfig(grade_cutoffs="", bands=""))
+
+    grid = np.linspace(-0.1, 1.1, 241)
+    isotonic = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip").fit(raw, y)
+    calibrated, labels = loaded.apply(grid)
+    np.testing.assert_allclose(calibrated, isotonic.predict(grid), atol=1e-12)
+    assert np.all(np.diff(calibrated) >= 0)
+    np.testing.assert_array_equal(labels, (calibrated >= policy["threshold"]).astype(int))
+    # The threshold is the best F1 cutoff of the calibrated out-of-fold probabilities.
+    assert policy["threshold"] == select_threshold(isotonic.predict(raw), y, "f1")[0]
+
+def test_cost_objective_lowers_the_threshold_when_misses_cost_more(scores):
+    raw, y = scores
+    cheap = fit_policy(raw, y, DecisionPolicyConfig(objective="cost", cost_false_negative=1.0, cost_false_positive=1.0))
+    expensive = fit_policy(raw, y, DecisionPolicyConfig(objective="cost", cost_false_negative=10.0, cost_false_positive=1.0))
+    assert expensive["threshold"] < cheap["threshold"]
+
+def test_grade_cutoffs_override_the_threshold_per_grade():
+    policy = DecisionPolicy({"threshold": 0.5}, DecisionPolicyConfig(grade_cutoffs="F:0.35, G:0.3", bands=""))
+    probabilities = np.array([0.4, 0.4, 0.4, 0.32, 0.6])
+    _, labels = policy.apply(probabilities, ["A", "F", "G", "F", "B"])
+    assert labels.tolist() == [0, 1, 1, 0, 1]
+    # Without grades only the learned threshold applies.
+    assert policy.apply(probabilities)[1].tolist() == [0, 0, 0, 0, 1]
+    assert policy.labels(probabilities, ["G"] * 5).tolist() == [1, 1, 1, 1, 1]
+
+def test_default_bands_split_at_half_the_threshold_and_the_threshold():
+    policy = DecisionPolicy({"threshold": 0.4}, DecisionPolicyConfig(grade_cutoffs="", bands=""))
+    assert policy.decisions(np.array([0.1, 0.2, 0.3, 0.4, 0.9])).tolist() == ["approve", "review", "review", "decline", "decline"]
+
+def test_configured_bands():
+    policy = DecisionPolicy({"threshold": 0.4}, DecisionPolicyConfig(grade_cutoffs="", bands="approve:0.15,review:0.4,decline"))
+    assert policy.decisions(np.array([0.1, 0.15, 0.39, 0.4])).tolist() == ["approve", "review", "review", "decline"]
+    assert policy.describe()["bands"] == {"approve": 0.15, "review": 0.4, "decline": 1.0}
+
+def test_band_and_cutoff_specs_are_parsed():
+    assert parse_bands("a:0.2,b:0.5,c") == (["a", "b", "c"], [0.2, 0.5])
+    assert parse_grade_cutoffs("") == {}
+    assert parse_grade_cutoffs("F:0.35,G:0.3") == {"F": 0.35, "G": 0.3}
+    with pytest.raises(ValueError):
+        parse_bands("a:0.5,b:0.2,c")
+
+def test_missing_policy_file_means_an_uncalibrated_half_cutoff(tmp_path):
+    policy = DecisionPolicy.load(str(tmp_path / "absent.json"), DecisionPolicyConfig(grade_cutoffs="", bands=""))
+    calibrated, labels = policy.apply(np.array([0.2, 0.5, 0.7]))
+    assert calibrated.tolist() == [0.2, 0.5, 0.7]
+    assert labels.tolist() == [0, 1, 1]
@@ -0,0 +1,106 @@
+'''Drift references built at training time and the PSI/KS the serving monitor derives from them.'''
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+import pytest # type: ignore
+
+from src.components.drift_monitor import (ColumnSketch, DriftMonitor, DriftMonitorConfig, build_feature_reference,
+                                          categorical_reference, numeric_reference, psi, save_reference)
+
+GRADES = ["A", "B", "C", "D"]
+
+def training_frame(n=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    income = rng.lognormal(10.9, 0.5, n)
+    income[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({"person_income": income, "loan_grade": rng.choice(GRADES, size=n, p=[0.4, 0.3, 0.2, 0.1])})
+
+def traffic(n, seed, income_scale=1.0, grades=GRADES, grade_p=(0.4, 0.3, 0.2, 0.1)):
+    rng = np.random.default_rng(seed)
+    income = rng.lognormal(10.9, 0.5, n) * income_scale
+    return [{"person_income": None if rng.random() < 0.05 else float(value), "loan_grade": str(grade)}
+            for value, grade in zip(income, rng.choice(grades, size=n, p=grade_p))]
+
+@pytest.fixture
+def monitor(tmp_path):
+    config = DriftMonitorConfig(
+        reference_path=str(tmp_path / "drift_reference.json"),
+        prediction_reference_path=str(tmp_path / "prediction_reference.json"),
+        window_size=5000, refresh_seconds=1e9,
+    )
+    save_reference(build_feature_reference(training_frame(), n_bins=10), config.reference_path)
+    save_reference(numeric_reference(np.random.default_rng(1).beta(2, 5, 20000), 10), config.prediction_reference_path)
+    return DriftMonitor(config)
+
+def test_numeric_reference_has_quantile_bins_and_a_missing_bin():
+    values = np.r_[np.arange(1000, dtype=np.float64), [np.nan] * 250]
+    reference = numeric_reference(values, 4)
+    assert reference["edges"] == pytest.approx([249.75, 499.5, 749.25])
+    assert reference["proportions"] == pytest.approx([0.2, 0.2, 0.2, 0.2, 0.2])
+
+def test_categorical_reference_reserves_other_and_missing_bins():
+    reference = categorical_reference(["B", "A", "B", None, float("nan")])
+    assert reference["categories"] == ["A", "B"]
+    # A, B, other (unseen when serving), missing.
+    assert reference["proportions"] == pytest.approx([0.2, 0.4, 0.0, 0.4])
+
+def test_psi_is_zero_for_identical_shares_and_matches_its_definition():
+    expected = np.array([0.25, 0.25, 0.5])
+    actual = np.array([0.5, 0.25, 0.25])
+    assert psi(expected, expected) == 0.0
+    assert psi(actual, expected) == pytest.approx(0.25 * np.log(2) + 0.25 * np.log(2))
+
+def test_sketch_scores_ks_on_the_binned_cdf():
+    sketch = ColumnSketch("x", {"type": "numeric", "edges": [1.0, 2.0], "proportions": [0.5, 0.25, 0.25, 0.0]})
+    sketch.add_many([0.5, 1.5, 1.5, 2.5])
+    psi_value, ks = sketch.scores()
+    assert ks == pytest.approx(0.25)
+    assert psi_value > 0
+
+def test_small_and_large_batches_bin_identically(monitor):
+    records = traffic(200, seed=2) + [{"person_income": None, "loan_grade": "Z"}]
+    probabilities = np.random.default_rng(3).random(len(records))
+    other = DriftMonitor(monitor.monitor_config)
+    monitor.update(records, probabilities, "v1")
+    for start in range(0, len(records), 10):
+        other.update(records[start:start + 10], probabilities[start:start + 10], "v1")
+    for sketch, other_sketch in zip(monitor._all_sketches(), other._all_sketches()):
+        np.testing.assert_array_equal(sketch.current, other_sketch.current)
+    grade = next(sketch for sketch in monitor.sketches if sketch.name == "loan_grade")
+    assert grade.current[grade.other_bin] == 1
+
+def test_stable_traffic_scores_low(monitor):
+    records = traffic(4000, seed=4)
+    monitor.update(records, np.random.default_rng(5).beta(2, 5, len(records)), "v1")
+    scores = monitor.scores()
+    assert set(scores) == {"person_income", "loan_grade", "prediction"}
+    assert all(value[0] < 0.02 for value in scores.values())
+    assert scores["person_income"][1] < 0.05
+
+def test_shifted_traffic_scores_high(monitor):
+    records = traffic(4000, seed=6, income_scale=2.0, grade_p=(0.1, 0.2, 0.3, 0.4))
+    monitor.update(records, np.random.default_rng(7).beta(5, 2, len(records)), "v1")
+    scores = monitor.scores()
+    assert scores["person_income"][0] > 0.2
+    assert scores["person_income"][1] > 0.3
+    assert scores["loan_grade"][0] > 0.2
+    assert scores["loan_grade"][1] is None
+    assert scores["prediction"][0] > 0.2
+
+def test_old_traffic_leaves_after_two_windows(monitor):
+    shifted = traffic(5000, seed=8, income_scale=2.0)
+    monitor.update(shifted, np.full(len(shifted), 0.2), "v1")
+    for seed in (9, 10):
+        monitor.update(traffic(5000, seed=seed), np.full(5000, 0.2), "v1")
+    assert monitor.scores()["person_income"][0] < 0.02
+
+def test_a_new_model_version_restarts_the_window(monitor):
+    monitor.update(traffic(1000, seed=11, income_scale=2.0), np.full(1000, 0.2), "v1")
+    monitor.update(traffic(100, seed=12), np.full(100, 0.2), "v2")
+    income = next(sketch for sketch in monitor.sketches if sketch.name == "person_income")
+    assert income.current.sum() + income.previous.sum() == 100
+
+def test_missing_reference_leaves_the_monitor_inactive(tmp_path):
+    monitor = DriftMonitor(DriftMonitorConfig(reference_path=str(tmp_path / "absent.json"),
+                                              prediction_reference_path=str(tmp_path / "absent_too.json")))
+    monitor.update(traffic(10, seed=13), np.zeros(10), "v1")
+    assert monitor.scores() == {}
@@ -0,0 +1,49 @@
+'''Flat tree export of XGBoost/LightGBM models against the boosters it was converted from.'''
+import warnings
+import numpy as np # type: ignore
+import pytest # type: ignore
+from lightgbm import LGBMClassifier # type: ignore
+from xgboost import XGBClassifier # type: ignore
+
+from src.components.flat_trees import flatten_estimator, _lightgbm_threshold
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(4000, 5)).astype(np.float32)
+    missing = rng.random(len(X)) < 0.3
+    X[missing, 0] = np.nan
+    # A NaN-vs-present split: LightGBM writes it with a 1e300 threshold.
+    y = (missing | (X[:, 1] > 1) | (rng.random(len(X)) < 0.05)).astype(int)
+    return X, y
+
+@pytest.mark.parametrize("model", [
+    XGBClassifier(n_estimators=30, max_depth=4, random_state=0),
+    XGBClassifier(n_estimators=30, max_depth=4, booster="dart", random_state=0),
+    LGBMClassifier(n_estimators=30, num_leaves=15, verbose=-1, random_state=0),
+    LGBMClassifier(n_estimators=30, num_leaves=15, boosting_type="dart", verbose=-1, random_state=0),
+], ids=["xgb_gbtree", "xgb_dart", "lgbm_gbdt", "lgbm_dart"])
+def test_flat_trees_match_booster_without_warnings(data, model):
+    X, y = data
+    model.fit(X, y)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        ensemble = flatten_estimator(model)
+        proba = ensemble.positive_proba(X)
+    expected = model.predict_proba(X)[:, 1]
+    np.testing.assert_allclose(proba, expected, atol=1e-6)
+    assert np.array_equal(proba > 0.5, expected > 0.5)
+
+@pytest.mark.parametrize("value", [1e300, -1e300, 3.4028234663852886e38, 0.5, -2.75, 1.0000000180025095e-35])
+def test_lightgbm_threshold_is_exact_on_float32_inputs(value):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        threshold = _lightgbm_threshold(value)
+    finite = np.finfo(np.float32)
+    # float32 neighbours of the threshold and the extremes: `x < t` must equal `x <= value`.
+    candidates = [np.float32(-np.inf), np.float32(finite.min), np.float32(finite.max), np.float32(np.inf)]
+    if np.isfinite(threshold):
+        with np.errstate(over="ignore"):
+            candidates += [np.nextafter(threshold, np.float32(-np.inf)), threshold, np.nextafter(threshold, np.float32(np.inf))]
+    for x in candidates:
+        assert bool(x < threshold) == bool(float(x) <= value), (x, threshold)
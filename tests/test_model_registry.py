@@ -0,0 +1,20 @@
+'''Booster thread settings of the serving registry.'''
+from types import SimpleNamespace
+from xgboost import XGBClassifier # type: ignore
+
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+
+def test_set_threads_applies_to_the_active_model_and_later_loads():
+    registry = ModelRegistry(ModelRegistryConfig(model_threads=4))
+    model = XGBClassifier(n_jobs=4)
+    registry._artifacts = SimpleNamespace(model=model)
+    registry.set_threads(1)
+    assert model.get_params()["n_jobs"] == 1
+    assert registry.registry_config.model_threads == 1
+    registry.set_threads(3)
+    assert model.get_params()["n_jobs"] == 3
+
+def test_set_threads_before_the_first_load_only_sets_the_config():
+    registry = ModelRegistry(ModelRegistryConfig(model_threads=4))
+    registry.set_threads(1)
+    assert registry.registry_config.model_threads == 1
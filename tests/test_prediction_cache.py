@@ -0,0 +1,128 @@
+'''Prediction cache keys, expiry and eviction, and labels of cached applications.'''
+import sqlite3
+from types import SimpleNamespace
+import numpy as np # type: ignore
+import pytest # type: ignore
+
+import src.pipeline.prediction_cache as prediction_cache
+from src.components.decision_policy import DecisionPolicy, DecisionPolicyConfig
+from src.pipeline.predict_pipeline import PredictPipeline, WARMUP_RECORD
+from src.pipeline.prediction_cache import (DiskBackend, MemoryBackend, PredictionCache, PredictionCacheConfig,
+                                           record_key)
+
+def application(**changes):
+    return {**WARMUP_RECORD, **changes}
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(prediction_cache.time, "monotonic", clock)
+    monkeypatch.setattr(prediction_cache.time, "time", clock)
+    return clock
+
+def test_key_is_canonical_across_numeric_types_and_missing_values():
+    base = record_key(application(person_age=25, loan_int_rate=None), "v1")
+    assert record_key(application(person_age=25.0, loan_int_rate=float("nan")), "v1") == base
+    assert record_key(application(person_age=np.int64(25), loan_int_rate=np.nan), "v1") == base
+    # Field order of the dict does not matter.
+    assert record_key(dict(reversed(list(application(person_age=25, loan_int_rate=None).items()))), "v1") == base
+
+def test_key_changes_with_any_field_and_the_version():
+    base = record_key(application(), "v1")
+    assert record_key(application(), "v2") != base
+    for field, value in [("person_age", 29), ("loan_grade", "C"), ("loan_int_rate", None), ("person_income", 55000.01)]:
+        assert record_key(application(**{field: value}), "v1") != base
+
+@pytest.fixture(params=["memory", "disk"])
+def backend(request, tmp_path, clock):
+    if request.param == "memory":
+        return MemoryBackend(max_entries=3, ttl_seconds=60)
+    return DiskBackend(str(tmp_path / "cache.sqlite"), max_entries=3, ttl_seconds=60)
+
+def test_entries_expire_after_the_ttl(backend, clock):
+    backend.put_many([("a", 0.25)], "v1")
+    clock.now += 59
+    assert backend.get_many(["a", "b"]) == ([0.25, None], 0)
+    clock.now += 2
+    assert backend.get_many(["a"]) == ([None], 1)
+
+def test_least_recently_used_entries_are_evicted(backend, clock):
+    assert backend.put_many([("a", 0.1), ("b", 0.2), ("c", 0.3)], "v1") == 0
+    clock.now += 1
+    backend.get_many(["a"])
+    clock.now += 1
+    assert backend.put_many([("d", 0.4)], "v1") == 1
+    assert backend.get_many(["a", "b", "c", "d"])[0] == [0.1, None, 0.3, 0.4]
+
+def test_disk_cache_is_shared_and_drops_other_versions(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite")
+    first, second = DiskBackend(path, 100, 60), DiskBackend(path, 100, 60)
+    first.put_many([("old", 0.1)], "v1")
+    second.put_many([("new", 0.2)], "v2")
+    assert first.get_many(["old", "new"])[0] == [0.1, 0.2]
+    first.clear(keep_version="v2")
+    assert second.get_many(["old", "new"])[0] == [None, 0.2]
+
+def test_disk_cache_drops_a_table_of_cached_labels(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE predictions (key TEXT PRIMARY KEY, version TEXT, probability REAL, "
+                           "label INTEGER, expires_at REAL, last_used REAL)")
+        connection.execute("INSERT INTO predictions VALUES ('a', 'v1', 0.9, 1, 1e12, 0)")
+    backend = DiskBackend(path, 100, 60)
+    assert backend.get_many(["a"])[0] == [None]
+    backend.put_many([("a", 0.3)], "v1")
+    assert backend.get_many(["a"])[0] == [0.3]
+
+def test_cache_drops_entries_of_a_previous_model_version(clock):
+    cache = PredictionCache(PredictionCacheConfig(enabled=True, backend="memory"))
+    records = [application()]
+    keys, values = cache.get_many(records, "v1")
+    assert values == [None]
+    cache.put_many(keys, [0.4], "v1")
+    assert cache.get_many(records, "v1")[1] == [0.4]
+    assert cache.get_many(records, "v2")[1] == [None]
+    assert cache.get_many(records, "v1")[1] == [None]
+
+class CountingModel:
+    '''Positive probability = loan_amnt / 20000; counts the rows it scores.'''
+    def __init__(self):
+        self.rows = 0
+
+    def predict_proba(self, X):
+        self.rows += len(X)
+        positive = np.asarray(X, dtype=np.float64)[:, 0] / 20000
+        return np.column_stack([1 - positive, positive])
+
+def serving(policy, model, cache):
+    artifacts = SimpleNamespace(
+        model=model, policy=policy, version="v1", model_name="CountingModel", preprocessor=None,
+        fast_preprocessor=SimpleNamespace(transform=lambda records: np.array([[r["loan_amnt"]] for r in records])),
+    )
+    registry = SimpleNamespace(get=lambda: artifacts)
+    monitor = SimpleNamespace(update=lambda *args: None)
+    return PredictPipeline(registry=registry, cache=cache, monitor=monitor)
+
+def test_cached_applications_get_labels_from_the_current_policy(clock):
+    cache = PredictionCache(PredictionCacheConfig(enabled=True, backend="memory"))
+    model = CountingModel()
+    records = [application(loan_amnt=9000.0, loan_grade="G"), application(loan_amnt=9000.0, loan_grade="A")]
+    policy = {"threshold": 0.5}
+    probabilities, labels, _, _ = serving(DecisionPolicy(policy, DecisionPolicyConfig(grade_cutoffs="")), model, cache).predict_records(records)
+    assert labels.tolist() == [0, 0]
+    assert model.rows == 2
+
+    # Restarted with a grade cutoff: same artifacts and version, so both applications are cache hits.
+    stricter = DecisionPolicy(policy, DecisionPolicyConfig(grade_cutoffs="G:0.3"))
+    cached_probabilities, labels, decisions, _ = serving(stricter, model, cache).predict_records(records)
+    assert model.rows == 2
+    np.testing.assert_array_equal(cached_probabilities, probabilities)
+    assert labels.tolist() == [1, 0]
+    assert decisions.tolist() == ["review", "review"]
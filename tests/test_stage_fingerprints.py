@@ -0,0 +1,59 @@
+'''Stage fingerprints change with what a stage writes, not with serving-only settings.'''
+import functools
+import pytest # type: ignore
+
+import src.components.data_transformation as data_transformation
+import src.components.model_trainer as model_trainer
+from src.components.data_transformation import DataTransformation
+from src.components.decision_policy import DecisionPolicyConfig
+from src.components.drift_monitor import DriftMonitorConfig
+from src.components.model_optimizer import ModelOptimizerConfig
+from src.components.model_trainer import ModelTrainer
+
+INPUTS = {"train": "0" * 64, "test": "1" * 64}
+
+def fingerprints():
+    return DataTransformation().stage_fingerprint(INPUTS), ModelTrainer().stage_fingerprint(INPUTS)
+
+def with_config(monkeypatch, module, name, config_class, **overrides):
+    # The stages build their configs with `Config()`; the dataclass defaults are read from the env at import.
+    monkeypatch.setattr(module, name, functools.partial(config_class, **overrides))
+
+@pytest.fixture(scope="module")
+def baseline():
+    return fingerprints()
+
+@pytest.mark.parametrize("overrides", [{"enabled": False}, {"window_size": 123}, {"refresh_seconds": 60.0}])
+def test_serving_drift_settings_do_not_invalidate_training(monkeypatch, baseline, overrides):
+    with_config(monkeypatch, data_transformation, "DriftMonitorConfig", DriftMonitorConfig, **overrides)
+    with_config(monkeypatch, model_trainer, "DriftMonitorConfig", DriftMonitorConfig, **overrides)
+    assert fingerprints() == baseline
+
+def test_drift_bins_invalidate_transformation_and_training(monkeypatch, baseline):
+    with_config(monkeypatch, data_transformation, "DriftMonitorConfig", DriftMonitorConfig, n_bins=20)
+    with_config(monkeypatch, model_trainer, "DriftMonitorConfig", DriftMonitorConfig, n_bins=20)
+    transformation, trainer = fingerprints()
+    assert transformation != baseline[0]
+    assert trainer != baseline[1]
+
+@pytest.mark.parametrize("overrides", [{"bands": "a:0.1,b"}, {"grade_cutoffs": "G:0.3"}])
+def test_serving_policy_rules_do_not_invalidate_training(monkeypatch, baseline, overrides):
+    with_config(monkeypatch, model_trainer, "DecisionPolicyConfig", DecisionPolicyConfig, **overrides)
+    assert fingerprints() == baseline
+
+@pytest.mark.parametrize("overrides", [{"objective": "cost"}, {"cost_false_negative": 10.0}, {"cost_false_positive": 2.0}])
+def test_policy_objective_invalidates_training(monkeypatch, baseline, overrides):
+    with_config(monkeypatch, model_trainer, "DecisionPolicyConfig", DecisionPolicyConfig, **overrides)
+    transformation, trainer = fingerprints()
+    assert transformation == baseline[0]
+    assert trainer != baseline[1]
+
+@pytest.mark.parametrize("overrides", [{"output_dir": "elsewhere"}, {"latency_batch_rows": 10}, {"latency_repeats": 3}])
+def test_optimizer_report_settings_do_not_invalidate_training(monkeypatch, baseline, overrides):
+    with_config(monkeypatch, model_trainer, "ModelOptimizerConfig", ModelOptimizerConfig, **overrides)
+    assert fingerprints() == baseline
+
+@pytest.mark.parametrize("overrides", [{"enabled": False}, {"trim_rounds": False}, {"max_f1_drop": 0.01}, {"max_auc_drop": 0.01}])
+def test_optimizer_export_settings_invalidate_training(monkeypatch, baseline, overrides):
+    with_config(monkeypatch, model_trainer, "ModelOptimizerConfig", ModelOptimizerConfig, **overrides)
+    assert fingerprints()[1] != baseline[1]
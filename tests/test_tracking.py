@@ -0,0 +1,122 @@
+'''SweepTracker: log_batch chunking, detail levels and background writes, against a recording client.'''
+import threading
+from types import SimpleNamespace
+import numpy as np # type: ignore
+import pytest # type: ignore
+
+from src.utils.tracking import MAX_METRICS_PER_BATCH, MAX_PARAMS_PER_BATCH, SweepTracker, TrackingConfig
+
+class RecordingClient:
+    '''The MlflowClient calls SweepTracker makes, recorded instead of sent.'''
+    def __init__(self, fail=False):
+        self.batches = []
+        self.created = []
+        self.terminated = []
+        self.fail = fail
+        self.threads = set()
+
+    def log_batch(self, run_id, metrics=(), params=(), tags=()):
+        self.threads.add(threading.current_thread().name)
+        if self.fail:
+            raise RuntimeError("tracking server down")
+        self.batches.append(SimpleNamespace(run_id=run_id, metrics=list(metrics), params=list(params), tags=list(tags)))
+
+    def get_run(self, run_id):
+        return SimpleNamespace(info=SimpleNamespace(experiment_id="1"))
+
+    def create_run(self, experiment_id, run_name=None, tags=None):
+        self.created.append((run_name, tags))
+        return SimpleNamespace(info=SimpleNamespace(run_id=f"child-{len(self.created)}"))
+
+    def set_terminated(self, run_id):
+        self.terminated.append(run_id)
+
+def cv_results(n_candidates):
+    rng = np.random.default_rng(0)
+    return {
+        "mean_test_score": rng.random(n_candidates),
+        "std_test_score": rng.random(n_candidates),
+        "mean_fit_time": rng.random(n_candidates),
+        "params": [{"model__C": c, "model__penalty": "l2"} for c in range(n_candidates)],
+    }
+
+REPORT = {"best_score": 0.61, "seconds": 12.5, "n_fits": 1500, "best_params": {"model__C": 3, "model__penalty": "l2"}}
+
+def tracker(detail, client, background=False):
+    return SweepTracker("parent", TrackingConfig(mode="batched", detail=detail, background=background), client=client)
+
+def test_large_sweeps_are_chunked_to_the_log_batch_limits():
+    client = RecordingClient()
+    sweep = tracker("candidates", client)
+    sweep.log_sweep("LGBMClassifier", cv_results(500), REPORT)
+    stats = sweep.close()
+
+    metrics = [metric for batch in client.batches for metric in batch.metrics]
+    params = [param for batch in client.batches for param in batch.params]
+    assert len(metrics) == 3 + 3 * 500
+    assert len(params) == 2 + 500
+    assert len({(metric.key, metric.step) for metric in metrics}) == len(metrics)
+    assert len({param.key for param in params}) == len(params)
+    for batch in client.batches:
+        assert batch.run_id == "parent"
+        assert len(batch.metrics) <= MAX_METRICS_PER_BATCH
+        assert len(batch.params) <= MAX_PARAMS_PER_BATCH
+        assert len(batch.metrics) + len(batch.params) + len(batch.tags) <= 1000
+    # As few requests as the params (the tighter limit) need.
+    assert len(client.batches) == -(-502 // MAX_PARAMS_PER_BATCH)
+    assert stats["calls"] == len(client.batches)
+    assert (stats["metrics"], stats["params"]) == (len(metrics), len(params))
+
+def test_candidate_metrics_are_stepped_by_candidate():
+    client = RecordingClient()
+    results = cv_results(4)
+    sweep = tracker("candidates", client)
+    sweep.log_sweep("XGBClassifier", results, REPORT)
+    sweep.close()
+    cv_f1 = sorted((metric.step, metric.value) for batch in client.batches for metric in batch.metrics
+                   if metric.key == "XGBClassifier_candidate_cv_f1")
+    assert cv_f1 == list(enumerate(results["mean_test_score"].tolist()))
+
+def test_summary_detail_logs_only_the_sweep_summary():
+    client = RecordingClient()
+    sweep = tracker("summary", client)
+    sweep.log_sweep("XGBClassifier", cv_results(50), REPORT)
+    sweep.close()
+    assert len(client.batches) == 1
+    assert {metric.key for metric in client.batches[0].metrics} == {
+        "XGBClassifier_best_f1_score", "XGBClassifier_search_seconds", "XGBClassifier_n_fits"}
+    assert {param.key for param in client.batches[0].params} == {"XGBClassifier_best_model__C", "XGBClassifier_best_model__penalty"}
+
+def test_runs_detail_creates_one_terminated_child_run_per_candidate():
+    client = RecordingClient()
+    sweep = tracker("runs", client)
+    sweep.log_sweep("XGBClassifier", cv_results(3), REPORT)
+    stats = sweep.close()
+    assert [name for name, _ in client.created] == ["XGBClassifier_0", "XGBClassifier_1", "XGBClassifier_2"]
+    assert all(tags == {"mlflow.parentRunId": "parent"} for _, tags in client.created)
+    assert client.terminated == ["child-1", "child-2", "child-3"]
+    child_batches = [batch for batch in client.batches if batch.run_id != "parent"]
+    assert [len(batch.metrics) for batch in child_batches] == [3, 3, 3]
+    assert all(batch.tags[0].value == "XGBClassifier" for batch in child_batches)
+    assert stats["child_runs"] == 3
+
+def test_background_writes_are_ordered_and_flushed():
+    client = RecordingClient()
+    sweep = tracker("summary", client, background=True)
+    for name in ("LogisticRegression", "XGBClassifier", "LGBMClassifier"):
+        sweep.log_sweep(name, cv_results(2), REPORT)
+    sweep.log(metrics={"best_f1_score": 0.6}, params={"best_model": "XGBClassifier"})
+    sweep.close()
+    assert client.threads and all(name.startswith("mlflow-tracking") for name in client.threads)
+    assert [batch.metrics[0].key for batch in client.batches] == [
+        "LogisticRegression_best_f1_score", "XGBClassifier_best_f1_score", "LGBMClassifier_best_f1_score", "best_f1_score"]
+
+def test_tracking_errors_do_not_reach_training():
+    sweep = tracker("candidates", RecordingClient(fail=True), background=True)
+    sweep.log_sweep("XGBClassifier", cv_results(5), REPORT)
+    stats = sweep.close()
+    assert stats["calls"] == 0
+
+def test_unknown_detail_is_rejected():
+    with pytest.raises(ValueError):
+        tracker("everything", RecordingClient())